@@ -0,0 +1,71 @@
+# Alertas de estoque baixo
+
+"""
+Módulo alertas
+--------------
+Lista de produtos com estoque baixo mantida em memória.
+
+A primeira leitura usa :func:`repository.listar_estoque_baixo` (só as
+linhas em alerta, pelo índice do déficit). Depois de cada venda, entrada
+ou edição, :meth:`AlertasEstoque.atualizar` relê apenas os produtos que
+mudaram (pelo registro de alterações), então a lista fica pronta sem
+varrer a tabela de produtos.
+"""
+
+import threading
+
+import repository as repo
+
+
+class AlertasEstoque:
+    """Produtos com ``quantidade <= estoque_minimo``, por urgência."""
+
+    def __init__(self):
+        self.por_id = {}
+        self.versao = None
+        self._lock = threading.Lock()
+
+    def carregar(self):
+        """Relê todos os produtos em alerta."""
+        with self._lock:
+            versao = repo.versao_alteracoes()
+            self.por_id = {p["id_produto"]: p for p in repo.listar_estoque_baixo()}
+            self.versao = versao
+
+    def atualizar(self):
+        """
+        Relê só os produtos alterados desde a última leitura e os põe ou
+        tira da lista. Na primeira vez (ou se há alterações demais) carrega
+        tudo.
+
+        Returns
+        -------
+        list[dict]
+            A lista atualizada (ver :meth:`lista`).
+        """
+        if self.versao is None:
+            self.carregar()
+            return self.lista()
+        with self._lock:
+            alteracoes, nova_versao = repo.alteracoes_desde("produto", self.versao)
+            if alteracoes is not None:
+                encontrados = repo.buscar_estoque_por_ids(
+                    [i for i, op in alteracoes.items() if op != "D"])
+                for id_produto in alteracoes:
+                    self.por_id.pop(id_produto, None)
+                for p in encontrados:
+                    if p["deficit_estoque"] >= 0:
+                        self.por_id[p["id_produto"]] = p
+                self.versao = nova_versao
+        if alteracoes is None:
+            self.carregar()
+        return self.lista()
+
+    def lista(self):
+        """Produtos em alerta, do maior déficit para o menor (mesma ordem de :func:`repository.listar_estoque_baixo`)."""
+        with self._lock:
+            produtos = list(self.por_id.values())
+        return sorted(produtos, key=lambda p: (-p["deficit_estoque"], p["id_produto"]))
+
+    def __len__(self):
+        return len(self.por_id)
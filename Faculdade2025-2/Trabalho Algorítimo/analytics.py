@@ -0,0 +1,284 @@
+# Análises de vendas em memória (NumPy)
+
+"""
+Módulo analytics
+----------------
+Carrega os itens vendidos em arrays colunares do NumPy e calcula, sem
+voltar ao banco, agregações para os relatórios: receita por período,
+categoria e cliente, produtos mais vendidos, curva ABC e média móvel.
+
+Os itens vêm por um cursor em streaming (:func:`db.fetchiter`), em blocos,
+e ficam em colunas compactas: IDs em ``int32``, valores em centavos
+(``int64``, sem erro de arredondamento) e datas em ``datetime64[s]``.
+A base carregada é reaproveitada enquanto o registro de alterações não
+mostrar vendas ou produtos novos (ver :func:`obter_base`).
+
+O NumPy é opcional: sem ele o módulo importa normalmente,
+:data:`DISPONIVEL` é ``False`` e :func:`obter_base` levanta
+``RuntimeError``.
+
+>>> base = analytics.obter_base()
+>>> base.receita_por_periodo("M")[-3:]
+>>> base.top_produtos(10)
+"""
+
+import threading
+from decimal import Decimal
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:     # análises desligadas; o resto do sistema não depende disso
+    np = None
+
+import repository as repo
+from db import fetchall, fetchiter
+
+DISPONIVEL = np is not None
+
+BLOCO = 50_000
+
+SQL_ITENS = """
+        SELECT pv.id_venda, COALESCE(v.id_cliente, 0), pv.id_produto, pv.quantidade,
+               CAST(ROUND(pv.subtotal * 100) AS SIGNED),
+               TIMESTAMPDIFF(SECOND, '1970-01-01', v.data_venda)
+        FROM produto_venda pv
+        JOIN venda v ON v.id_venda = pv.id_venda
+        WHERE v.data_venda IS NOT NULL
+    """
+
+# (nome, dtype) de cada coluna de SQL_ITENS, na mesma ordem
+_COLUNAS = (
+    ("id_venda", "int32"),
+    ("id_cliente", "int32"),
+    ("id_produto", "int32"),
+    ("quantidade", "int32"),
+    ("centavos", "int64"),
+    ("data", "datetime64[s]"),
+)
+
+_lock = threading.Lock()
+_cache = {}     # desde -> (versão, base)
+
+
+def _reais(centavos):
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+class VendasColunares:
+    """
+    Itens vendidos em colunas (um array do NumPy por coluna).
+
+    Attributes
+    ----------
+    id_venda, id_cliente, id_produto, quantidade : numpy.ndarray
+        ``int32``; ``id_cliente`` é 0 para vendas de clientes excluídos.
+    centavos : numpy.ndarray
+        Subtotal de cada item em centavos (``int64``).
+    data : numpy.ndarray
+        Data da venda (``datetime64[s]``).
+    categoria : numpy.ndarray
+        Código da categoria do produto (índice em ``categorias``).
+    categorias : list[str]
+    nomes : dict[int, str]
+        Nome de cada produto.
+    """
+
+    def __init__(self, colunas, produtos):
+        for nome, _ in _COLUNAS:
+            setattr(self, nome, colunas[nome])
+        self.nomes = {p["id_produto"]: p["nome"] for p in produtos}
+        # categoria por produto, codificada como inteiro (uma busca por índice por item)
+        self.categorias = []
+        codigos = {}
+        maior_id = max([int(self.id_produto.max()) if len(self) else 0] + list(self.nomes))
+        categoria_do_produto = np.zeros(maior_id + 1, dtype="int32")
+        for p in produtos:
+            nome = p["categoria"] or "(sem categoria)"
+            if nome not in codigos:
+                codigos[nome] = len(self.categorias)
+                self.categorias.append(nome)
+            categoria_do_produto[p["id_produto"]] = codigos[nome]
+        if "(sem categoria)" not in codigos:
+            self.categorias.append("(sem categoria)")
+        # itens de produtos que não existem mais caem em "(sem categoria)"
+        conhecidos = np.zeros(maior_id + 1, dtype=bool)
+        conhecidos[[p["id_produto"] for p in produtos]] = True
+        self.categoria = np.where(conhecidos[self.id_produto], categoria_do_produto[self.id_produto],
+                                  self.categorias.index("(sem categoria)")).astype("int32")
+        self._resultados = {}
+
+    def __len__(self):
+        return len(self.id_venda)
+
+    def _memo(self, chave, calcular):
+        # a base é imutável: cada agregação é calculada uma vez
+        if chave not in self._resultados:
+            self._resultados[chave] = calcular()
+        return self._resultados[chave]
+
+    def _somar_por(self, chaves):
+        """Soma ``centavos`` e ``quantidade`` por valor distinto de ``chaves``."""
+        unicos, indice = np.unique(chaves, return_inverse=True)
+        centavos = np.bincount(indice, weights=self.centavos, minlength=len(unicos))
+        quantidade = np.bincount(indice, weights=self.quantidade, minlength=len(unicos))
+        return unicos, centavos.round().astype("int64"), quantidade.astype("int64")
+
+    # ---------- agregações ----------
+    def receita_por_periodo(self, periodo="M"):
+        """
+        Receita por dia (``"D"``), mês (``"M"``) ou ano (``"Y"``), em ordem.
+
+        Returns
+        -------
+        list[dict]
+            ``{"periodo": str, "receita": Decimal, "quantidade": int}``.
+        """
+        def calcular():
+            unicos, centavos, quantidade = self._somar_por(self.data.astype(f"datetime64[{periodo}]"))
+            return [{"periodo": str(u), "receita": _reais(c), "quantidade": int(q)}
+                    for u, c, q in zip(unicos, centavos, quantidade)]
+        return self._memo(("periodo", periodo), calcular)
+
+    def receita_por_categoria(self):
+        """Receita por categoria, da maior para a menor."""
+        def calcular():
+            centavos = np.bincount(self.categoria, weights=self.centavos,
+                                   minlength=len(self.categorias)).round().astype("int64")
+            ordem = np.argsort(-centavos, kind="stable")
+            return [{"categoria": self.categorias[i], "receita": _reais(centavos[i])}
+                    for i in ordem if centavos[i]]
+        return self._memo(("categoria",), calcular)
+
+    def receita_por_cliente(self, n=None):
+        """Receita por cliente, da maior para a menor (os ``n`` primeiros, se dado)."""
+        def calcular():
+            unicos, centavos, _ = self._somar_por(self.id_cliente)
+            ordem = np.argsort(-centavos, kind="stable")
+            return [{"id_cliente": int(unicos[i]), "receita": _reais(centavos[i])} for i in ordem]
+        resultado = self._memo(("cliente",), calcular)
+        return resultado if n is None else resultado[:n]
+
+    def _por_produto(self):
+        def calcular():
+            unicos, centavos, quantidade = self._somar_por(self.id_produto)
+            ordem = np.argsort(-centavos, kind="stable")
+            return unicos[ordem], centavos[ordem], quantidade[ordem]
+        return self._memo(("produto",), calcular)
+
+    def top_produtos(self, n=10):
+        """Os ``n`` produtos de maior receita."""
+        ids, centavos, quantidade = self._por_produto()
+        return [{"id_produto": int(i), "produto": self.nomes.get(int(i), "?"),
+                 "quantidade": int(q), "receita": _reais(c)}
+                for i, c, q in zip(ids[:n], centavos[:n], quantidade[:n])]
+
+    def curva_abc(self, limite_a=0.8, limite_b=0.95):
+        """
+        Classifica os produtos pela participação acumulada na receita:
+        A até ``limite_a``, B até ``limite_b``, C o resto.
+
+        Returns
+        -------
+        dict
+            ``{"A": [ids], "B": [ids], "C": [ids]}``, cada lista da maior
+            receita para a menor.
+        """
+        def calcular():
+            ids, centavos, _ = self._por_produto()
+            total = centavos.sum()
+            if not total:
+                return {"A": [], "B": [], "C": []}
+            # participação acumulada *antes* de cada produto: o que cruza o limite fica na classe
+            anterior = (np.cumsum(centavos) - centavos) / total
+            classe_a = anterior < limite_a
+            classe_b = ~classe_a & (anterior < limite_b)
+            classe_c = ~classe_a & ~classe_b
+            return {"A": ids[classe_a].tolist(), "B": ids[classe_b].tolist(), "C": ids[classe_c].tolist()}
+        return self._memo(("abc", limite_a, limite_b), calcular)
+
+    def media_movel(self, janela=7):
+        """
+        Média móvel da receita diária (dias sem venda contam como zero).
+
+        Returns
+        -------
+        list[dict]
+            ``{"dia": str, "receita": Decimal, "media": Decimal}`` a partir
+            do ``janela``-ésimo dia.
+        """
+        def calcular():
+            if not len(self):
+                return []
+            dias = self.data.astype("datetime64[D]")
+            inicio = dias.min()
+            posicao = (dias - inicio).astype("int64")
+            diaria = np.bincount(posicao, weights=self.centavos)
+            if len(diaria) < janela:
+                return []
+            medias = np.convolve(diaria, np.ones(janela) / janela, mode="valid")
+            return [{"dia": str(inicio + np.timedelta64(janela - 1 + k, "D")),
+                     "receita": _reais(round(diaria[janela - 1 + k])),
+                     "media": _reais(round(m))}
+                    for k, m in enumerate(medias)]
+        return self._memo(("media_movel", janela), calcular)
+
+
+def carregar_base(desde=None, tamanho_lote=BLOCO):
+    """
+    Lê os itens vendidos (desde ``desde``, se dado) para uma :class:`VendasColunares`.
+
+    As linhas chegam pelo cursor em streaming e são convertidas em arrays a
+    cada ``tamanho_lote`` linhas, então a memória extra é a de um bloco.
+    """
+    if np is None:
+        raise RuntimeError("As análises de vendas precisam do NumPy (pip install numpy).")
+    sql, params = SQL_ITENS, None
+    if desde is not None:
+        sql, params = sql + " AND v.data_venda >= %s", (desde,)
+    blocos = {nome: [] for nome, _ in _COLUNAS}
+    linhas = fetchiter(sql, params, batch_size=tamanho_lote, dictionary=False)
+    while True:
+        bloco = list(islice(linhas, tamanho_lote))
+        if not bloco:
+            break
+        for (nome, tipo), valores in zip(_COLUNAS, zip(*bloco)):
+            if tipo.startswith("datetime64"):
+                blocos[nome].append(np.array(valores, dtype="int64").astype(tipo))
+            else:
+                blocos[nome].append(np.array(valores, dtype=tipo))
+    colunas = {nome: np.concatenate(partes) if partes else np.array([], dtype=tipo)
+               for (nome, tipo), partes in zip(_COLUNAS, blocos.values())}
+    produtos = fetchall("SELECT id_produto, nome, categoria FROM produto")
+    return VendasColunares(colunas, produtos)
+
+
+def obter_base(desde=None):
+    """
+    Base de :func:`carregar_base` guardada em memória.
+
+    Só relê o banco se o registro de alterações mostrar vendas ou produtos
+    inseridos, alterados ou removidos desde a última carga.
+    """
+    with _lock:
+        guardada = _cache.get(desde)
+        if guardada is not None:
+            versao, base = guardada
+            mudou = False
+            for tabela in ("venda", "produto"):
+                alteracoes, _ = repo.alteracoes_desde(tabela, versao)
+                if alteracoes is None or alteracoes:
+                    mudou = True
+                    break
+            if not mudou:
+                return base
+        versao = repo.versao_alteracoes()    # antes dos dados: o que mudar durante a carga invalida
+        base = carregar_base(desde)
+        _cache[desde] = (versao, base)
+        return base
+
+
+def invalidar():
+    """Descarta as bases guardadas (ex.: depois de importar vendas direto no banco)."""
+    with _lock:
+        _cache.clear()
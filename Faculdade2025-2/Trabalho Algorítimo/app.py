@@ -3,23 +3,100 @@
 """
 
 Ponto de entrada principal do sistema da distribuidora.
+
+A janela aparece antes dos imports pesados (mysql.connector, dotenv,
+repository) e de qualquer conexão com o banco: depois da primeira pintura
+os módulos são importados um por vez, entre eventos do Tk, e o pool de
+conexões é aquecido numa thread enquanto a interface é montada. A mesma
+thread confere se as migrações (migrations/) foram aplicadas e, se faltar
+alguma, a janela avisa qual e como aplicá-la. Com
+``TEMPOS_INICIO=1`` os tempos da abertura saem na saída de erro (ver
+inicializacao.py).
 """
 
+import inicializacao    # primeiro import: é dele o instante zero
+import queue
+import threading
 import tkinter as tk
-from ui_main import App
+from tkinter import ttk, messagebox
+
+# Importados depois da primeira pintura, nesta ordem. O pool começa a ser
+# aquecido logo depois do db.
+MODULOS = ("mysql.connector", "dotenv", "db", "repository", "ui_grid", "ui_main")
+
+# Conexões abertas em segundo plano (a primeira aba faz consultas em paralelo)
+CONEXOES_AQUECIDAS = 2
+
+
+# Avisos da thread do banco para a janela (o Tk só pode ser usado na thread principal)
+avisos = queue.Queue()
+
+
+def aquecer_banco(db):
+    """
+    Abre as primeiras conexões do pool fora da thread da interface e
+    confere se o banco tem todas as migrações.
+    """
+    try:
+        db.warm_up(CONEXOES_AQUECIDAS)
+    except Exception:
+        # a consulta da primeira aba mostra o erro ao usuário
+        inicializacao.marcar("banco indisponível")
+        return
+    inicializacao.marcar("banco aquecido")
+    try:
+        import migrate
+        faltando = migrate.pendentes()
+    except Exception as e:
+        avisos.put(f"Não foi possível conferir as migrações do banco: {e}")
+        return
+    if faltando:
+        lista = "\n".join(f"  {versao:04d} {nome}" for versao, nome in faltando)
+        avisos.put("O banco está desatualizado. Migrações pendentes:\n"
+                   f"{lista}\n\nFeche o sistema e rode: python migrate.py")
+
+
+def mostrar_avisos(root, thread):
+    """Mostra, na thread da interface, o aviso deixado por aquecer_banco."""
+    try:
+        texto = avisos.get_nowait()
+    except queue.Empty:
+        if thread.is_alive():
+            root.after(200, mostrar_avisos, root, thread)
+    else:
+        messagebox.showwarning("Banco de dados", texto, parent=root)
+
+
+def carregar(root, aviso, pendentes):
+    """Importa o próximo módulo; depois do último, monta a interface."""
+    nome = pendentes.pop(0)
+    modulo = inicializacao.importar(nome)
+    if nome == "db":
+        thread = threading.Thread(target=aquecer_banco, args=(modulo,), name="aquecer-banco",
+                                  daemon=True)
+        thread.start()
+        root.after(200, mostrar_avisos, root, thread)
+    if pendentes:
+        aviso.config(text=f"Carregando ({len(MODULOS) - len(pendentes)}/{len(MODULOS)})...")
+        root.after(1, carregar, root, aviso, pendentes)
+    else:
+        aviso.destroy()
+        modulo.App(root)
+
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = App(root)
+    root.title("Distribuidora - Sistema")
     root.geometry("900x600")
+    aviso = ttk.Label(root, text="Carregando...")
+    aviso.pack(expand=True)
+    root.update()   # desenha a janela antes de qualquer import pesado
+    inicializacao.marcar("primeira pintura")
+    root.after(1, carregar, root, aviso, list(MODULOS))
     root.mainloop()
 
 """
-PARA TELA MAXIMIZADA: 
+PARA TELA MAXIMIZADA: trocar root.geometry("900x600") por
 
-if __name__ == "__main__":
-    root = tk.Tk()
-    app = App(root)
     root.state('zoomed')  # Janela maximizada
-    root.mainloop()
-    """
\ No newline at end of file
+    """
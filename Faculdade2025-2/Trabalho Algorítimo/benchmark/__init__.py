@@ -0,0 +1,18 @@
+"""
+Pacote benchmark
+----------------
+Medições de desempenho do sistema contra um MySQL local.
+
+Os scripts escrevem no banco configurado no .env (variável DATABASE):
+use um banco descartável, nunca o de produção.
+
+Execução (a partir da pasta do projeto):
+
+    python -m benchmark            # suíte completa, resultado em JSON
+    python -m benchmark.dados      # só gera dados sintéticos
+    python -m benchmark.venda      # caminho de venda (1, 10, 100 itens)
+    python -m benchmark.ingestao   # importação de vendas em lote
+    python -m benchmark.relatorio_vendas   # vendas com itens: N+1 x junção
+    python -m benchmark.memoria    # memória das linhas: dict x models.Registro
+    python -m benchmark.preparados # caminho de venda: texto x comandos preparados
+"""
@@ -0,0 +1,153 @@
+"""
+Executa a suíte de benchmarks e grava o resultado em JSON.
+
+Mede o tempo de cada função de leitura do repository.py (as mesmas
+chamadas verificadas pelo explain_check) e a vazão de
+repository.inserir_venda com 1..N threads concorrentes. Cada execução
+gera ``benchmark/resultados/<data>_<commit>.json``; compare arquivos de
+commits diferentes para achar regressões.
+
+Só acessa o MySQL configurado no .env (use uma instância local).
+
+Uso:
+
+    python -m benchmark --gerar --escala 0.01      # popula e mede
+    python -m benchmark --workers 1 2 4 8 --vendas 200
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import cache
+import db
+import explain_check
+import repository as repo
+from benchmark import dados
+
+PASTA_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+
+def _resumo(tempos):
+    """Estatísticas (ms) de uma lista de durações em segundos."""
+    tempos = sorted(tempos)
+    def pct(p):
+        return tempos[min(len(tempos) - 1, int(len(tempos) * p))] * 1000
+    return {
+        "n": len(tempos),
+        "media_ms": statistics.mean(tempos) * 1000,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "max_ms": tempos[-1] * 1000,
+    }
+
+
+def medir_consultas(repeticoes=5, saida=print):
+    """Tempo de cada função de leitura do repositório (sempre sem cache)."""
+    resultados = {}
+    for nome, chamada in explain_check.consultas_do_repositorio(explain_check.amostra()):
+        tempos = []
+        for _ in range(repeticoes):
+            cache.invalidar_tudo()
+            inicio = time.perf_counter()
+            chamada()
+            tempos.append(time.perf_counter() - inicio)
+        resultados[nome] = _resumo(tempos)
+        saida(f"{nome:<36} p50 {resultados[nome]['p50_ms']:9.2f}ms  p95 {resultados[nome]['p95_ms']:9.2f}ms")
+    return resultados
+
+
+def medir_vendas_concorrentes(workers, vendas_por_worker=100, itens=5, saida=print):
+    """
+    Vazão e latência de inserir_venda com ``workers`` threads em paralelo.
+
+    Cada thread vende produtos sorteados entre os 1.000 de maior estoque,
+    então há disputa real por linhas travadas.
+    """
+    produtos = db.fetchall(
+        "SELECT id_produto, preco FROM produto ORDER BY quantidade DESC LIMIT 1000")
+    clientes = [r["id_cliente"] for r in db.fetchall("SELECT id_cliente FROM cliente LIMIT 1000")]
+    if not produtos or not clientes:
+        raise RuntimeError("Base vazia: rode com --gerar primeiro.")
+
+    def trabalhador(semente):
+        rnd = random.Random(semente)
+        tempos, falhas = [], 0
+        for _ in range(vendas_por_worker):
+            escolhidos = rnd.sample(produtos, min(itens, len(produtos)))
+            venda = [(p["id_produto"], 1, p["preco"]) for p in escolhidos]
+            inicio = time.perf_counter()
+            try:
+                repo.inserir_venda(rnd.choice(clientes), venda)
+            except ValueError:
+                falhas += 1
+            tempos.append(time.perf_counter() - inicio)
+        return tempos, falhas
+
+    db.configure_pool(size=max(db.POOL_CONFIG["size"], workers))
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        partes = list(executor.map(trabalhador, range(workers)))
+    duracao = time.perf_counter() - inicio
+
+    tempos = [t for parte, _ in partes for t in parte]
+    resultado = _resumo(tempos)
+    resultado["workers"] = workers
+    resultado["falhas"] = sum(f for _, f in partes)
+    resultado["vendas_por_segundo"] = len(tempos) / duracao
+    resultado["pool"] = db.pool_stats()
+    saida(f"inserir_venda x{workers:<3} {resultado['vendas_por_segundo']:8.1f} vendas/s  "
+          f"p95 {resultado['p95_ms']:8.2f}ms  espera pool {resultado['pool']['wait_time']:.3f}s")
+    return resultado
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks da distribuidora.")
+    parser.add_argument("--gerar", action="store_true", help="gera dados sintéticos antes de medir")
+    parser.add_argument("--limpar", action="store_true", help="apaga os dados antes de gerar")
+    parser.add_argument("--escala", type=float, default=0.01)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--vendas", type=int, default=100, help="vendas por worker")
+    parser.add_argument("--saida", type=Path, default=PASTA_RESULTADOS)
+    args = parser.parse_args(argv)
+
+    if args.limpar:
+        dados.limpar()
+    if args.gerar:
+        dados.gerar(args.escala)
+
+    commit = _commit_atual()
+    resultado = {
+        "commit": commit,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "escala": args.escala if args.gerar else None,
+        "tabelas": explain_check.tamanho_tabelas(),
+        "consultas": medir_consultas(args.repeticoes),
+        "inserir_venda": [medir_vendas_concorrentes(w, args.vendas) for w in args.workers],
+    }
+
+    args.saida.mkdir(parents=True, exist_ok=True)
+    arquivo = args.saida / f"{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    arquivo.write_text(json.dumps(resultado, indent=2, default=str), encoding="utf-8")
+    print(f"\nResultado gravado em {arquivo}")
+
+
+if __name__ == "__main__":
+    main()
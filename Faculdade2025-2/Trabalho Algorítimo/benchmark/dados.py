@@ -0,0 +1,210 @@
+"""
+Gerador de dados sintéticos para o esquema da distribuidora.
+
+Na escala 1.0 gera 27 estados, 2.000 cidades, 5.000 clientes, 500
+fornecedores, 100.000 produtos e 1.000.000 de vendas (cerca de 3 milhões
+de linhas em produto_venda). Tudo é inserido com INSERTs de várias linhas,
+em lotes, e os IDs são atribuídos a partir do maior ID já existente.
+
+Uso:
+
+    python -m benchmark.dados --escala 0.1
+    python -m benchmark.dados --escala 1 --limpar   # apaga os dados antes!
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import repository as repo
+from db import fetchone, transaction
+
+ESTADOS = [
+    ("Acre", "AC"), ("Alagoas", "AL"), ("Amapá", "AP"), ("Amazonas", "AM"), ("Bahia", "BA"),
+    ("Ceará", "CE"), ("Distrito Federal", "DF"), ("Espírito Santo", "ES"), ("Goiás", "GO"),
+    ("Maranhão", "MA"), ("Mato Grosso", "MT"), ("Mato Grosso do Sul", "MS"), ("Minas Gerais", "MG"),
+    ("Pará", "PA"), ("Paraíba", "PB"), ("Paraná", "PR"), ("Pernambuco", "PE"), ("Piauí", "PI"),
+    ("Rio de Janeiro", "RJ"), ("Rio Grande do Norte", "RN"), ("Rio Grande do Sul", "RS"),
+    ("Rondônia", "RO"), ("Roraima", "RR"), ("Santa Catarina", "SC"), ("São Paulo", "SP"),
+    ("Sergipe", "SE"), ("Tocantins", "TO"),
+]
+CATEGORIAS = ["Bebidas", "Mercearia", "Limpeza", "Higiene", "Frios", "Hortifruti",
+              "Padaria", "Congelados", "Pet", "Utilidades"]
+PRENOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Hugo", "Isabela",
+            "João", "Karen", "Lucas", "Marina", "Nelson", "Olívia", "Pedro", "Renata", "Sérgio"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Lima", "Pereira", "Costa", "Almeida",
+              "Ferreira", "Rodrigues", "Gomes", "Martins", "Araújo", "Barbosa"]
+ITENS = ["Arroz", "Feijão", "Café", "Açúcar", "Leite", "Refrigerante", "Cerveja", "Sabão",
+         "Detergente", "Shampoo", "Queijo", "Presunto", "Biscoito", "Macarrão", "Óleo", "Suco"]
+
+# Quantidades na escala 1.0
+BASE = {
+    "cidades": 2_000,
+    "clientes": 5_000,
+    "fornecedores": 500,
+    "produtos": 100_000,
+    "vendas": 1_000_000,
+}
+LOTE = 5_000
+
+
+def _proximo_id(tabela, coluna):
+    row = fetchone(f"SELECT COALESCE(MAX({coluna}), 0) AS maximo FROM {tabela}")
+    return row["maximo"] + 1
+
+
+def _inserir(tabela, colunas, linhas):
+    """Insere ``linhas`` em lotes de LOTE, cada lote numa transação."""
+    sql = (f"INSERT INTO {tabela} ({', '.join(colunas)}) "
+           f"VALUES ({', '.join(['%s'] * len(colunas))})")
+    lote = []
+    total = 0
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= LOTE:
+            with transaction() as uow:
+                uow.executemany(sql, lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        with transaction() as uow:
+            uow.executemany(sql, lote)
+        total += len(lote)
+    return total
+
+
+def limpar():
+    """Apaga TODOS os dados das tabelas do sistema."""
+    with transaction() as uow:
+        uow.execute("SET FOREIGN_KEY_CHECKS = 0")
+        try:
+            for tabela in ("produto_venda", "venda", "entrada_produto", "produto", "cliente",
+                           "fornecedor", "endereco", "cidade", "estado", "alteracao",
+                           "resumo_venda_dia", "resumo_venda_produto", "resumo_venda_cliente"):
+                uow.execute(f"TRUNCATE TABLE {tabela}")
+        finally:
+            # a conexão volta ao pool: não pode ficar sem checar as FKs
+            uow.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+
+def gerar(escala=1.0, semente=42, saida=print):
+    """
+    Popula o banco com dados sintéticos.
+
+    Parameters
+    ----------
+    escala : float
+        Multiplicador das quantidades de BASE (0.01 gera uma base pequena).
+    semente : int
+        Semente do gerador aleatório (mesma semente, mesmos dados).
+
+    Returns
+    -------
+    dict
+        Quantidade de linhas inseridas por tabela.
+    """
+    rnd = random.Random(semente)
+    qtd = {k: max(1, int(v * escala)) for k, v in BASE.items()}
+    inseridas = {}
+
+    def etapa(nome, colunas, linhas):
+        inicio = time.perf_counter()
+        inseridas[nome] = _inserir(nome, colunas, linhas)
+        saida(f"{nome:<15} {inseridas[nome]:>10} linhas em {time.perf_counter() - inicio:6.1f}s")
+
+    # Estados: reaproveita os que já existem (nome e sigla são únicos)
+    with transaction() as uow:
+        existentes = {r["sigla"] for r in uow.fetchall("SELECT sigla FROM estado")}
+    etapa("estado", ("nome", "sigla"), [e for e in ESTADOS if e[1] not in existentes])
+    with transaction() as uow:
+        ids_estado = [r["id_estado"] for r in uow.fetchall("SELECT id_estado FROM estado")]
+
+    id_cidade = _proximo_id("cidade", "id_cidade")
+    ids_cidade = list(range(id_cidade, id_cidade + qtd["cidades"]))
+    etapa("cidade", ("id_cidade", "nome", "id_estado"),
+          ((i, f"Cidade {i}", rnd.choice(ids_estado)) for i in ids_cidade))
+
+    n_enderecos = qtd["clientes"] + qtd["fornecedores"]
+    id_end = _proximo_id("endereco", "id_endereco")
+    etapa("endereco", ("id_endereco", "rua", "numero", "bairro", "cep", "id_cidade"),
+          ((id_end + i, f"Rua {rnd.choice(SOBRENOMES)} {i}", str(rnd.randint(1, 3000)),
+            f"Bairro {rnd.randint(1, 80)}", f"{rnd.randint(10000, 99999)}-{rnd.randint(100, 999)}",
+            rnd.choice(ids_cidade)) for i in range(n_enderecos)))
+
+    def pessoa(i):
+        nome = f"{rnd.choice(PRENOMES)} {rnd.choice(SOBRENOMES)} {i}"
+        return nome, f"(31) 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}", f"contato{i}@exemplo.com"
+
+    id_forn = _proximo_id("fornecedor", "id_fornecedor")
+    ids_forn = list(range(id_forn, id_forn + qtd["fornecedores"]))
+    etapa("fornecedor", ("id_fornecedor", "nome", "telefone", "email", "id_endereco"),
+          ((f, *pessoa(f), id_end + k) for k, f in enumerate(ids_forn)))
+
+    id_cli = _proximo_id("cliente", "id_cliente")
+    ids_cli = list(range(id_cli, id_cli + qtd["clientes"]))
+    etapa("cliente", ("id_cliente", "nome", "telefone", "email", "id_endereco"),
+          ((c, *pessoa(c), id_end + qtd["fornecedores"] + k) for k, c in enumerate(ids_cli)))
+
+    id_prod = _proximo_id("produto", "id_produto")
+    ids_prod = list(range(id_prod, id_prod + qtd["produtos"]))
+    precos = {p: round(rnd.uniform(1, 300), 2) for p in ids_prod}
+    etapa("produto", ("id_produto", "nome", "categoria", "preco", "quantidade", "estoque_minimo", "id_fornecedor"),
+          ((p, f"{rnd.choice(ITENS)} {p}", rnd.choice(CATEGORIAS), precos[p],
+            rnd.randint(0, 5000), rnd.randint(1, 50), rnd.choice(ids_forn)) for p in ids_prod))
+
+    # Vendas dos últimos 3 anos; itens gerados junto (mesmos IDs de venda)
+    id_venda = _proximo_id("venda", "id_venda")
+    inicio_periodo = datetime.now() - timedelta(days=3 * 365)
+    segundos = 3 * 365 * 24 * 3600
+    itens_por_venda = {}
+
+    def vendas():
+        for k in range(qtd["vendas"]):
+            v = id_venda + k
+            itens = [(p, rnd.randint(1, 10)) for p in rnd.sample(ids_prod, min(len(ids_prod), rnd.randint(1, 5)))]
+            itens_por_venda[v] = itens
+            total = sum(q * precos[p] for p, q in itens)
+            yield (v, rnd.choice(ids_cli), inicio_periodo + timedelta(seconds=rnd.randint(0, segundos)),
+                   round(total, 2))
+
+    def itens():
+        for v in sorted(itens_por_venda):
+            for p, q in itens_por_venda.pop(v):
+                yield (v, p, q, precos[p], round(q * precos[p], 2))
+
+    # Gera e grava em blocos para não guardar milhões de vendas na memória
+    inseridas["venda"] = inseridas["produto_venda"] = 0
+    restante = qtd["vendas"]
+    gerador = vendas()
+    inicio = time.perf_counter()
+    while restante > 0:
+        bloco = [next(gerador) for _ in range(min(LOTE * 10, restante))]
+        restante -= len(bloco)
+        inseridas["venda"] += _inserir("venda", ("id_venda", "id_cliente", "data_venda", "valor_total"), bloco)
+        inseridas["produto_venda"] += _inserir(
+            "produto_venda", ("id_venda", "id_produto", "quantidade", "preco_unitario", "subtotal"), itens())
+    saida(f"{'venda':<15} {inseridas['venda']:>10} linhas em {time.perf_counter() - inicio:6.1f}s "
+          f"({inseridas['produto_venda']} itens)")
+
+    # as vendas foram inseridas direto: os resumos são recalculados de uma vez
+    inicio = time.perf_counter()
+    repo.reconstruir_resumos()
+    saida(f"{'resumos':<15} {'':>10}        em {time.perf_counter() - inicio:6.1f}s")
+    return inseridas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para benchmarks.")
+    parser.add_argument("--escala", type=float, default=0.01)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--limpar", action="store_true", help="apaga todos os dados antes de gerar")
+    args = parser.parse_args(argv)
+
+    if args.limpar:
+        limpar()
+    gerar(args.escala, args.semente)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark da importação de vendas em lote (repository.inserir_vendas_em_lote).
+
+Compara a importação venda a venda (repository.inserir_venda) com a
+importação em lotes de tamanhos diferentes, em vendas por segundo.
+Uma fração das vendas pede mais estoque do que existe, para medir também
+o caminho de falha por venda.
+
+Uso:
+
+    python -m benchmark.ingestao [--vendas 2000] [--lotes 50 200 1000]
+"""
+
+import argparse
+import random
+import time
+
+import repository as repo
+from benchmark.venda import limpar_dados, preparar_dados
+
+
+def gerar_vendas(id_cliente, ids_produto, quantidade, itens_por_venda=5, taxa_falha=0.01, semente=42):
+    """Gera vendas sintéticas ``(id_cliente, itens)``."""
+    rnd = random.Random(semente)
+    for _ in range(quantidade):
+        itens = [(pid, rnd.randint(1, 3), 1.0) for pid in rnd.sample(ids_produto, itens_por_venda)]
+        if rnd.random() < taxa_falha:
+            pid, _, preco = itens[0]
+            itens[0] = (pid, 10**9, preco)  # estoque insuficiente
+        yield id_cliente, itens
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vendas", type=int, default=2000)
+    parser.add_argument("--lotes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--produtos", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    limpar_dados()
+    id_cliente, ids = preparar_dados(args.produtos)
+    try:
+        print(f"{'modo':<16} {'vendas/s':>10} {'inseridas':>10} {'falhas':>7}")
+
+        inicio = time.perf_counter()
+        ok = falhas = 0
+        for id_cli, itens in gerar_vendas(id_cliente, ids, args.vendas):
+            try:
+                repo.inserir_venda(id_cli, itens)
+                ok += 1
+            except ValueError:
+                falhas += 1
+        duracao = time.perf_counter() - inicio
+        print(f"{'venda a venda':<16} {ok / duracao:>10.1f} {ok:>10} {falhas:>7}")
+
+        for tamanho in args.lotes:
+            r = repo.inserir_vendas_em_lote(gerar_vendas(id_cliente, ids, args.vendas), tamanho_lote=tamanho)
+            print(f"{'lote de ' + str(tamanho):<16} {r.vendas_por_segundo:>10.1f} "
+                  f"{len(r.inseridas):>10} {len(r.falhas):>7}")
+    finally:
+        limpar_dados()
+
+
+if __name__ == "__main__":
+    main()
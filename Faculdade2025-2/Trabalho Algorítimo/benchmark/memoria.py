@@ -0,0 +1,82 @@
+"""
+Benchmark da memória das linhas do repositório.
+
+Compara linhas em dict (como o cursor ``dictionary=True`` devolve) com os
+registros de ``models`` (tuplas com os nomes das colunas na classe),
+medindo com ``tracemalloc`` quanto ocupam N linhas de vendas.
+
+Sem ``--banco`` as linhas são sintéticas (não precisa de MySQL); com ele
+lê ``repository.SQL_LISTAR_VENDAS`` das vendas que já estão no banco
+(gere com ``python -m benchmark --gerar``).
+
+Uso:
+
+    python -m benchmark.memoria [--linhas 1000000]
+    python -m benchmark.memoria --banco
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from models import Venda
+
+
+def _tuplas_sinteticas(n):
+    inicio = datetime(2025, 1, 1)
+    for i in range(n):
+        # valores distintos por linha, como viriam do banco
+        yield (i + 1, i % 5000 + 1, f"Cliente {i % 5000}", Decimal(i % 100000) / 100,
+               inicio + timedelta(seconds=i))
+
+
+def _medir(gerar):
+    """Retorna ``(bytes ocupados pelas linhas, segundos, linhas)``."""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    linhas = gerar()
+    duracao = time.perf_counter() - inicio
+    ocupado, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(linhas)
+    del linhas
+    return ocupado, duracao, n
+
+
+def sintetico(n):
+    campos = Venda.CAMPOS
+    return {
+        "dict": _medir(lambda: [dict(zip(campos, t)) for t in _tuplas_sinteticas(n)]),
+        "Venda": _medir(lambda: [Venda(t) for t in _tuplas_sinteticas(n)]),
+    }
+
+
+def banco():
+    import repository as repo
+    from db import fetchall
+    return {
+        "dict": _medir(lambda: fetchall(repo.SQL_LISTAR_VENDAS)),
+        "Venda": _medir(lambda: fetchall(repo.SQL_LISTAR_VENDAS, row_type=Venda)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="linhas sintéticas")
+    parser.add_argument("--banco", action="store_true", help="lê as vendas do banco")
+    args = parser.parse_args(argv)
+
+    resultados = banco() if args.banco else sintetico(args.linhas)
+    print(f"{'linha':<8} {'linhas':>9} {'memória':>10} {'por linha':>10} {'por 1M':>10} {'tempo':>8}")
+    for nome, (ocupado, duracao, n) in resultados.items():
+        por_linha = ocupado / n if n else 0
+        print(f"{nome:<8} {n:>9} {ocupado / 2**20:>8.1f}MB {por_linha:>9.0f}B "
+              f"{por_linha * 1_000_000 / 2**20:>8.0f}MB {duracao:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark dos comandos preparados no caminho de venda.
+
+Roda o mesmo caminho de venda (preço e produto de cada item, como a tela
+de venda faz ao validar, e depois repository.inserir_venda) com o pool
+em dois modos: protocolo de texto (``prepared_cache=0``, o servidor
+analisa o SQL a cada chamada) e comandos preparados guardados por
+conexão (``db.StatementCache``), sem reiniciar a sessão ao devolver a
+conexão para os comandos valerem entre empréstimos. Mostra vendas por
+segundo e os contadores do pool (comandos preparados x execuções).
+
+Uso:
+
+    python -m benchmark.preparados [--itens 1 10] [--vendas 200]
+"""
+
+import argparse
+import time
+
+import db
+import repository as repo
+from benchmark.venda import limpar_dados, preparar_dados
+
+MODOS = (
+    ("texto", {"prepared_cache": 0}),
+    ("preparado", {"prepared_cache": 64, "reset_session": False}),
+)
+
+
+def vender(id_cliente, ids_produto):
+    itens = []
+    for id_produto in ids_produto:
+        repo.buscar_produto_por_id(id_produto)
+        itens.append((id_produto, 1, repo.get_preco_produto(id_produto)))
+    return repo.inserir_venda(id_cliente, itens)
+
+
+def medir(id_cliente, ids_produto, vendas):
+    """Retorna ``(vendas por segundo, estatísticas do pool)``."""
+    vender(id_cliente, ids_produto)     # aquece o pool (e prepara os comandos)
+    antes = db.pool_stats()
+    inicio = time.perf_counter()
+    for _ in range(vendas):
+        vender(id_cliente, ids_produto)
+    duracao = time.perf_counter() - inicio
+    depois = db.pool_stats()
+    return vendas / duracao, {k: depois[k] - antes[k] for k in
+                              ("prepares", "prepared_executes", "text_executes", "prepared_evictions")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--itens", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--vendas", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    original = dict(db.POOL_CONFIG)
+    limpar_dados()
+    id_cliente, ids = preparar_dados(max(args.itens))
+    try:
+        print(f"{'modo':<10} {'itens':>5} {'vendas/s':>10} {'preparos':>9} {'exec. prep.':>12} {'exec. texto':>12}")
+        for qtd in args.itens:
+            for nome, opcoes in MODOS:
+                db.configure_pool(**opcoes)
+                por_segundo, c = medir(id_cliente, ids[:qtd], args.vendas)
+                print(f"{nome:<10} {qtd:>5} {por_segundo:>10.1f} {c['prepares']:>9} "
+                      f"{c['prepared_executes']:>12} {c['text_executes']:>12}")
+    finally:
+        db.configure_pool(**original)
+        limpar_dados()
+
+
+if __name__ == "__main__":
+    main()
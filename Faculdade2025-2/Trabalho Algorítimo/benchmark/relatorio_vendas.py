@@ -0,0 +1,64 @@
+"""
+Benchmark do relatório de vendas com itens.
+
+Compara o caminho antigo (repository.listar_vendas e depois uma chamada
+de repository.listar_itens_venda por venda: N+1 consultas) com
+repository.iterar_vendas_com_itens (uma consulta), em tempo e em número
+de comandos enviados ao banco, contados pela instrumentação do db.py.
+
+Usa as vendas que já estão no banco (gere com ``python -m benchmark --gerar``).
+
+Uso:
+
+    python -m benchmark.relatorio_vendas [--repeticoes 3]
+"""
+
+import argparse
+import time
+
+import instrumentation
+import repository as repo
+
+
+def n_mais_1():
+    """Caminho antigo: uma consulta de vendas e uma de itens por venda."""
+    return [dict(v, itens=repo.listar_itens_venda(v["id_venda"])) for v in repo.listar_vendas()]
+
+
+def juncao():
+    """Caminho atual: uma consulta com a junção, agrupada por venda."""
+    return list(repo.iterar_vendas_com_itens())
+
+
+def medir(funcao, repeticoes):
+    """Retorna ``(melhor tempo em s, comandos por execução, vendas, itens)``."""
+    tempos = []
+    for _ in range(repeticoes):
+        instrumentation.reset()
+        inicio = time.perf_counter()
+        vendas = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    comandos = sum(s["count"] for s in instrumentation.snapshot()["statements"].values())
+    return min(tempos), comandos, len(vendas), sum(len(v["itens"]) for v in vendas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    estava_ligada = instrumentation.enabled
+    instrumentation.enable()
+    try:
+        print(f"{'caminho':<12} {'tempo':>10} {'comandos':>9} {'vendas':>8} {'itens':>9}")
+        for nome, funcao in (("N+1", n_mais_1), ("junção", juncao)):
+            melhor, comandos, vendas, itens = medir(funcao, args.repeticoes)
+            print(f"{nome:<12} {melhor * 1000:>8.1f}ms {comandos:>9} {vendas:>8} {itens:>9}")
+    finally:
+        if not estava_ligada:
+            instrumentation.disable()
+        instrumentation.reset()
+
+
+if __name__ == "__main__":
+    main()
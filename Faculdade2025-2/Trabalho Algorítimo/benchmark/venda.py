@@ -0,0 +1,136 @@
+"""
+Benchmark do caminho de venda (repository.inserir_venda).
+
+Compara o algoritmo antigo (um SELECT ... FOR UPDATE, um INSERT e um
+UPDATE por item) com o atual (travamento em lote, INSERT com várias
+linhas e um único UPDATE) para vendas de 1, 10 e 100 itens.
+
+O tempo de bloqueio é medido do SELECT ... FOR UPDATE até o COMMIT,
+período em que as linhas de produto ficam travadas para outras vendas.
+
+Uso:
+
+    python -m benchmark.venda [--itens 1 10 100] [--vendas 50]
+"""
+
+import argparse
+import statistics
+import time
+
+import repository as repo
+from db import transaction, execute, fetchall
+
+PREFIXO = "bench-venda"
+
+
+def _venda_por_item(id_cliente, itens):
+    """Algoritmo anterior: 3N+1 comandos por venda. Retorna (id, tempo travado)."""
+    with transaction() as uow:
+        cur = uow.cursor(dictionary=True)
+        try:
+            inicio_lock = time.perf_counter()
+            total = 0
+            for id_produto, qtd, preco in itens:
+                cur.execute("SELECT quantidade, nome FROM produto WHERE id_produto = %s FOR UPDATE", (id_produto,))
+                row = cur.fetchone()
+                if not row or row["quantidade"] < qtd:
+                    raise ValueError(f"Estoque insuficiente para {id_produto}.")
+                total += qtd * preco
+            cur.execute(
+                "INSERT INTO venda (id_cliente, valor_total, data_venda) VALUES (%s, %s, NOW())",
+                (id_cliente, total)
+            )
+            venda_id = cur.lastrowid
+            for id_produto, qtd, preco in itens:
+                cur.execute(
+                    """INSERT INTO produto_venda (id_venda, id_produto, quantidade, preco_unitario, subtotal)
+                       VALUES (%s, %s, %s, %s, %s)""",
+                    (venda_id, id_produto, qtd, preco, qtd * preco)
+                )
+                cur.execute(
+                    "UPDATE produto SET quantidade = quantidade - %s WHERE id_produto = %s",
+                    (qtd, id_produto)
+                )
+            # os resumos de vendas custam o mesmo nos dois algoritmos
+            repo.ajustar_resumos(uow, [venda_id])
+        finally:
+            cur.close()
+    return venda_id, time.perf_counter() - inicio_lock
+
+
+def _venda_em_lote(id_cliente, itens):
+    """Algoritmo atual. O lock começa no primeiro comando da transação."""
+    inicio_lock = time.perf_counter()
+    venda_id = repo.inserir_venda(id_cliente, itens)
+    return venda_id, time.perf_counter() - inicio_lock
+
+
+def preparar_dados(qtd_produtos):
+    """Cria um cliente e ``qtd_produtos`` produtos com estoque alto."""
+    with transaction():
+        id_cliente = repo.inserir_cliente(f"{PREFIXO} cliente", "", "", None)
+        ids = [
+            repo.inserir_produto(f"{PREFIXO} produto {i}", "bench", 1.0, 10_000_000, None, 1)
+            for i in range(qtd_produtos)
+        ]
+    return id_cliente, ids
+
+
+def limpar_dados():
+    """Remove vendas, produtos e cliente criados pelo benchmark."""
+    with transaction():
+        # pelo repositório, para descontar as vendas dos resumos
+        repo.deletar_vendas([r["id_venda"] for r in fetchall(
+            """SELECT v.id_venda FROM venda v JOIN cliente c ON v.id_cliente = c.id_cliente
+               WHERE c.nome LIKE %s""", (f"{PREFIXO}%",)
+        )])
+        execute("DELETE FROM produto WHERE nome LIKE %s", (f"{PREFIXO}%",))
+        execute("DELETE FROM cliente WHERE nome LIKE %s", (f"{PREFIXO}%",))
+
+
+def medir(funcao, id_cliente, ids_produto, qtd_itens, vendas):
+    """
+    Executa ``vendas`` vendas de ``qtd_itens`` itens.
+
+    Returns
+    -------
+    dict
+        Vendas por segundo e tempo travado (média e p95, em ms).
+    """
+    itens = [(pid, 1, 1.0) for pid in ids_produto[:qtd_itens]]
+    travado = []
+    inicio = time.perf_counter()
+    for _ in range(vendas):
+        _, t = funcao(id_cliente, itens)
+        travado.append(t)
+    duracao = time.perf_counter() - inicio
+    travado.sort()
+    return {
+        "itens": qtd_itens,
+        "vendas_por_segundo": vendas / duracao,
+        "lock_medio_ms": statistics.mean(travado) * 1000,
+        "lock_p95_ms": travado[int(len(travado) * 0.95) - 1] * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--itens", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--vendas", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    limpar_dados()
+    id_cliente, ids = preparar_dados(max(args.itens))
+    try:
+        print(f"{'algoritmo':<10} {'itens':>5} {'vendas/s':>10} {'lock médio':>11} {'lock p95':>10}")
+        for qtd in args.itens:
+            for nome, funcao in (("por item", _venda_por_item), ("em lote", _venda_em_lote)):
+                r = medir(funcao, id_cliente, ids, qtd, args.vendas)
+                print(f"{nome:<10} {r['itens']:>5} {r['vendas_por_segundo']:>10.1f} "
+                      f"{r['lock_medio_ms']:>9.2f}ms {r['lock_p95_ms']:>8.2f}ms")
+    finally:
+        limpar_dados()
+
+
+if __name__ == "__main__":
+    main()
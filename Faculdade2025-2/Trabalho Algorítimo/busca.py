@@ -0,0 +1,249 @@
+# Busca de produtos e clientes enquanto se digita
+
+"""
+Módulo busca
+------------
+Índices em memória para as caixas de busca da interface.
+
+Cada palavra digitada precisa ser o começo de uma palavra de algum campo
+(``"arr tip"`` acha "Arroz Tipo 1"). Os termos distintos ficam numa lista
+ordenada, então achar os que começam com um prefixo é uma busca binária.
+Se o prefixo der poucas respostas, o resultado é completado pelos nomes
+com mais trigramas em comum (acha trechos do meio da palavra e pequenos
+erros de digitação).
+
+Os índices são atualizados pelo registro de alterações, como o
+:class:`catalogo.CatalogoProdutos`. Enquanto um índice não foi carregado,
+a busca vai ao banco (:func:`repository.pesquisar_produtos`, só pelo
+começo do nome).
+
+>>> busca.produtos.atualizar()
+>>> busca.produtos.buscar("arroz", limite=10)
+"""
+
+import bisect
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+import repository as repo
+
+
+def normalizar(texto):
+    """Texto em minúsculas e sem acentos."""
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def termos(texto):
+    """Palavras de ``texto`` normalizadas (e-mails e telefones viram várias)."""
+    palavras = re.findall(r"[^\W_]+", normalizar(texto))
+    digitos = "".join(p for p in palavras if p.isdigit())
+    if len(digitos) >= 6 and digitos not in palavras:
+        palavras.append(digitos)    # telefone digitado sem separadores
+    return palavras
+
+
+def _trigramas(termo):
+    return {termo[i:i + 3] for i in range(len(termo) - 2)}
+
+
+class _Indices:
+    """Estruturas de um índice; uma carga completa monta um novo e troca."""
+
+    def __init__(self):
+        self.linhas = {}
+        self.termos_linha = {}      # id -> termos da linha
+        self.nomes = {}             # id -> nome normalizado (ordem do resultado)
+        self.postagens = {}         # termo -> ids
+        self.ordenados = []         # termos distintos, em ordem
+        self.trigramas = {}         # trigrama -> ids
+
+
+class IndiceBusca:
+    """
+    Índice de prefixos e trigramas sobre as linhas de uma tabela.
+
+    A carga roda numa thread de trabalho enquanto a interface busca: uma
+    carga completa monta os índices à parte e só os troca com ``_lock``,
+    então a busca não espera a carga. ``_carga`` faz uma carga ou
+    atualização por vez.
+
+    Parameters
+    ----------
+    tabela : str
+        Tabela no registro de alterações.
+    chave : str
+        Coluna com o ID da linha.
+    campos : tuple[str]
+        Colunas pesquisadas; a primeira (o nome) também ordena o resultado
+        e é a única indexada por trigramas.
+    listar : callable
+        Todas as linhas (carga inicial).
+    buscar_ids : callable
+        ``buscar_ids(ids) -> linhas`` (atualização incremental).
+    pesquisar : callable, optional
+        ``pesquisar(texto, limite) -> linhas`` no banco, usada enquanto o
+        índice não foi carregado.
+    """
+
+    def __init__(self, tabela, chave, campos, listar, buscar_ids, pesquisar=None):
+        self.tabela = tabela
+        self.chave = chave
+        self.campos = tuple(campos)
+        self.listar = listar
+        self.buscar_ids = buscar_ids
+        self.pesquisar = pesquisar
+        self.versao = None
+        self._ix = _Indices()
+        self._lock = threading.Lock()           # troca/alteração dos índices
+        self._carga = threading.Lock()          # uma carga/atualização por vez
+
+    @property
+    def carregado(self):
+        return self.versao is not None
+
+    @property
+    def linhas(self):
+        return self._ix.linhas
+
+    # ---------- carga ----------
+    def carregar(self):
+        """Lê todas as linhas e refaz o índice."""
+        with self._carga:
+            self._carregar()
+
+    def _carregar(self):
+        versao = repo.versao_alteracoes()
+        ix = _Indices()
+        for r in self.listar():
+            self._indexar(ix, r)
+        ix.ordenados = sorted(ix.postagens)
+        with self._lock:
+            self._ix = ix
+            self.versao = versao
+
+    def atualizar(self):
+        """Reindexa só as linhas alteradas desde a última leitura (na primeira vez, carrega tudo)."""
+        with self._carga:
+            if self.versao is None:
+                self._carregar()
+                return
+            alteracoes, nova_versao = repo.alteracoes_desde(self.tabela, self.versao)
+            if alteracoes is None:
+                self._carregar()
+                return
+            encontrados = (self.buscar_ids([i for i, op in alteracoes.items() if op != "D"])
+                           if alteracoes else [])
+            with self._lock:
+                for id_linha in alteracoes:
+                    self._desindexar(self._ix, id_linha)
+                for r in encontrados:
+                    self._indexar(self._ix, r, incremental=True)
+                self.versao = nova_versao
+
+    def _indexar(self, ix, r, incremental=False):
+        id_linha = r[self.chave]
+        palavras = []
+        for campo in self.campos:
+            palavras.extend(t for t in termos(r.get(campo)) if t not in palavras)
+        nome = termos(r.get(self.campos[0]))
+        ix.linhas[id_linha] = r
+        ix.termos_linha[id_linha] = tuple(palavras)
+        ix.nomes[id_linha] = " ".join(nome)
+        for t in palavras:
+            ids = ix.postagens.get(t)
+            if ids is None:
+                ids = ix.postagens[t] = set()
+                if incremental:
+                    bisect.insort(ix.ordenados, t)
+            ids.add(id_linha)
+        for g in set().union(*map(_trigramas, nome)):
+            ix.trigramas.setdefault(g, set()).add(id_linha)
+
+    def _desindexar(self, ix, id_linha):
+        ix.linhas.pop(id_linha, None)
+        for t in ix.termos_linha.pop(id_linha, ()):
+            ids = ix.postagens[t]
+            ids.discard(id_linha)
+            if not ids:
+                del ix.postagens[t]
+                del ix.ordenados[bisect.bisect_left(ix.ordenados, t)]
+        nome = ix.nomes.pop(id_linha, "")
+        for g in set().union(*map(_trigramas, nome.split())):
+            ids = ix.trigramas.get(g)
+            if ids is not None:
+                ids.discard(id_linha)
+                if not ids:
+                    del ix.trigramas[g]
+
+    # ---------- busca ----------
+    def buscar(self, texto, limite=10):
+        """
+        Até ``limite`` linhas para ``texto``: primeiro as que casam pelo
+        prefixo de todas as palavras (nomes que começam com o texto antes),
+        depois as mais parecidas por trigramas.
+        """
+        consulta = termos(texto)
+        if not consulta:
+            return []
+        if self.versao is None:
+            return self.pesquisar(texto, limite) if self.pesquisar is not None else []
+        with self._lock:
+            ix = self._ix
+            ids = self._por_prefixo(ix, consulta, limite)
+            if len(ids) < limite:
+                achados = set(ids)
+                ids += [i for i in self._por_trigramas(ix, consulta, limite * 2)
+                        if i not in achados][:limite - len(ids)]
+            return [ix.linhas[i] for i in ids]
+
+    def _por_prefixo(self, ix, consulta, limite):
+        # a palavra mais longa costuma ser a mais seletiva: dá os candidatos
+        principal = max(consulta, key=len)
+        outros = list(consulta)
+        outros.remove(principal)
+        maximo = max(limite * 20, 200)
+        candidatos = []
+        vistos = set()
+        pos = bisect.bisect_left(ix.ordenados, principal)
+        while pos < len(ix.ordenados) and len(candidatos) < maximo:
+            termo = ix.ordenados[pos]
+            if not termo.startswith(principal):
+                break
+            for i in ix.postagens[termo]:
+                if i in vistos:
+                    continue
+                vistos.add(i)
+                palavras = ix.termos_linha[i]
+                if all(any(p.startswith(o) for p in palavras) for o in outros):
+                    candidatos.append(i)
+                    if len(candidatos) >= maximo:
+                        break
+            pos += 1
+        frase = " ".join(consulta)
+        candidatos.sort(key=lambda i: (not ix.nomes[i].startswith(frase), ix.nomes[i], i))
+        return candidatos[:limite]
+
+    def _por_trigramas(self, ix, consulta, limite):
+        gramas = set().union(*map(_trigramas, consulta))
+        if not gramas:
+            return []
+        # trigramas presentes em boa parte das linhas não ajudam a distinguir
+        teto = max(1000, len(ix.linhas) // 5)
+        contagem = Counter()
+        for g in gramas:
+            ids = ix.trigramas.get(g)
+            if ids and len(ids) <= teto:
+                contagem.update(ids)
+        minimo = (len(gramas) + 1) // 2
+        melhores = [(n, i) for i, n in contagem.items() if n >= minimo]
+        melhores.sort(key=lambda x: (-x[0], ix.nomes[x[1]], x[1]))
+        return [i for _, i in melhores[:limite]]
+
+
+produtos = IndiceBusca("produto", "id_produto", ("nome", "categoria"),
+                       repo.listar_produtos, repo.buscar_produtos_por_ids, repo.pesquisar_produtos)
+clientes = IndiceBusca("cliente", "id_cliente", ("nome", "email", "telefone"),
+                       repo.listar_clientes, repo.buscar_clientes_por_ids, repo.pesquisar_clientes)
@@ -0,0 +1,89 @@
+# Cache em memória para dados de referência
+
+"""
+Módulo cache
+------------
+Cache com tempo de validade (TTL) para dados que mudam pouco, como
+estados, cidades e fornecedores. O repositório lê pelo cache e o invalida
+sempre que grava nessas tabelas.
+"""
+
+import os
+import threading
+import time
+
+TTL_PADRAO = float(os.getenv("CACHE_TTL", 300))   # segundos
+
+_caches = {}
+
+
+class CacheTTL:
+    """
+    Cache chave → valor com expiração e contadores de acertos/erros.
+
+    Parameters
+    ----------
+    nome : str
+        Nome usado em :func:`stats`.
+    ttl : float, optional
+        Segundos até uma entrada expirar (padrão: ``CACHE_TTL`` do .env ou 300).
+
+    Notes
+    -----
+    Os valores devolvidos são compartilhados entre os chamadores: não os
+    altere.
+    """
+
+    def __init__(self, nome, ttl=None):
+        self.nome = nome
+        self.ttl = TTL_PADRAO if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self._dados = {}
+        self._geracao = 0
+        self._lock = threading.Lock()
+        _caches[nome] = self
+
+    def get(self, chave, carregar):
+        """
+        Retorna o valor de ``chave``, chamando ``carregar()`` se não houver
+        entrada válida.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._dados.get(chave)
+            if entrada is not None and entrada[0] > agora:
+                self.hits += 1
+                return entrada[1]
+            self.misses += 1
+            geracao = self._geracao
+        valor = carregar()
+        with self._lock:
+            # uma invalidação durante a carga torna o valor possivelmente velho
+            if geracao == self._geracao:
+                self._dados[chave] = (agora + self.ttl, valor)
+        return valor
+
+    def invalidar(self, chave=None):
+        """Remove ``chave`` (ou todas as entradas, se ``None``)."""
+        with self._lock:
+            self._geracao += 1
+            if chave is None:
+                self._dados.clear()
+            else:
+                self._dados.pop(chave, None)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entradas": len(self._dados)}
+
+
+def stats():
+    """Acertos, erros e entradas de todos os caches, por nome."""
+    return {nome: c.stats() for nome, c in _caches.items()}
+
+
+def invalidar_tudo():
+    """Esvazia todos os caches."""
+    for c in _caches.values():
+        c.invalidar()
@@ -0,0 +1,151 @@
+# Catálogo de produtos em memória
+
+"""
+Módulo catalogo
+---------------
+Cópia local dos produtos, indexada por ID, nome e categoria, usada pela
+tela de venda para montar o carrinho sem ir ao banco a cada item.
+
+O catálogo é só uma visão para validação e exibição: quem decide se há
+estoque é :func:`repository.inserir_venda`, que trava as linhas antes de
+baixar o estoque.
+
+A carga e as atualizações rodam numa thread de trabalho enquanto a tela de
+venda consulta o catálogo: os índices só mudam com ``_lock`` e uma carga
+completa monta dicionários novos antes de trocá-los.
+"""
+
+import threading
+
+import repository as repo
+
+
+class CatalogoProdutos:
+    """
+    Produtos carregados uma vez e atualizados pelo registro de alterações
+    (ver :func:`repository.alteracoes_desde`).
+    """
+
+    def __init__(self):
+        self.por_id = {}
+        self.por_nome = {}
+        self.por_categoria = {}
+        self.versao = None
+        self._lock = threading.Lock()           # índices
+        self._carga = threading.Lock()          # uma carga/atualização por vez
+
+    @property
+    def carregado(self):
+        return self.versao is not None
+
+    # ---------- carga ----------
+    def carregar(self):
+        """Lê todos os produtos e refaz os índices."""
+        with self._carga:
+            self._carregar()
+
+    def _carregar(self):
+        versao = repo.versao_alteracoes()
+        por_id, por_nome, por_categoria = {}, {}, {}
+        for p in repo.listar_produtos():
+            self._guardar(p, por_id, por_nome, por_categoria)
+        with self._lock:
+            self.por_id, self.por_nome, self.por_categoria = por_id, por_nome, por_categoria
+            self.versao = versao
+
+    def atualizar(self):
+        """
+        Relê só os produtos inseridos, alterados (preço, estoque...) ou
+        removidos desde a última leitura; na primeira vez carrega tudo.
+        """
+        with self._carga:
+            if self.versao is None:
+                self._carregar()
+                return
+            alteracoes, nova_versao = repo.alteracoes_desde("produto", self.versao)
+            if alteracoes is None:
+                self._carregar()
+                return
+            encontrados = repo.buscar_produtos_por_ids(
+                [i for i, op in alteracoes.items() if op != "D"]) if alteracoes else []
+            with self._lock:
+                for p in encontrados:
+                    self._guardar(p, self.por_id, self.por_nome, self.por_categoria)
+                for id_produto in alteracoes.keys() - {p["id_produto"] for p in encontrados}:
+                    self._remover(id_produto)
+                self.versao = nova_versao
+
+    def _guardar(self, p, por_id, por_nome, por_categoria):
+        id_produto = p["id_produto"]
+        antigo = por_id.get(id_produto)
+        if antigo is not None:
+            self._desindexar(antigo, por_nome, por_categoria)
+        por_id[id_produto] = p
+        por_nome.setdefault(p["nome"].lower(), []).append(id_produto)
+        por_categoria.setdefault(p["categoria"], set()).add(id_produto)
+
+    def _remover(self, id_produto):
+        antigo = self.por_id.pop(id_produto, None)
+        if antigo is not None:
+            self._desindexar(antigo, self.por_nome, self.por_categoria)
+
+    def _desindexar(self, p, por_nome, por_categoria):
+        ids = por_nome.get(p["nome"].lower(), [])
+        if p["id_produto"] in ids:
+            ids.remove(p["id_produto"])
+        if not ids:
+            por_nome.pop(p["nome"].lower(), None)
+        por_categoria.get(p["categoria"], set()).discard(p["id_produto"])
+
+    # ---------- consultas ----------
+    def get(self, id_produto):
+        """Produto pelo ID (linha de :func:`repository.listar_produtos`) ou ``None``."""
+        with self._lock:
+            return self.por_id.get(id_produto)
+
+    def buscar_nome(self, nome):
+        """Produtos com exatamente esse nome (sem diferenciar maiúsculas)."""
+        with self._lock:
+            return [self.por_id[i] for i in self.por_nome.get(nome.lower(), [])]
+
+    def da_categoria(self, categoria):
+        """Produtos de uma categoria, por nome."""
+        with self._lock:
+            produtos = [self.por_id[i] for i in self.por_categoria.get(categoria, ())]
+        return sorted(produtos, key=lambda p: p["nome"])
+
+    def preco(self, id_produto):
+        return float(self.get(id_produto)["preco"])
+
+    def estoque(self, id_produto):
+        return self.get(id_produto)["quantidade"]
+
+    def rotulos(self):
+        """Textos ``"id - nome (N em estoque)"`` para um Combobox, por nome."""
+        with self._lock:
+            produtos = list(self.por_id.values())
+        produtos.sort(key=lambda p: (p["nome"], p["id_produto"]))
+        return [f"{p['id_produto']} - {p['nome']} ({p['quantidade']} em estoque)" for p in produtos]
+
+    def validar_item(self, id_produto, quantidade, ja_no_carrinho=0):
+        """
+        Confere se o item cabe no estoque conhecido.
+
+        Raises
+        ------
+        ValueError
+            Produto inexistente, quantidade não positiva ou estoque
+            insuficiente (mesmas regras de :func:`repository.normalizar_itens`
+            e :func:`repository.inserir_venda`).
+        """
+        produto = self.get(id_produto)
+        if produto is None:
+            raise ValueError(f"O produto ID {id_produto} não foi encontrado.")
+        if quantidade <= 0:
+            raise ValueError("A quantidade deve ser maior que zero.")
+        if ja_no_carrinho + quantidade > produto["quantidade"]:
+            raise ValueError(
+                f"O produto '{produto['nome']}' possui apenas {produto['quantidade']} em estoque.\n"
+                f"Você tentou adicionar {quantidade} (já há {ja_no_carrinho} no carrinho)."
+            )
+        return produto
@@ -3,16 +3,25 @@ Responsável pela conexão com o banco de dados MySQL e execução de consultas.
 """
 
 import mysql.connector
+from mysql.connector.errors import PoolError
 
 #Carregando as variáveis de ambiente com as credenciais do banco
 
 from dotenv import load_dotenv
 import os
+import instrumentation
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 
 # Carrega as variáveis do arquivo ./.env e coloca dentro do ambiente do Python
 load_dotenv()
 
+_log = logging.getLogger("db")
+
 DB_CONFIG = {
     'host': os.getenv("HOST", "localhost"),
     'user': os.getenv("USER", "root"),
@@ -21,18 +30,731 @@ DB_CONFIG = {
     'raise_on_warnings': True
 }
 
+# Dimensionamento do pool de conexões (pode ser ajustado pelo .env)
+POOL_CONFIG = {
+    'size': int(os.getenv("POOL_SIZE", 5)),
+    'max_overflow': int(os.getenv("POOL_MAX_OVERFLOW", 5)),
+    'timeout': float(os.getenv("POOL_TIMEOUT", 30)),
+    'idle_timeout': float(os.getenv("POOL_IDLE_TIMEOUT", 300)),
+    # reiniciar a sessão desfaz variáveis de sessão que alguém deixou mudadas
+    # (ex.: FOREIGN_KEY_CHECKS) e descarta os comandos preparados, que são
+    # preparados de novo no próximo uso (ver StatementCache). Desligar
+    # (POOL_RESET_SESSION=0) reaproveita os comandos entre empréstimos.
+    'reset_session': os.getenv("POOL_RESET_SESSION", "1") != "0",
+    'prepared_cache': int(os.getenv("POOL_PREPARED_CACHE", 64)),
+}
+
+# Erro do MySQL para comandos que não podem ser preparados
+ER_UNSUPPORTED_PS = 1295
+
+
+class StatementCache:
+    """
+    Comandos preparados no servidor de uma conexão, pelo texto do SQL.
+
+    Na primeira execução de um SELECT/INSERT/UPDATE/DELETE a conexão
+    prepara o comando (o servidor analisa o SQL uma vez); nas seguintes só
+    manda os parâmetros. Guarda até ``size`` cursores preparados e fecha o
+    usado há mais tempo quando passa do limite.
+
+    O cursor preparado só reaproveita o comando se receber o mesmo objeto
+    ``str`` da primeira vez, por isso :meth:`cursor` devolve também o texto
+    guardado. Usado por uma thread de cada vez (a que tem a conexão).
+
+    Attributes
+    ----------
+    prepares, executes, text_executes, evictions : int
+        Comandos preparados, execuções de comandos preparados, execuções
+        pelo protocolo de texto e comandos fechados pelo limite.
+    """
+
+    PREPARAVEIS = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+    def __init__(self, conn, size):
+        self.conn = conn
+        self.size = size
+        self._cursores = OrderedDict()   # (sql, dictionary) -> (sql, cursor)
+        self._texto = set()              # comandos que o servidor não prepara
+        self.prepares = 0
+        self.executes = 0
+        self.text_executes = 0
+        self.evictions = 0
+
+    def accepts(self, query):
+        """Se ``query`` deve ir como comando preparado."""
+        return query not in self._texto and query.lstrip()[:7].upper().startswith(self.PREPARAVEIS)
+
+    def cursor(self, query, dictionary=False):
+        """
+        Cursor preparado para ``query`` (criado na primeira vez).
+
+        Returns
+        -------
+        tuple
+            ``(texto guardado, cursor)``; execute o texto devolvido.
+        """
+        chave = (query, dictionary)
+        item = self._cursores.get(chave)
+        if item is None:
+            if len(self._cursores) >= self.size:
+                _, (_, antigo) = self._cursores.popitem(last=False)
+                self._fechar(antigo)
+                self.evictions += 1
+            item = self._cursores[chave] = (query, self.conn.cursor(prepared=True, dictionary=dictionary))
+            self.prepares += 1
+        else:
+            self._cursores.move_to_end(chave)
+        self.executes += 1
+        return item
+
+    def discard(self, query, dictionary=False):
+        """Fecha o cursor de ``query`` e passa a executá-la pelo protocolo de texto."""
+        item = self._cursores.pop((query, dictionary), None)
+        if item is not None:
+            self._fechar(item[1])
+        self._texto.add(query)
+
+    def close(self):
+        """Fecha todos os cursores guardados (libera os comandos no servidor)."""
+        while self._cursores:
+            _, (_, cur) = self._cursores.popitem(last=False)
+            self._fechar(cur)
+
+    def _fechar(self, cur):
+        try:
+            cur.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Pool de conexões MySQL reutilizáveis.
+
+    Mantém até ``size`` conexões ociosas abertas e permite abrir mais
+    ``max_overflow`` conexões temporárias em picos de uso. Ao emprestar uma
+    conexão faz um ping (descartando conexões mortas ou ociosas há mais de
+    ``idle_timeout`` segundos); ao devolver, desfaz transações pendentes e,
+    se ``reset_session``, reinicia a sessão no servidor.
+
+    Cada conexão guarda os seus comandos preparados (:class:`StatementCache`).
+    Reiniciar a sessão faz o servidor descartá-los, então com
+    ``reset_session`` o cache da conexão é esquecido ao devolvê-la e os
+    comandos são preparados de novo no empréstimo seguinte; eles só são
+    reaproveitados dentro do mesmo empréstimo (ex.: numa transação). Sem
+    ``reset_session`` valem entre empréstimos.
+
+    Parameters
+    ----------
+    config : dict
+        Parâmetros repassados para ``mysql.connector.connect``.
+    size : int
+        Quantidade de conexões mantidas abertas no pool.
+    max_overflow : int
+        Conexões extras permitidas além de ``size``.
+    timeout : float
+        Tempo máximo (segundos) esperando uma conexão livre.
+    idle_timeout : float
+        Tempo (segundos) após o qual uma conexão ociosa é descartada.
+    reset_session : bool
+        Se deve reiniciar a sessão ao devolver a conexão.
+    prepared_cache : int
+        Comandos preparados guardados por conexão (0 desliga).
+    """
+
+    def __init__(self, config, size=5, max_overflow=5, timeout=30.0,
+                 idle_timeout=300.0, reset_session=True, prepared_cache=0):
+        self.config = dict(config)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.reset_session = reset_session
+        self.prepared_cache = prepared_cache
+
+        self._cond = threading.Condition()
+        self._idle = []      # pilha de (conexão, instante da devolução)
+        self._total = 0      # conexões abertas (ociosas + emprestadas)
+        self._statements = {}    # conexão -> StatementCache
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'created': 0,
+            'destroyed': 0,
+            'timeouts': 0,
+            # contadores das conexões já descartadas (as abertas são somadas em stats())
+            'prepares': 0,
+            'prepared_executes': 0,
+            'text_executes': 0,
+            'prepared_evictions': 0,
+        }
+
+    # ---------------- ciclo de vida das conexões ----------------
+    def _create(self):
+        conn = mysql.connector.connect(**self.config)
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def _forget_statements(self, conn):
+        """Fecha os comandos preparados de ``conn`` e os esquece (guardando os contadores)."""
+        with self._cond:
+            cache = self._statements.pop(conn, None)
+            if cache is not None:
+                for chave, valor in _contadores(cache).items():
+                    self._stats[chave] += valor
+        if cache is not None:
+            # fora do lock: cada cursor manda um COM_STMT_CLOSE ao servidor
+            cache.close()
+
+    def _fechar(self, conn):
+        """Fecha ``conn`` (a vaga no pool é liberada por quem chama)."""
+        self._forget_statements(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _destroy(self, conn):
+        self._fechar(conn)
+        with self._cond:
+            self._total -= 1
+            self._stats['destroyed'] += 1
+            self._cond.notify()
+
+    def _healthy(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self, limite):
+        """
+        Reserva uma conexão ociosa ou uma vaga para criar uma nova.
+
+        As conexões ociosas há mais de ``idle_timeout`` liberam a vaga na
+        hora (senão um pool cheio delas esperaria por si mesmo); quem chama
+        só precisa fechá-las.
+
+        Returns
+        -------
+        tuple
+            ``(conexão ou None, esperou, conexões expiradas)``.
+        """
+        esperou = False
+        expiradas = []
+        with self._cond:
+            while True:
+                agora = time.monotonic()
+                while self._idle:
+                    conn, devolvida_em = self._idle.pop()
+                    if agora - devolvida_em > self.idle_timeout:
+                        expiradas.append(conn)
+                        self._total -= 1
+                        self._stats['destroyed'] += 1
+                        continue
+                    return conn, esperou, expiradas
+                if self._total < self.size + self.max_overflow:
+                    self._total += 1
+                    return None, esperou, expiradas
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolError(
+                        f"Nenhuma conexão livre após {self.timeout}s "
+                        f"(size={self.size}, max_overflow={self.max_overflow})."
+                    )
+                esperou = True
+                self._cond.wait(restante)
+
+    def acquire(self):
+        """
+        Empresta uma conexão do pool.
+
+        Returns
+        -------
+        PooledConnection
+            Conexão que volta ao pool quando ``close()`` é chamado.
+
+        Raises
+        ------
+        mysql.connector.errors.PoolError
+            Se nenhuma conexão ficar livre dentro de ``timeout`` segundos.
+        """
+        inicio = time.monotonic()
+        limite = inicio + self.timeout
+        esperou_alguma_vez = False
+        while True:
+            conn, esperou, expiradas = self._checkout(limite)
+            esperou_alguma_vez = esperou_alguma_vez or esperou
+            for velha in expiradas:
+                self._fechar(velha)
+
+            if conn is None:
+                try:
+                    conn = self._create()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._healthy(conn):
+                # Conexão caiu enquanto estava ociosa: descarta e tenta de novo
+                self._destroy(conn)
+                continue
+            break
+
+        espera = time.monotonic() - inicio
+        with self._cond:
+            self._stats['checkouts'] += 1
+            if esperou_alguma_vez:
+                self._stats['waits'] += 1
+                self._stats['wait_time'] += espera
+            cache = None
+            if self.prepared_cache:
+                cache = self._statements.get(conn)
+                if cache is None:
+                    cache = self._statements[conn] = StatementCache(conn, self.prepared_cache)
+        return PooledConnection(self, conn, cache)
+
+    def release(self, conn):
+        """Devolve uma conexão (crua) ao pool."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            if self.reset_session:
+                # o servidor descarta os comandos preparados da sessão
+                self._forget_statements(conn)
+                conn.reset_session()
+        except Exception:
+            self._destroy(conn)
+            return
+
+        with self._cond:
+            if self._total > self.size:
+                # Conexão de overflow: não fica guardada
+                fechar = True
+            else:
+                fechar = False
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+        if fechar:
+            self._destroy(conn)
+
+    def warm_up(self, count=1):
+        """
+        Abre conexões até o pool ter ``count`` ociosas (no máximo ``size``).
+
+        Cada conexão já fica disponível assim que é aberta, então quem
+        pedir uma conexão durante o aquecimento não espera pelas demais.
+
+        Returns
+        -------
+        int
+            Conexões abertas.
+        """
+        abertas = 0
+        while True:
+            with self._cond:
+                if len(self._idle) >= count or self._total >= self.size:
+                    return abertas
+                self._total += 1
+            try:
+                conn = self._create()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+            abertas += 1
+
+    def close_all(self):
+        """Fecha todas as conexões ociosas do pool."""
+        with self._cond:
+            ociosas = [c for c, _ in self._idle]
+            self._idle.clear()
+        for conn in ociosas:
+            self._destroy(conn)
+
+    def stats(self):
+        """
+        Retorna estatísticas de uso do pool.
+
+        Returns
+        -------
+        dict
+            ``checkouts``, ``waits``, ``wait_time`` (segundos), ``created``,
+            ``destroyed``, ``timeouts``, ``in_use``, ``idle``, ``size``,
+            ``max_overflow`` e os contadores dos comandos preparados:
+            ``prepares``, ``prepared_executes``, ``text_executes`` e
+            ``prepared_evictions`` (ver :class:`StatementCache`).
+        """
+        with self._cond:
+            dados = dict(self._stats)
+            for cache in self._statements.values():
+                for chave, valor in _contadores(cache).items():
+                    dados[chave] += valor
+            dados['idle'] = len(self._idle)
+            dados['in_use'] = self._total - len(self._idle)
+        dados['size'] = self.size
+        dados['max_overflow'] = self.max_overflow
+        return dados
+
+
+def _contadores(cache):
+    return {
+        'prepares': cache.prepares,
+        'prepared_executes': cache.executes,
+        'text_executes': cache.text_executes,
+        'prepared_evictions': cache.evictions,
+    }
+
+
+class PooledConnection:
+    """
+    Conexão emprestada de um :class:`ConnectionPool`.
+
+    Repassa qualquer atributo para a conexão MySQL original; ``close()``
+    devolve a conexão ao pool em vez de fechá-la. ``statements`` é o
+    :class:`StatementCache` da conexão (``None`` se desligado).
+    """
+
+    def __init__(self, pool, conn, statements=None):
+        self._pool = pool
+        self._conn = conn
+        self.statements = statements
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise mysql.connector.errors.OperationalError("Conexão já devolvida ao pool.")
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self.statements = None
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Retorna o pool de conexões global, criando-o no primeiro uso.
+
+    Returns
+    -------
+    ConnectionPool
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+    return _pool
+
+
+def configure_pool(**opcoes):
+    """
+    Recria o pool global com novas opções (``size``, ``max_overflow``,
+    ``timeout``, ``idle_timeout``, ``reset_session``, ``prepared_cache``).
+    """
+    global _pool
+    POOL_CONFIG.update(opcoes)
+    with _pool_lock:
+        antigo, _pool = _pool, ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+    if antigo is not None:
+        antigo.close_all()
+
+
+def pool_stats():
+    """Atalho para ``get_pool().stats()``."""
+    return get_pool().stats()
+
+
+def warm_up(count=1):
+    """Atalho para ``get_pool().warm_up(count)``."""
+    return get_pool().warm_up(count)
+
+
 def get_conn():
     """
-    Cria e retorna uma nova conexão com o banco de dados MySQL.
-    
+    Empresta uma conexão do pool com o banco de dados MySQL.
+
+    A conexão deve ser fechada com ``close()`` para voltar ao pool.
+
     Returns
     -------
-    mysql.connector.connection_cext.CMySQLConnection
+    PooledConnection
         Objeto de conexão.
     """
-    return mysql.connector.connect(**DB_CONFIG)
+    if not instrumentation.enabled:
+        return get_pool().acquire()
+    inicio = time.perf_counter()
+    conn = get_pool().acquire()
+    instrumentation.record_acquire(inicio)
+    return conn
+
+# As funções abaixo executam um comando numa conexão já obtida; quando a
+# instrumentação está ligada, medem o comando (ver instrumentation.py).
+#
+# Com ``row_type`` (uma subclasse de ``models.Registro``) o cursor devolve
+# tuplas e cada linha vira um ``row_type``, sem um dict por linha.
+
+def _executar(conn, query, params, dictionary=False):
+    """
+    Executa ``query`` com o comando preparado da conexão, se houver, ou
+    pelo protocolo de texto.
 
-def fetchall(query, params=None):
+    Returns
+    -------
+    tuple
+        ``(cursor, preparado)``; um cursor preparado pertence ao cache da
+        conexão e não deve ser fechado.
+    """
+    cache = getattr(conn, "statements", None)
+    if cache is not None:
+        if cache.accepts(query):
+            sql, cur = cache.cursor(query, dictionary)
+            try:
+                cur.execute(sql, params or ())
+                return cur, True
+            except mysql.connector.Error as e:
+                if e.errno != ER_UNSUPPORTED_PS:
+                    raise
+                cache.discard(query, dictionary)
+        cache.text_executes += 1
+    cur = conn.cursor(dictionary=dictionary)
+    try:
+        cur.execute(query, params or ())
+    except BaseException:
+        cur.close()
+        raise
+    return cur, False
+
+def _conferir_colunas(cur, row_type):
+    if tuple(cur.column_names) != row_type.CAMPOS:
+        raise ValueError(f"Colunas da consulta {cur.column_names} não batem com "
+                         f"{row_type.__name__}.CAMPOS {row_type.CAMPOS}.")
+
+
+def _fetchall(conn, query, params, row_type=None):
+    inicio = time.perf_counter() if instrumentation.enabled else None
+    cur, preparado = _executar(conn, query, params, dictionary=row_type is None)
+    try:
+        rows = cur.fetchall()
+        if row_type is not None:
+            _conferir_colunas(cur, row_type)
+            rows = list(map(row_type, rows))
+    finally:
+        if not preparado:
+            cur.close()
+    if inicio is not None:
+        instrumentation.record_statement(query, params, inicio, len(rows))
+    return rows
+
+
+def _fetchone(conn, query, params, row_type=None):
+    inicio = time.perf_counter() if instrumentation.enabled else None
+    cur, preparado = _executar(conn, query, params, dictionary=row_type is None)
+    try:
+        row = cur.fetchone()
+        # descarta linhas restantes para a conexão voltar limpa ao pool
+        cur.fetchall()
+        if row_type is not None and row is not None:
+            _conferir_colunas(cur, row_type)
+            row = row_type(row)
+    finally:
+        if not preparado:
+            cur.close()
+    if inicio is not None:
+        instrumentation.record_statement(query, params, inicio, 1 if row else 0)
+    return row
+
+
+def _execute(conn, query, params):
+    inicio = time.perf_counter() if instrumentation.enabled else None
+    cur, preparado = _executar(conn, query, params)
+    try:
+        lastid, linhas = cur.lastrowid, cur.rowcount
+    finally:
+        if not preparado:
+            cur.close()
+    if inicio is not None:
+        instrumentation.record_statement(query, params, inicio, linhas)
+    return lastid
+
+
+# ---------------- Unidade de trabalho (transações) ----------------
+_local = threading.local()
+
+
+class UnitOfWork:
+    """
+    Transação aberta em uma única conexão do pool.
+
+    Criada por :func:`transaction`. Enquanto estiver ativa, ``fetchall``,
+    ``fetchone`` e ``execute`` deste módulo chamados na mesma thread usam
+    esta conexão, então funções do repositório podem ser compostas numa
+    única transação sem mudar suas assinaturas.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lastrowid = None
+        self._savepoints = 0
+        self._antes_commit = []
+        self._ao_terminar = []
+        self.iniciada = time.perf_counter()
+        # dados livres de quem usa a transação (ex.: tabelas a marcar no feed)
+        self.info = {}
+
+    def before_commit(self, callback):
+        """
+        Agenda ``callback()`` para logo antes do COMMIT, ainda dentro da
+        transação; se ele falhar, a transação é desfeita.
+        """
+        self._antes_commit.append(callback)
+
+    def on_finish(self, callback):
+        """
+        Agenda ``callback()`` para depois de um COMMIT bem-sucedido (com a
+        conexão já devolvida ao pool); num ROLLBACK não é chamado. Usado,
+        por exemplo, para invalidar caches só quando a alteração já está
+        visível para as outras conexões. Um erro no callback é registrado
+        no log e não chega a quem abriu a transação, que já foi gravada.
+        """
+        self._ao_terminar.append(callback)
+
+    def cursor(self, **kwargs):
+        """Abre um cursor na conexão da transação."""
+        return self.conn.cursor(**kwargs)
+
+    def fetchall(self, query, params=None, row_type=None):
+        return _fetchall(self.conn, query, params, row_type)
+
+    def fetchone(self, query, params=None, row_type=None):
+        return _fetchone(self.conn, query, params, row_type)
+
+    def execute(self, query, params=None):
+        """Executa um comando e retorna o último ID inserido."""
+        return _execute(self.conn, query, params)
+
+    def executemany(self, query, seq_params):
+        """
+        Executa o mesmo comando para vários conjuntos de parâmetros.
+
+        INSERTs são enviados como um único comando com várias linhas; o
+        ID gerado para a primeira linha fica em ``self.lastrowid``.
+
+        Returns
+        -------
+        int
+            Quantidade de linhas afetadas.
+        """
+        inicio = time.perf_counter() if instrumentation.enabled else None
+        cur = self.conn.cursor()
+        try:
+            cur.executemany(query, seq_params)
+            self.lastrowid, linhas = cur.lastrowid, cur.rowcount
+        finally:
+            cur.close()
+        if inicio is not None:
+            instrumentation.record_statement(query, None, inicio, linhas)
+        return linhas
+
+    @contextmanager
+    def savepoint(self):
+        """
+        Abre um SAVEPOINT; se o bloco falhar, só o trabalho feito dentro
+        dele é desfeito (a exceção continua sendo propagada).
+        """
+        self._savepoints += 1
+        nome = f"sp_{self._savepoints}"
+        _execute(self.conn, f"SAVEPOINT {nome}", None)
+        try:
+            yield self
+        except BaseException:
+            _execute(self.conn, f"ROLLBACK TO SAVEPOINT {nome}", None)
+            raise
+        else:
+            _execute(self.conn, f"RELEASE SAVEPOINT {nome}", None)
+
+
+def current_transaction():
+    """Retorna a :class:`UnitOfWork` ativa nesta thread (ou ``None``)."""
+    return getattr(_local, "uow", None)
+
+
+@contextmanager
+def transaction():
+    """
+    Executa um bloco numa única conexão e numa única transação.
+
+    Faz COMMIT ao sair normalmente e ROLLBACK se ocorrer exceção. Se já
+    houver uma transação ativa na thread, o bloco vira um SAVEPOINT dela.
+
+    Examples
+    --------
+    >>> with transaction():
+    ...     id_cidade = inserir_cidade("Ipatinga", 1)
+    ...     inserir_endereco("Rua A", "10", "Centro", "35160-000", id_cidade)
+
+    Yields
+    ------
+    UnitOfWork
+    """
+    atual = current_transaction()
+    if atual is not None:
+        with atual.savepoint():
+            yield atual
+        return
+
+    conn = get_conn()
+    uow = UnitOfWork(conn)
+    inicio = time.perf_counter() if instrumentation.enabled else None
+    try:
+        conn.start_transaction()
+        _local.uow = uow
+        try:
+            yield uow
+            for callback in uow._antes_commit:
+                callback()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                # a exceção que importa é a do bloco; a conexão é
+                # descartada pelo pool se não puder ser reaproveitada
+                _log.exception("Erro no ROLLBACK")
+            raise
+        conn.commit()
+    finally:
+        _local.uow = None
+        conn.close()
+        if inicio is not None:
+            instrumentation.record_transaction(inicio)
+    for callback in uow._ao_terminar:
+        try:
+            callback()
+        except Exception:
+            _log.exception("Erro num callback depois do COMMIT")
+
+
+def fetchall(query, params=None, row_type=None):
     """
     Executa uma consulta SELECT e retorna todos os resultados.
 
@@ -42,31 +764,107 @@ def fetchall(query, params=None):
         Comando SQL.
     params : tuple, optional
         Parâmetros da query.
+    row_type : type, optional
+        Subclasse de ``models.Registro`` cujos ``CAMPOS`` são as colunas do
+        SELECT, na ordem; as linhas vêm como esse tipo em vez de dict.
 
     Returns
     -------
-    list[dict]
-        Lista de registros em formato dicionário.
+    list[dict] or list[row_type]
+        Lista de registros em formato dicionário (ou ``row_type``).
     """
+    uow = current_transaction()
+    if uow is not None:
+        return uow.fetchall(query, params, row_type)
     conn = get_conn()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(query, params or ())
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    try:
+        return _fetchall(conn, query, params, row_type)
+    finally:
+        conn.close()
 
-def fetchone(query, params=None):
+def fetchiter(query, params=None, batch_size=1000, dictionary=True, row_type=None):
     """
-    Executa uma consulta SQL e retorna apenas uma linha.
+    Executa uma consulta SELECT e devolve as linhas aos poucos (gerador).
+
+    Usa um cursor sem buffer: o servidor envia as linhas conforme são
+    lidas, em blocos de ``batch_size``, então a memória usada não depende
+    do tamanho do resultado e a primeira linha chega antes da última ser
+    lida. A conexão fica ocupada até o gerador terminar ou ser fechado.
+
+    Não pode ser chamada dentro de :func:`transaction`: um gerador
+    abandonado deixaria o resultado pendente na conexão da transação e o
+    próximo comando dela falharia. Lá dentro, use :func:`fetchall`.
+
+    Parameters
+    ----------
+    query : str
+        Comando SQL.
+    params : tuple, optional
+        Parâmetros da query.
+    batch_size : int, default=1000
+        Linhas buscadas por vez no servidor.
+    dictionary : bool, default=True
+        Se ``False``, as linhas vêm como tuplas (mais leves).
+    row_type : type, optional
+        Como em :func:`fetchall` (ignora ``dictionary``).
+
+    Returns
+    -------
+    iterator of dict, tuple or row_type
+        Uma linha por vez.
+
+    Raises
+    ------
+    mysql.connector.errors.ProgrammingError
+        Se houver uma transação ativa nesta thread.
     """
+    # conferido já na chamada, não só quando o gerador começar a ser lido
+    if current_transaction() is not None:
+        raise mysql.connector.errors.ProgrammingError(
+            "fetchiter não pode ser usado dentro de uma transação; use fetchall.")
+    return _fetchiter(query, params, batch_size, dictionary, row_type)
+
+def _fetchiter(query, params, batch_size, dictionary, row_type):
     conn = get_conn()
+    inicio = time.perf_counter() if instrumentation.enabled else None
+    linhas = 0
     try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(query, params or ())
-        return cur.fetchone()
+        cur = conn.cursor(dictionary=dictionary and row_type is None, buffered=False)
+        try:
+            cur.execute(query, params or ())
+            if row_type is not None:
+                _conferir_colunas(cur, row_type)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                linhas += len(rows)
+                if row_type is not None:
+                    rows = map(row_type, rows)
+                yield from rows
+        finally:
+            if inicio is not None:
+                # tempo até a última linha (inclui o consumo pelo chamador)
+                instrumentation.record_statement(query, params, inicio, linhas)
+            # gerador abandonado no meio: descarta o resto do resultado
+            if conn.unread_result:
+                conn.consume_results()
+            cur.close()
+    finally:
+        conn.close()
+
+def fetchone(query, params=None, row_type=None):
+    """
+    Executa uma consulta SQL e retorna apenas uma linha (``row_type`` como
+    em :func:`fetchall`).
+    """
+    uow = current_transaction()
+    if uow is not None:
+        return uow.fetchone(query, params, row_type)
+    conn = get_conn()
+    try:
+        return _fetchone(conn, query, params, row_type)
     finally:
-        cur.close()
         conn.close()
 
 
@@ -74,6 +872,9 @@ def execute(query, params=None, commit=True):
     """
     Executa uma consulta INSERT, UPDATE ou DELETE no banco.
 
+    Dentro de :func:`transaction` o comando entra na transação ativa e o
+    ``commit`` fica para o fim do bloco.
+
     Parameters
     ----------
     query : str
@@ -88,12 +889,14 @@ def execute(query, params=None, commit=True):
     int
         Último ID inserido (se houver).
     """
+    uow = current_transaction()
+    if uow is not None:
+        return uow.execute(query, params)
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(query, params or ())
-    if commit:
-        conn.commit()
-    lastid = cur.lastrowid
-    cur.close()
-    conn.close()
-    return lastid
\ No newline at end of file
+    try:
+        lastid = _execute(conn, query, params)
+        if commit:
+            conn.commit()
+        return lastid
+    finally:
+        conn.close()
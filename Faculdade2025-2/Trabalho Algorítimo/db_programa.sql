@@ -97,6 +97,9 @@ CREATE TABLE entrada_produto (
     FOREIGN KEY (id_produto) REFERENCES produto(id_produto) ON DELETE CASCADE,
     FOREIGN KEY (id_fornecedor) REFERENCES fornecedor(id_fornecedor) ON DELETE SET NULL
 );
+
+-- Índices e demais alterações ficam em migrations/ (aplique com: python migrate.py)
+
 SELECT * FROM produto;
 SELECT id_produto, nome, quantidade FROM produto;
 UPDATE produto SET quantidade = quantidade + 3 WHERE id_produto = 8;
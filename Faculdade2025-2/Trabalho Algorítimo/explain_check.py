@@ -0,0 +1,193 @@
+# Verificação de planos de execução das consultas do repositório
+
+"""
+Módulo explain_check
+--------------------
+Roda ``EXPLAIN`` para cada consulta de leitura do repository.py e falha
+(código de saída 1) se alguma fizer varredura completa (``type = ALL``)
+numa tabela com mais de ``--min-linhas`` linhas.
+
+As consultas são capturadas chamando as próprias funções do repositório
+com o acesso ao banco interceptado, então o SQL verificado é exatamente o
+que a aplicação envia. Rode contra uma base populada (ver pacote
+``benchmark``) e com as migrações aplicadas.
+
+Uso:
+
+    python explain_check.py [--min-linhas 10000]
+"""
+
+import argparse
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+import cache
+import db
+import repository as repo
+
+# Listagens completas: a varredura da tabela principal é o esperado
+VARREDURA_ESPERADA = {"listar_produtos", "listar_clientes", "listar_fornecedores",
+                      "listar_vendas", "listar_estados",
+                      # contagem da grade virtual e janela por OFFSET
+                      "contar_produtos", "contar_vendas", "janela_produtos",
+                      "iterar_vendas_com_itens"}
+
+
+@contextmanager
+def capturar_consultas():
+    """Troca o acesso ao banco do repositório por um gravador de (sql, params)."""
+    capturadas = []
+    # sem cache, para toda chamada chegar ao banco (e nada falso ficar guardado)
+    cache.invalidar_tudo()
+
+    def gravar(vazio):
+        def f(query, params=None, *args, **kwargs):
+            capturadas.append((query, params))
+            return vazio() if vazio else None
+        return f
+
+    originais = {nome: getattr(repo, nome) for nome in ("fetchall", "fetchone", "fetchiter")}
+    repo.fetchall = gravar(list)
+    repo.fetchone = gravar(None)
+    repo.fetchiter = gravar(list)
+    try:
+        yield capturadas
+    finally:
+        for nome, funcao in originais.items():
+            setattr(repo, nome, funcao)
+        cache.invalidar_tudo()
+
+
+def amostra():
+    """IDs e valores reais usados como parâmetros das consultas."""
+    def primeiro(sql):
+        row = db.fetchone(sql)
+        return list(row.values())[0] if row else None
+
+    return {
+        "id_produto": primeiro("SELECT MAX(id_produto) FROM produto") or 1,
+        "id_cliente": primeiro("SELECT MAX(id_cliente) FROM cliente") or 1,
+        "id_fornecedor": primeiro("SELECT MAX(id_fornecedor) FROM fornecedor") or 1,
+        "id_venda": primeiro("SELECT MAX(id_venda) FROM venda") or 1,
+        "id_estado": primeiro("SELECT MAX(id_estado) FROM estado") or 1,
+        "id_cidade": primeiro("SELECT MAX(id_cidade) FROM cidade") or 1,
+        "id_endereco": primeiro("SELECT MAX(id_endereco) FROM endereco") or 1,
+        "nome_produto": primeiro("SELECT nome FROM produto LIMIT 1") or "x",
+        "nome_estado": primeiro("SELECT nome FROM estado LIMIT 1") or "x",
+        "nome_cidade": primeiro("SELECT nome FROM cidade LIMIT 1") or "x",
+    }
+
+
+def consultas_do_repositorio(a):
+    """
+    Chamadas de leitura do repositório com parâmetros de exemplo.
+
+    Returns
+    -------
+    list[tuple[str, callable]]
+    """
+    agora = datetime.now()
+    return [
+        ("listar_produtos", lambda: repo.listar_produtos()),
+        ("paginar_produtos", lambda: repo.paginar_produtos(cursor=repo._codificar_cursor([a["nome_produto"], a["id_produto"]]))),
+        ("listar_clientes", lambda: repo.listar_clientes()),
+        ("paginar_clientes", lambda: repo.paginar_clientes(cursor=repo._codificar_cursor([a["id_cliente"]]))),
+        ("listar_fornecedores", lambda: repo.listar_fornecedores()),
+        ("paginar_fornecedores", lambda: repo.paginar_fornecedores(cursor=repo._codificar_cursor([a["id_fornecedor"]]))),
+        ("listar_vendas", lambda: repo.listar_vendas()),
+        ("paginar_vendas", lambda: repo.paginar_vendas(cursor=repo._codificar_cursor([agora, a["id_venda"]]))),
+        ("janela_produtos", lambda: repo.janela_produtos()),
+        ("contar_produtos", lambda: repo.contar_produtos()),
+        ("janela_vendas", lambda: repo.janela_vendas()),
+        ("contar_vendas", lambda: repo.contar_vendas()),
+        ("listar_estoque_baixo", lambda: repo.listar_estoque_baixo()),
+        ("buscar_estoque_por_ids", lambda: repo.buscar_estoque_por_ids([a["id_produto"]])),
+        ("buscar_produtos_por_ids", lambda: repo.buscar_produtos_por_ids([a["id_produto"]])),
+        ("buscar_clientes_por_ids", lambda: repo.buscar_clientes_por_ids([a["id_cliente"]])),
+        ("buscar_fornecedores_por_ids", lambda: repo.buscar_fornecedores_por_ids([a["id_fornecedor"]])),
+        ("buscar_vendas_por_ids", lambda: repo.buscar_vendas_por_ids([a["id_venda"]])),
+        ("alteracoes_desde", lambda: repo.alteracoes_desde("produto", 0, limite=100)),
+        ("listar_itens_venda", lambda: repo.listar_itens_venda(a["id_venda"])),
+        ("totais_vendas_por_periodo", lambda: repo.totais_vendas_por_periodo(agora.replace(month=1, day=1), agora)),
+        ("vendas_por_dia", lambda: repo.vendas_por_dia(agora.replace(day=1), agora)),
+        ("totais_por_produto", lambda: repo.totais_por_produto(agora.replace(day=1), agora, limite=10)),
+        ("totais_por_cliente", lambda: repo.totais_por_cliente(agora.replace(day=1), agora, limite=10)),
+        ("totais_vendas_cliente", lambda: repo.totais_vendas_cliente(a["id_cliente"])),
+        ("totais_vendas_produto", lambda: repo.totais_vendas_produto(a["id_produto"])),
+        ("iterar_vendas_com_itens", lambda: list(repo.iterar_vendas_com_itens())),
+        ("get_preco_produto", lambda: repo.get_preco_produto(a["id_produto"])),
+        ("buscar_produto_por_id", lambda: repo.buscar_produto_por_id(a["id_produto"])),
+        ("buscar_produto_por_nome", lambda: repo.buscar_produto_por_nome(a["nome_produto"])),
+        ("pesquisar_produtos", lambda: repo.pesquisar_produtos(a["nome_produto"][:3])),
+        ("pesquisar_clientes", lambda: repo.pesquisar_clientes("a")),
+        ("buscar_produto_por_nome_fornecedor", lambda: repo.buscar_produto_por_nome_fornecedor(a["nome_produto"], a["id_fornecedor"])),
+        ("historico_vendas_por_cliente", lambda: repo.historico_vendas_por_cliente(a["id_cliente"])),
+        ("historico_vendas_por_produto", lambda: repo.historico_vendas_por_produto(a["id_produto"])),
+        ("historico_vendas_por_periodo", lambda: repo.historico_vendas_por_periodo(agora.replace(day=1), agora)),
+        ("iterar_itens_vendidos_por_periodo", lambda: list(repo.iterar_itens_vendidos_por_periodo(agora.replace(day=1), agora))),
+        ("listar_estados", lambda: repo.listar_estados()),
+        ("buscar_estado_por_nome", lambda: repo.buscar_estado_por_nome(a["nome_estado"])),
+        ("listar_cidades", lambda: repo.listar_cidades(a["id_estado"])),
+        ("buscar_cidade_por_nome", lambda: repo.buscar_cidade_por_nome(a["nome_cidade"])),
+        ("listar_enderecos", lambda: repo.listar_enderecos(a["id_cidade"])),
+        ("buscar_endereco", lambda: repo.buscar_endereco(a["id_endereco"])),
+        ("buscar_cliente", lambda: repo.buscar_cliente(a["id_cliente"])),
+        ("buscar_fornecedor", lambda: repo.buscar_fornecedor(a["id_fornecedor"])),
+    ]
+
+
+def tamanho_tabelas():
+    """Estimativa de linhas por tabela (information_schema)."""
+    rows = db.fetchall("""
+        SELECT table_name AS tabela, table_rows AS linhas
+        FROM information_schema.tables WHERE table_schema = DATABASE()
+    """)
+    return {r["tabela"]: r["linhas"] or 0 for r in rows}
+
+
+def verificar(min_linhas=10000, saida=print):
+    """
+    Executa o EXPLAIN de todas as consultas e imprime o plano resumido.
+
+    Returns
+    -------
+    list[str]
+        Problemas encontrados (vazia se tudo usa índice).
+    """
+    tamanhos = tamanho_tabelas()
+    problemas = []
+    for nome, chamada in consultas_do_repositorio(amostra()):
+        with capturar_consultas() as capturadas:
+            chamada()
+        for query, params in capturadas:
+            plano = db.fetchall("EXPLAIN " + query, params)
+            for passo in plano:
+                # o EXPLAIN mostra o alias (p, v...), então vale a estimativa de linhas
+                tabela = passo.get("table") or ""
+                linhas = passo.get("rows") or 0
+                saida(f"{nome:<36} {tabela:<10} {passo.get('type') or '':<7} "
+                      f"{passo.get('key') or '-':<32} {linhas:>9}")
+                if (passo.get("type") == "ALL" and nome not in VARREDURA_ESPERADA
+                        and max(linhas, tamanhos.get(tabela, 0)) > min_linhas):
+                    problemas.append(f"{nome}: varredura completa em '{tabela}' (~{linhas} linhas)")
+    return problemas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica os planos de execução do repositório.")
+    parser.add_argument("--min-linhas", type=int, default=10000,
+                        help="tamanho a partir do qual uma varredura completa é erro")
+    args = parser.parse_args(argv)
+
+    problemas = verificar(args.min_linhas)
+    if problemas:
+        print("\nConsultas sem índice adequado:")
+        for p in problemas:
+            print(" -", p)
+        sys.exit(1)
+    print("\nOK: nenhuma varredura completa em tabelas grandes.")
+
+
+if __name__ == "__main__":
+    main()
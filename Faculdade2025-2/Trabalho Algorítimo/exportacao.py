@@ -0,0 +1,243 @@
+# Exportação de relatórios para arquivo
+
+"""
+Módulo exportacao
+-----------------
+Grava o resultado das consultas de relatório em CSV, Parquet ou Arrow.
+
+As linhas vêm do banco por um cursor em streaming (:func:`db.fetchiter`)
+e são escritas em lotes de ``tamanho_lote``, então a memória usada não
+depende do tamanho do período exportado. Em Parquet e Arrow as colunas
+são tipadas (inteiros, decimais, datas), não texto.
+
+O arquivo é escrito com o sufixo ``.parcial`` e só recebe o nome final
+no fim: uma exportação interrompida não deixa um arquivo pela metade.
+
+O PyArrow é opcional: sem ele o CSV funciona normalmente e
+:data:`ARROW_DISPONIVEL` é ``False``.
+
+>>> exportacao.exportar("vendas_periodo", "janeiro.csv", ("2025-01-01", "2025-01-31"))
+>>> exportacao.exportar("itens_periodo", "janeiro.parquet", ("2025-01-01", "2025-01-31"),
+...                     ao_progresso=lambda linhas: print(linhas))
+"""
+
+import csv
+import os
+from itertools import islice
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:     # só o CSV fica disponível
+    pa = pq = None
+
+import repository as repo
+from db import fetchiter
+
+ARROW_DISPONIVEL = pa is not None
+
+LOTE = 10_000
+
+# extensão do arquivo -> formato
+FORMATOS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow"}
+
+
+class Relatorio:
+    """
+    Consulta que pode ser exportada.
+
+    Parameters
+    ----------
+    descricao : str
+    sql : str
+    colunas : tuple[tuple[str, str]]
+        ``(nome, tipo)`` das colunas gravadas, na ordem do arquivo. O tipo
+        é ``"int"``, ``"decimal"``, ``"texto"``, ``"data"`` ou ``"data_hora"``.
+    parametros : tuple[str]
+        Nomes dos parâmetros da consulta, na ordem dos ``%s``.
+    """
+
+    def __init__(self, descricao, sql, colunas, parametros=()):
+        self.descricao = descricao
+        self.sql = sql
+        self.colunas = tuple(colunas)
+        self.parametros = tuple(parametros)
+
+    @property
+    def nomes(self):
+        return tuple(nome for nome, _ in self.colunas)
+
+
+RELATORIOS = {
+    "vendas_periodo": Relatorio(
+        "Vendas de um período", repo.SQL_HISTORICO_VENDAS_POR_PERIODO,
+        (("id_venda", "int"), ("data_venda", "data_hora"), ("cliente", "texto"),
+         ("valor_total", "decimal")),
+        ("inicio", "fim")),
+    "itens_periodo": Relatorio(
+        "Itens vendidos num período", repo.SQL_ITENS_VENDIDOS_POR_PERIODO,
+        (("id_venda", "int"), ("data_venda", "data_hora"), ("id_cliente", "int"), ("cliente", "texto"),
+         ("id_produto", "int"), ("produto", "texto"), ("categoria", "texto"),
+         ("quantidade", "int"), ("preco_unitario", "decimal"), ("subtotal", "decimal")),
+        ("inicio", "fim")),
+    "vendas_por_dia": Relatorio(
+        "Vendas por dia", repo.SQL_VENDAS_POR_DIA,
+        (("dia", "data"), ("vendas", "int"), ("valor_total", "decimal")),
+        ("inicio", "fim")),
+    "vendas_cliente": Relatorio(
+        "Histórico de um cliente", repo.SQL_HISTORICO_VENDAS_POR_CLIENTE,
+        (("id_venda", "int"), ("data_venda", "data_hora"), ("valor_total", "decimal"),
+         ("produto", "texto"), ("quantidade", "int"), ("preco_unitario", "decimal"),
+         ("subtotal", "decimal")),
+        ("id_cliente",)),
+    "vendas_produto": Relatorio(
+        "Histórico de um produto", repo.SQL_HISTORICO_VENDAS_POR_PRODUTO,
+        (("id_venda", "int"), ("data_venda", "data_hora"), ("valor_total", "decimal"),
+         ("cliente", "texto"), ("quantidade", "int"), ("preco_unitario", "decimal"),
+         ("subtotal", "decimal")),
+        ("id_produto",)),
+    "estoque_baixo": Relatorio(
+        "Estoque baixo", repo.SQL_ESTOQUE_BAIXO,
+        (("id_produto", "int"), ("nome", "texto"), ("quantidade", "int"),
+         ("estoque_minimo", "int"), ("deficit_estoque", "int"))),
+}
+
+
+class _Interrompida(Exception):
+    pass
+
+
+def formato_do_arquivo(destino):
+    """Formato pela extensão de ``destino`` (``ValueError`` se não é conhecida)."""
+    extensao = os.path.splitext(destino)[1].lower()
+    if extensao not in FORMATOS:
+        raise ValueError(f"Extensão '{extensao}' não suportada (use {', '.join(FORMATOS)}).")
+    return FORMATOS[extensao]
+
+
+def _lotes(relatorio, parametros, tamanho_lote, ao_progresso, parar):
+    """Linhas da consulta como tuplas na ordem de ``relatorio.colunas``, em listas de ``tamanho_lote``."""
+    nomes = relatorio.nomes
+    linhas = fetchiter(relatorio.sql, tuple(parametros), batch_size=tamanho_lote)
+    try:
+        escritas = 0
+        while True:
+            if parar is not None and parar.is_set():
+                raise _Interrompida
+            lote = [tuple(r[n] for n in nomes) for r in islice(linhas, tamanho_lote)]
+            if not lote:
+                return
+            yield lote
+            escritas += len(lote)
+            if ao_progresso is not None:
+                ao_progresso(escritas)
+    finally:
+        linhas.close()     # devolve a conexão mesmo se a escrita parar no meio
+
+
+def _escrever_csv(relatorio, lotes, caminho, delimitador):
+    # utf-8 com BOM: o Excel reconhece os acentos ao abrir o arquivo
+    with open(caminho, "w", newline="", encoding="utf-8-sig") as f:
+        escritor = csv.writer(f, delimiter=delimitador)
+        escritor.writerow(relatorio.nomes)
+        for lote in lotes:
+            escritor.writerows(lote)
+
+
+def _esquema(relatorio):
+    tipos = {
+        "int": pa.int64(),
+        "decimal": pa.decimal128(18, 2),
+        "texto": pa.string(),
+        "data": pa.date32(),
+        "data_hora": pa.timestamp("s"),
+    }
+    return pa.schema([(nome, tipos[tipo]) for nome, tipo in relatorio.colunas])
+
+
+def _escrever_arrow(relatorio, lotes, caminho, formato):
+    esquema = _esquema(relatorio)
+    if formato == "parquet":
+        escritor = pq.ParquetWriter(caminho, esquema)
+    else:
+        escritor = pa.ipc.new_file(caminho, esquema)
+    with escritor:
+        for lote in lotes:
+            colunas = [pa.array(valores, type=campo.type) for valores, campo in zip(zip(*lote), esquema)]
+            escritor.write_batch(pa.record_batch(colunas, schema=esquema))
+
+
+def exportar(nome, destino, parametros=(), formato=None, ao_progresso=None, parar=None,
+             tamanho_lote=LOTE, delimitador=","):
+    """
+    Grava o relatório ``nome`` (uma chave de :data:`RELATORIOS`) em ``destino``.
+
+    Parameters
+    ----------
+    nome : str
+    destino : str
+        Caminho do arquivo; a extensão escolhe o formato se ``formato`` não
+        for dado.
+    parametros : tuple
+        Valores dos parâmetros do relatório, na ordem de ``Relatorio.parametros``.
+    formato : {"csv", "parquet", "arrow"}, optional
+    ao_progresso : callable, optional
+        ``ao_progresso(linhas)`` depois de cada lote, com o total já lido.
+        Roda na thread que chamou :func:`exportar`.
+    parar : threading.Event, optional
+        Interrompe a exportação quando marcado (verificado a cada lote).
+    tamanho_lote : int, default=LOTE
+        Linhas por lote (e por grupo de linhas no Parquet).
+    delimitador : str, default=","
+        Separador das colunas no CSV.
+
+    Returns
+    -------
+    int or None
+        Linhas gravadas, ou ``None`` se a exportação foi interrompida (nesse
+        caso nenhum arquivo é criado).
+
+    Raises
+    ------
+    ValueError
+        Relatório, formato ou número de parâmetros inválido.
+    RuntimeError
+        Parquet ou Arrow sem o PyArrow instalado.
+    """
+    if nome not in RELATORIOS:
+        raise ValueError(f"Relatório desconhecido: '{nome}'.")
+    relatorio = RELATORIOS[nome]
+    if len(parametros) != len(relatorio.parametros):
+        raise ValueError(f"O relatório '{nome}' recebe {len(relatorio.parametros)} parâmetro(s): "
+                         f"{', '.join(relatorio.parametros) or 'nenhum'}.")
+    formato = formato or formato_do_arquivo(destino)
+    if formato not in FORMATOS.values():
+        raise ValueError(f"Formato desconhecido: '{formato}'.")
+    if formato != "csv" and pa is None:
+        raise RuntimeError("Exportar em Parquet ou Arrow precisa do PyArrow (pip install pyarrow).")
+
+    linhas = 0
+
+    def contar(total):
+        nonlocal linhas
+        linhas = total
+        if ao_progresso is not None:
+            ao_progresso(total)
+
+    lotes = _lotes(relatorio, parametros, tamanho_lote, contar, parar)
+    parcial = destino + ".parcial"
+    try:
+        if formato == "csv":
+            _escrever_csv(relatorio, lotes, parcial, delimitador)
+        else:
+            _escrever_arrow(relatorio, lotes, parcial, formato)
+    except _Interrompida:
+        os.remove(parcial)
+        return None
+    except BaseException:
+        lotes.close()
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+    os.replace(parcial, destino)
+    return linhas
@@ -0,0 +1,57 @@
+# Exportação de relatórios pela linha de comando
+
+"""
+Módulo exportar
+---------------
+Exporta um relatório para CSV, Parquet ou Arrow sem abrir a interface
+(ver :mod:`exportacao`).
+
+Uso:
+
+    python exportar.py --listar
+    python exportar.py vendas_periodo janeiro.csv 2025-01-01 2025-01-31
+    python exportar.py itens_periodo 2025.parquet 2025-01-01 2025-12-31
+    python exportar.py vendas_cliente cliente_12.csv 12
+"""
+
+import argparse
+import sys
+import time
+
+import exportacao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta um relatório para arquivo.")
+    parser.add_argument("relatorio", nargs="?", choices=sorted(exportacao.RELATORIOS),
+                        help="relatório a exportar (ver --listar)")
+    parser.add_argument("destino", nargs="?", help="arquivo .csv, .parquet ou .arrow")
+    parser.add_argument("parametros", nargs="*", help="parâmetros do relatório, na ordem")
+    parser.add_argument("--listar", action="store_true", help="mostra os relatórios e os parâmetros")
+    parser.add_argument("--lote", type=int, default=exportacao.LOTE, help="linhas por lote")
+    parser.add_argument("--delimitador", default=",", help="separador das colunas no CSV")
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        for nome, r in sorted(exportacao.RELATORIOS.items()):
+            print(f"{nome:16} {r.descricao} ({', '.join(r.parametros) or 'sem parâmetros'})")
+        return
+    if args.relatorio is None or args.destino is None:
+        parser.error("informe o relatório e o arquivo de destino")
+
+    def progresso(linhas):
+        print(f"\r{linhas} linha(s)...", end="", file=sys.stderr, flush=True)
+
+    inicio = time.perf_counter()
+    try:
+        linhas = exportacao.exportar(args.relatorio, args.destino, tuple(args.parametros),
+                                     ao_progresso=progresso, tamanho_lote=args.lote,
+                                     delimitador=args.delimitador)
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+    print(f"\r{linhas} linha(s) exportada(s) para {args.destino} "
+          f"em {time.perf_counter() - inicio:.1f}s.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
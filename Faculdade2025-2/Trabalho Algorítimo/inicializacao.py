@@ -0,0 +1,81 @@
+# Tempos de abertura da aplicação
+
+"""
+Módulo inicializacao
+--------------------
+Mede a abertura da interface: quanto tempo cada módulo pesado leva para
+ser importado e quando acontecem os marcos da inicialização (primeira
+pintura da janela, interface montada, primeiros dados na tela, pool de
+conexões aquecido), contados a partir da importação deste módulo.
+
+Deve ser o primeiro import do ``app.py``. O relatório vai para a saída de
+erro quando a variável de ambiente ``TEMPOS_INICIO=1`` está definida; o
+detalhe de cada import, inclusive os leves, sai com
+``python -X importtime app.py``.
+
+>>> import inicializacao
+>>> ui_main = inicializacao.importar("ui_main")
+>>> inicializacao.marcar("interface montada")
+>>> print(inicializacao.relatorio())
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+
+INICIO = time.perf_counter()
+
+# variável de ambiente: o .env só é lido pelo db.py, depois da janela aparecer
+relatar = os.getenv("TEMPOS_INICIO", "0") == "1"
+
+# Marco que encerra a inicialização (imprime o relatório se ``relatar``)
+FINAL = "primeiros dados"
+
+importacoes = []    # (módulo, segundos), na ordem em que foram importados
+marcos = {}         # marco -> segundos desde INICIO (só a primeira vez)
+
+_lock = threading.Lock()
+
+
+def decorrido():
+    """Segundos desde a importação deste módulo."""
+    return time.perf_counter() - INICIO
+
+
+def importar(nome):
+    """
+    Importa o módulo ``nome`` medindo o tempo.
+
+    O tempo inclui os módulos que ele importa e que ainda não estavam
+    carregados; um módulo já carregado custa praticamente zero.
+    """
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nome)
+    with _lock:
+        importacoes.append((nome, time.perf_counter() - inicio))
+    return modulo
+
+
+def marcar(marco):
+    """Registra o instante de ``marco``; chamadas repetidas são ignoradas."""
+    with _lock:
+        if marco in marcos:
+            return
+        marcos[marco] = decorrido()
+    if relatar and marco == FINAL:
+        print(relatorio(), file=sys.stderr)
+
+
+def relatorio():
+    """Texto com os imports medidos e os marcos da inicialização."""
+    with _lock:
+        linhas = ["Inicialização:", "  imports:"]
+        linhas += [f"    {nome:<20} {segundos * 1000:8.1f} ms" for nome, segundos in importacoes]
+        total = sum(segundos for _, segundos in importacoes)
+        linhas.append(f"    {'total':<20} {total * 1000:8.1f} ms")
+        linhas.append("  marcos:")
+        linhas += [f"    {marco:<20} {segundos * 1000:8.1f} ms"
+                   for marco, segundos in sorted(marcos.items(), key=lambda m: m[1])]
+    return "\n".join(linhas)
@@ -0,0 +1,231 @@
+# Métricas das consultas ao banco
+
+"""
+Módulo instrumentation
+----------------------
+Mede cada comando enviado pelo db.py: tempo de execução, linhas, tempo
+para obter a conexão do pool e a função do repository.py que o chamou.
+Guarda histogramas em memória (p50/p95/p99) e grava os comandos lentos
+num arquivo de log.
+
+Desligado por padrão; quando desligado o custo é só um ``if`` por comando.
+Pode ser ligado pelo .env (``DB_INSTRUMENTATION=1``, ``SLOW_QUERY_MS``,
+``SLOW_QUERY_LOG``) ou em tempo de execução:
+
+>>> import instrumentation
+>>> instrumentation.enable(slow_query_ms=100)
+>>> ...
+>>> print(instrumentation.report())
+"""
+
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+
+enabled = os.getenv("DB_INSTRUMENTATION", "0") == "1"
+slow_ms = float(os.getenv("SLOW_QUERY_MS", 200))
+slow_log_path = os.getenv("SLOW_QUERY_LOG", "slow_queries.log")
+
+# Módulos ignorados ao procurar quem chamou o comando
+_INTERNOS = {__name__, "db", "contextlib"}
+
+_lock = threading.Lock()
+_slow_logger = None
+
+
+class Histogram:
+    """
+    Histograma de durações com baldes em escala geométrica.
+
+    Usa memória constante (cerca de 100 contadores) e dá percentis com erro
+    de no máximo ``fator`` (10%) — suficiente para dimensionar e comparar.
+    """
+
+    MINIMO = 0.01      # ms
+    FATOR = 1.1
+
+    def __init__(self):
+        self.baldes = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        indice = 0 if ms <= self.MINIMO else int(math.log(ms / self.MINIMO, self.FATOR)) + 1
+        self.baldes[indice] = self.baldes.get(indice, 0) + 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        """Limite superior (ms) do balde que contém o percentil ``p`` (0-100)."""
+        if not self.count:
+            return 0.0
+        alvo = math.ceil(self.count * p / 100)
+        acumulado = 0
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            if acumulado >= alvo:
+                return min(self.MINIMO * self.FATOR ** indice, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+        }
+
+
+class _Metricas:
+    """Métricas acumuladas de uma função do repositório."""
+
+    def __init__(self):
+        self.execucao = Histogram()
+        self.linhas = 0
+
+_por_funcao = {}
+_aquisicao = Histogram()
+_transacoes = {}
+
+
+def enable(slow_query_ms=None, log_path=None):
+    """Liga a instrumentação (opcionalmente mudando o limite e o arquivo do log de lentas)."""
+    global enabled, slow_ms, slow_log_path, _slow_logger
+    if slow_query_ms is not None:
+        slow_ms = float(slow_query_ms)
+    if log_path is not None and log_path != slow_log_path:
+        slow_log_path = log_path
+        _slow_logger = None
+    enabled = True
+
+
+def disable():
+    """Desliga a instrumentação (as métricas já coletadas são mantidas)."""
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Zera todas as métricas."""
+    global _aquisicao
+    with _lock:
+        _por_funcao.clear()
+        _transacoes.clear()
+        _aquisicao = Histogram()
+
+
+def caller():
+    """Nome da primeira função fora do db.py na pilha (ex.: ``repository.inserir_venda``)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        modulo = frame.f_globals.get("__name__", "")
+        if modulo not in _INTERNOS:
+            return f"{modulo}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+def _logger():
+    global _slow_logger
+    if _slow_logger is None:
+        logger = logging.getLogger("db.slow_queries")
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        handler = logging.FileHandler(slow_log_path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        _slow_logger = logger
+    return _slow_logger
+
+
+def record_statement(query, params, inicio, linhas=None):
+    """
+    Registra um comando executado.
+
+    Parameters
+    ----------
+    query : str
+    params : tuple or None
+    inicio : float
+        ``time.perf_counter()`` de antes da execução.
+    linhas : int, optional
+        Linhas lidas ou afetadas.
+    """
+    ms = (time.perf_counter() - inicio) * 1000
+    funcao = caller()
+    with _lock:
+        m = _por_funcao.get(funcao)
+        if m is None:
+            m = _por_funcao[funcao] = _Metricas()
+        m.execucao.add(ms)
+        m.linhas += linhas or 0
+    if ms >= slow_ms:
+        sql = re.sub(r"\s+", " ", query).strip()
+        _logger().warning("%.1fms %s linhas=%s | %s | %r", ms, funcao, linhas, sql, params)
+
+
+def record_acquire(inicio):
+    """Registra o tempo gasto esperando uma conexão do pool."""
+    ms = (time.perf_counter() - inicio) * 1000
+    with _lock:
+        _aquisicao.add(ms)
+
+
+def record_transaction(inicio):
+    """Registra a duração de uma transação (do início ao COMMIT/ROLLBACK)."""
+    ms = (time.perf_counter() - inicio) * 1000
+    funcao = caller()
+    with _lock:
+        h = _transacoes.get(funcao)
+        if h is None:
+            h = _transacoes[funcao] = Histogram()
+        h.add(ms)
+
+
+def snapshot():
+    """
+    Retorna as métricas acumuladas.
+
+    Returns
+    -------
+    dict
+        ``{"statements": {função: {...}}, "transactions": {função: {...}},
+        "acquire": {...}}`` com contagem, total, média, p50, p95, p99 e
+        máximo em ms (e ``rows`` para os comandos).
+    """
+    with _lock:
+        comandos = {}
+        for funcao, m in _por_funcao.items():
+            comandos[funcao] = dict(m.execucao.summary(), rows=m.linhas)
+        return {
+            "statements": comandos,
+            "transactions": {f: h.summary() for f, h in _transacoes.items()},
+            "acquire": _aquisicao.summary(),
+        }
+
+
+def report():
+    """Tabela de texto com as métricas, das funções mais caras para as mais baratas."""
+    dados = snapshot()
+    linhas = [f"{'função':<48} {'n':>7} {'total':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'linhas':>9}"]
+    for funcao, s in sorted(dados["statements"].items(), key=lambda kv: -kv[1]["total_ms"]):
+        linhas.append(f"{funcao:<48} {s['count']:>7} {s['total_ms']:>8.1f}ms {s['p50_ms']:>6.2f}ms "
+                      f"{s['p95_ms']:>6.2f}ms {s['p99_ms']:>6.2f}ms {s['rows']:>9}")
+    for funcao, s in sorted(dados["transactions"].items()):
+        linhas.append(f"{'[transação] ' + funcao:<48} {s['count']:>7} {s['total_ms']:>8.1f}ms "
+                      f"{s['p50_ms']:>6.2f}ms {s['p95_ms']:>6.2f}ms {s['p99_ms']:>6.2f}ms")
+    a = dados["acquire"]
+    linhas.append(f"{'[conexão do pool]':<48} {a['count']:>7} {a['total_ms']:>8.1f}ms "
+                  f"{a['p50_ms']:>6.2f}ms {a['p95_ms']:>6.2f}ms {a['p99_ms']:>6.2f}ms")
+    return "\n".join(linhas)
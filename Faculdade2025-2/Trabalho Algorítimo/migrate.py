@@ -0,0 +1,143 @@
+# Migrações versionadas do banco
+
+"""
+Módulo migrate
+--------------
+Aplica, em ordem, os arquivos ``migrations/NNNN_descricao.sql`` ainda não
+aplicados no banco, registrando cada um na tabela ``schema_migrations``.
+
+Banco novo: rode ``db_programa.sql`` e depois ``python migrate.py``.
+
+Uso:
+
+    python migrate.py            # aplica as pendentes
+    python migrate.py --status   # lista aplicadas e pendentes
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+from db import get_conn
+
+PASTA = Path(__file__).resolve().parent / "migrations"
+
+
+def listar_migracoes():
+    """
+    Retorna as migrações disponíveis, em ordem de versão.
+
+    Returns
+    -------
+    list[tuple[int, str, Path]]
+        ``(versão, nome, caminho)``.
+    """
+    migracoes = []
+    for arq in sorted(PASTA.glob("*.sql")):
+        m = re.match(r"(\d+)_(.+)\.sql$", arq.name)
+        if m:
+            migracoes.append((int(m.group(1)), m.group(2), arq))
+    return migracoes
+
+
+def _comandos(sql):
+    """Separa um arquivo .sql em comandos (ignora comentários ``--``)."""
+    linhas = [l for l in sql.splitlines() if not l.strip().startswith("--")]
+    return [c.strip() for c in "\n".join(linhas).split(";") if c.strip()]
+
+
+def _garantir_tabela(cur):
+    # Sem "IF NOT EXISTS": a nota gerada vira erro com raise_on_warnings
+    cur.execute("""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = 'schema_migrations'
+    """)
+    (existe,) = cur.fetchone()
+    if existe:
+        return
+    cur.execute("""
+        CREATE TABLE schema_migrations (
+            versao INT PRIMARY KEY,
+            nome VARCHAR(150) NOT NULL,
+            aplicada_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def versoes_aplicadas():
+    """Retorna o conjunto de versões já aplicadas no banco."""
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        _garantir_tabela(cur)
+        cur.execute("SELECT versao FROM schema_migrations")
+        versoes = {v for (v,) in cur.fetchall()}
+        cur.close()
+        return versoes
+    finally:
+        conn.close()
+
+
+def pendentes():
+    """
+    Retorna as migrações ainda não aplicadas no banco.
+
+    Returns
+    -------
+    list[tuple[int, str]]
+        ``(versão, nome)``, em ordem.
+    """
+    aplicadas = versoes_aplicadas()
+    return [(versao, nome) for versao, nome, _ in listar_migracoes() if versao not in aplicadas]
+
+
+def migrar(saida=print):
+    """
+    Aplica as migrações pendentes.
+
+    Comandos DDL do MySQL fazem commit implícito: se um arquivo falhar no
+    meio, corrija-o e remova manualmente o que já foi criado antes de
+    rodar de novo.
+
+    Returns
+    -------
+    list[int]
+        Versões aplicadas nesta execução.
+    """
+    aplicadas = versoes_aplicadas()
+    novas = []
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        for versao, nome, arq in listar_migracoes():
+            if versao in aplicadas:
+                continue
+            saida(f"Aplicando {arq.name}...")
+            for comando in _comandos(arq.read_text(encoding="utf-8")):
+                cur.execute(comando)
+            cur.execute("INSERT INTO schema_migrations (versao, nome) VALUES (%s, %s)", (versao, nome))
+            conn.commit()
+            novas.append(versao)
+        cur.close()
+    finally:
+        conn.close()
+    if not novas:
+        saida("Banco já está atualizado.")
+    return novas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica as migrações do banco.")
+    parser.add_argument("--status", action="store_true", help="só mostra o estado das migrações")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        aplicadas = versoes_aplicadas()
+        for versao, nome, _ in listar_migracoes():
+            print(f"{versao:04d} {nome:<40} {'aplicada' if versao in aplicadas else 'pendente'}")
+    else:
+        migrar()
+
+
+if __name__ == "__main__":
+    main()
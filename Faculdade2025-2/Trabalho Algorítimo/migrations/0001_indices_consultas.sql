@@ -0,0 +1,25 @@
+-- Índices para as consultas do repository.py
+-- (estado.nome já tem o índice único uq_estado_nome)
+
+-- buscar_produto_por_nome_fornecedor: WHERE nome = ? AND id_fornecedor = ?
+CREATE INDEX idx_produto_nome_fornecedor ON produto (nome, id_fornecedor);
+-- listar_produtos / paginar_produtos: ORDER BY nome, id_produto
+CREATE INDEX idx_produto_nome ON produto (nome);
+
+-- buscar_cidade_por_nome: WHERE nome = ?
+CREATE INDEX idx_cidade_nome ON cidade (nome);
+-- listar_cidades: WHERE id_estado = ? ORDER BY nome
+CREATE INDEX idx_cidade_estado_nome ON cidade (id_estado, nome);
+
+-- listar_enderecos: WHERE id_cidade = ? ORDER BY rua, numero
+CREATE INDEX idx_endereco_cidade_rua ON endereco (id_cidade, rua, numero);
+
+-- listar_vendas / paginar_vendas / historico_vendas_por_periodo: data_venda (+ id_venda da PK)
+CREATE INDEX idx_venda_data ON venda (data_venda);
+-- historico_vendas_por_cliente: WHERE id_cliente = ? ORDER BY data_venda DESC
+CREATE INDEX idx_venda_cliente_data ON venda (id_cliente, data_venda);
+
+-- listar_itens_venda: WHERE id_venda = ? (índice cobre todas as colunas lidas)
+CREATE INDEX idx_produto_venda_itens ON produto_venda (id_venda, id_produto, quantidade, preco_unitario, subtotal);
+-- historico_vendas_por_produto: WHERE id_produto = ?, junta com venda
+CREATE INDEX idx_produto_venda_produto ON produto_venda (id_produto, id_venda);
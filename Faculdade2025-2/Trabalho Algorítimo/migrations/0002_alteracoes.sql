@@ -0,0 +1,16 @@
+-- Registro de alterações (feed incremental para as grades da interface)
+-- Cada INSERT/UPDATE/DELETE feito pelo repository.py em produto, cliente,
+-- fornecedor e venda grava uma linha aqui, na mesma transação.
+
+CREATE TABLE alteracao (
+    versao BIGINT AUTO_INCREMENT PRIMARY KEY,
+    tabela VARCHAR(30) NOT NULL,
+    id_registro INT NOT NULL,
+    operacao CHAR(1) NOT NULL,          -- I, U ou D
+    alterado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- alteracoes_desde: WHERE tabela = ? AND versao > ?
+CREATE INDEX idx_alteracao_tabela_versao ON alteracao (tabela, versao);
+-- limpar_alteracoes: WHERE alterado_em < ?
+CREATE INDEX idx_alteracao_data ON alteracao (alterado_em);
@@ -0,0 +1,9 @@
+-- Estoque baixo calculado pelo banco
+-- deficit_estoque >= 0 quando quantidade <= estoque_minimo; o índice deixa
+-- listar_estoque_baixo ler só os produtos em alerta, do maior déficit
+-- para o menor, sem varrer a tabela.
+
+ALTER TABLE produto
+    ADD COLUMN deficit_estoque INT AS (COALESCE(estoque_minimo, 0) - quantidade) STORED;
+
+CREATE INDEX idx_produto_deficit ON produto (deficit_estoque);
@@ -0,0 +1,35 @@
+-- Resumos de vendas para os relatórios
+-- Totais por dia, por dia x produto e por dia x cliente, atualizados pelo
+-- repository.py na mesma transação que insere ou apaga cada venda.
+-- Depois de aplicar (ou se os dados forem alterados por fora do sistema),
+-- preencha com: python resumos.py
+-- Linhas com vendas = 0 (dias cujas vendas foram apagadas) podem ficar;
+-- as consultas as ignoram.
+
+CREATE TABLE resumo_venda_dia (
+    dia DATE PRIMARY KEY,
+    vendas INT NOT NULL,
+    valor_total DECIMAL(14,2) NOT NULL
+);
+
+CREATE TABLE resumo_venda_produto (
+    id_produto INT NOT NULL,
+    dia DATE NOT NULL,
+    vendas INT NOT NULL,                -- vendas em que o produto aparece
+    quantidade INT NOT NULL,
+    valor_total DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (id_produto, dia)
+);
+
+-- totais_por_produto: WHERE dia BETWEEN ? AND ?
+CREATE INDEX idx_resumo_venda_produto_dia ON resumo_venda_produto (dia);
+
+CREATE TABLE resumo_venda_cliente (
+    id_cliente INT NOT NULL,
+    dia DATE NOT NULL,
+    vendas INT NOT NULL,
+    valor_total DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (id_cliente, dia)
+);
+
+CREATE INDEX idx_resumo_venda_cliente_dia ON resumo_venda_cliente (dia);
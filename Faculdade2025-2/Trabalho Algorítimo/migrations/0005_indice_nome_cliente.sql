@@ -0,0 +1,3 @@
+-- Busca de clientes pelo começo do nome
+-- pesquisar_clientes: WHERE nome LIKE 'texto%' ORDER BY nome LIMIT ?
+CREATE INDEX idx_cliente_nome ON cliente (nome);
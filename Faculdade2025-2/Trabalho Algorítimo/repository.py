@@ -5,43 +5,595 @@ Módulo repository
 -----------------
 CRUD e regras de negócio (interação com o banco).
 """
-from db import fetchall, execute, fetchone
+from db import fetchall, fetchiter, execute, fetchone, transaction, current_transaction
+from models import ResultadoIngestao, Produto, Cliente, Fornecedor, Venda
+from cache import CacheTTL
 from datetime import datetime
+import base64
+import json
+import time
+
+
+# ---------------- CACHE DE DADOS DE REFERÊNCIA ----------------
+# Estados, cidades e fornecedores mudam pouco e são lidos a cada diálogo
+# aberto; as funções que gravam nessas tabelas invalidam o cache.
+_cache_estados = CacheTTL("estados")
+_cache_cidades = CacheTTL("cidades")
+_cache_fornecedores = CacheTTL("fornecedores")
+
+def _invalidar(*caches):
+    """
+    Invalida os caches agora e, dentro de uma transação, de novo depois do
+    COMMIT (outra thread pode ter recarregado o valor antigo). Num ROLLBACK
+    o valor antigo continua certo.
+    """
+    def invalidar():
+        for c in caches:
+            c.invalidar()
+    invalidar()
+    uow = current_transaction()
+    if uow is not None:
+        uow.on_finish(invalidar)
+
+
+# ---------------- PAGINAÇÃO (keyset) ----------------
+def _codificar_cursor(valores):
+    """Transforma os valores da chave da última linha num token opaco."""
+    dados = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in valores]
+    return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode()
+
+def _decodificar_cursor(token):
+    dados = json.loads(base64.urlsafe_b64decode(token.encode()))
+    return [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v for v in dados]
+
+def _paginar(sql_base, chave, tamanho, cursor, desc=False, row_type=None):
+    """
+    Busca uma página por keyset (seek): em vez de OFFSET, continua a partir
+    da chave da última linha da página anterior, usando o índice da ordenação.
+
+    Parameters
+    ----------
+    sql_base : str
+        SELECT ... FROM ... JOIN ... sem WHERE nem ORDER BY.
+    chave : list[tuple[str, str]]
+        Colunas de ordenação ``(expressão SQL, nome no resultado)``; a última
+        deve ser única (o ID) para desempatar.
+    tamanho : int
+        Linhas por página.
+    cursor : str or None
+        Token devolvido pela página anterior (``None`` para a primeira).
+    desc : bool
+        Ordem decrescente.
+    row_type : type, optional
+        Tipo das linhas (ver ``db.fetchall``).
+
+    Returns
+    -------
+    tuple[list[dict], str or None]
+        Linhas da página e o cursor da próxima (``None`` se acabou).
+    """
+    sql = sql_base
+    params = []
+    if cursor:
+        op = "<" if desc else ">"
+        colunas = ", ".join(expr for expr, _ in chave)
+        sql += f" WHERE ({colunas}) {op} ({', '.join(['%s'] * len(chave))})"
+        params.extend(_decodificar_cursor(cursor))
+    direcao = " DESC" if desc else ""
+    sql += " ORDER BY " + ", ".join(expr + direcao for expr, _ in chave) + " LIMIT %s"
+    params.append(tamanho + 1)
+
+    rows = fetchall(sql, tuple(params), row_type=row_type)
+    if len(rows) <= tamanho:
+        return rows, None
+    rows = rows[:tamanho]
+    return rows, _codificar_cursor([rows[-1][nome] for _, nome in chave])
+
+def _janela(sql_base, ordem, id_expr, tamanho, offset=0, apos=None, desc=False, row_type=None):
+    """
+    Trecho de uma listagem ordenada por qualquer coluna (para a grade
+    virtual, ver ``ui_grid.GradeVirtual``).
+
+    Cada linha traz a coluna extra ``_ordem`` com o valor da ordenação.
+    Com ``apos`` a busca continua depois dessa linha pelo índice (keyset);
+    sem ele pula ``offset`` linhas (usado quando o usuário arrasta a barra
+    de rolagem para longe).
+
+    Parameters
+    ----------
+    sql_base : str
+        SELECT ... FROM ... JOIN ... sem WHERE nem ORDER BY.
+    ordem : str
+        Expressão SQL da ordenação (sem NULLs, use COALESCE).
+    id_expr : str
+        Expressão do ID, para desempate.
+    apos : tuple, optional
+        ``(_ordem, id)`` da última linha já lida.
+    row_type : type, optional
+        Tipo das linhas sem ``_ordem``; as linhas vêm como ``row_type.com_ordem()``.
+    """
+    sql = sql_base.replace("SELECT", f"SELECT {ordem} AS _ordem,", 1)
+    params = []
+    if apos is not None:
+        sql += f" WHERE ({ordem}, {id_expr}) {'<' if desc else '>'} (%s, %s)"
+        params.extend(apos)
+    direcao = " DESC" if desc else ""
+    sql += f" ORDER BY {ordem}{direcao}, {id_expr}{direcao} LIMIT %s"
+    params.append(tamanho)
+    if apos is None and offset:
+        sql += " OFFSET %s"
+        params.append(offset)
+    return fetchall(sql, tuple(params), row_type=row_type and row_type.com_ordem())
+
+
+# ---------------- ALTERAÇÕES (feed incremental) ----------------
+# Toda gravação em produto, cliente, fornecedor e venda registra, na mesma
+# transação, o ID alterado na tabela ``alteracao`` (migrations/0002). As
+# grades da interface leem só o que mudou desde a última versão que viram.
+SQL_REGISTRAR_ALTERACAO = "INSERT INTO alteracao (tabela, id_registro, operacao) VALUES (%s, %s, %s)"
+
+# Transações mais curtas que isso não deixam "buracos" no feed (ver
+# alteracoes_desde); as mais longas pedem uma recarga completa ao terminar.
+MARGEM_ALTERACOES = 60   # segundos
+
+def _vigiar_transacao(uow, tabela):
+    """
+    Marca ``tabela`` como alterada em ``uow``. Se a transação durar mais
+    que metade de ``MARGEM_ALTERACOES`` (o TIMESTAMP perde os décimos), ao
+    terminar ela grava uma alteração ``"R"`` (recarregar): suas linhas do
+    feed podem ter ficado atrás de uma versão que os leitores já passaram.
+    """
+    tabelas = uow.info.get("alteracao")
+    if tabelas is None:
+        tabelas = uow.info["alteracao"] = set()
+
+        def marcar_recarga():
+            if time.perf_counter() - uow.iniciada > MARGEM_ALTERACOES / 2:
+                uow.executemany(SQL_REGISTRAR_ALTERACAO, [(t, 0, "R") for t in sorted(tabelas)])
+
+        uow.before_commit(marcar_recarga)
+    tabelas.add(tabela)
+
+def _registrar_alteracao(tabela, ids, operacao):
+    """
+    Registra que os registros ``ids`` de ``tabela`` foram inseridos
+    (``"I"``), alterados (``"U"``) ou removidos (``"D"``).
+    """
+    linhas = [(tabela, i, operacao) for i in ids if i is not None]
+    if not linhas:
+        return
+    uow = current_transaction()
+    if uow is not None:
+        _vigiar_transacao(uow, tabela)
+        uow.executemany(SQL_REGISTRAR_ALTERACAO, linhas)
+        return
+    with transaction() as uow:
+        uow.executemany(SQL_REGISTRAR_ALTERACAO, linhas)
+
+def _registrar_alteracao_consulta(tabela, operacao, coluna_id, sql_from, params):
+    """Como :func:`_registrar_alteracao`, com os IDs vindos de um SELECT (``FROM ... WHERE ...``)."""
+    uow = current_transaction()
+    if uow is not None:
+        _vigiar_transacao(uow, tabela)
+    execute(f"INSERT INTO alteracao (tabela, id_registro, operacao) SELECT %s, {coluna_id}, %s {sql_from}",
+            (tabela, operacao) + tuple(params))
+
+def versao_alteracoes():
+    """Versão mais recente do registro de alterações (0 se vazio)."""
+    row = fetchone("SELECT COALESCE(MAX(versao), 0) AS versao FROM alteracao")
+    return row["versao"]
+
+def alteracoes_desde(tabela, versao, limite=5000):
+    """
+    Registros de ``tabela`` alterados depois de ``versao``.
+
+    Os IDs de AUTO_INCREMENT são reservados antes do COMMIT, então uma
+    transação demorada pode aparecer depois de outra com versão maior. Por
+    isso a nova versão só avança até alterações com mais de
+    ``MARGEM_ALTERACOES`` segundos; as mais recentes voltam na próxima
+    leitura (aplicá-las de novo não tem efeito). Uma transação mais longa
+    que a margem grava uma alteração ``"R"`` e o leitor recarrega tudo.
+
+    Parameters
+    ----------
+    tabela : str
+        ``"produto"``, ``"cliente"``, ``"fornecedor"`` ou ``"venda"``.
+    versao : int
+        Última versão já aplicada.
+    limite : int
+        Acima disso é mais barato recarregar tudo.
+
+    Returns
+    -------
+    tuple[dict[int, str] or None, int]
+        ``id -> última operação`` (``None`` se passou do limite ou se é
+        preciso recarregar) e a versão a usar na próxima chamada.
+    """
+    rows = fetchall("""
+        SELECT versao, id_registro, operacao,
+               alterado_em < NOW() - INTERVAL %s SECOND AS assentada
+        FROM alteracao
+        WHERE tabela = %s AND versao > %s
+        ORDER BY versao
+        LIMIT %s
+    """, (MARGEM_ALTERACOES, tabela, versao, limite + 1))
+    if len(rows) > limite or any(r["operacao"] == "R" for r in rows):
+        return None, versao_alteracoes()
+    alteracoes = {}
+    nova_versao = versao
+    avancar = True
+    for r in rows:
+        alteracoes[r["id_registro"]] = r["operacao"]
+        # avança só enquanto as alterações são antigas o bastante
+        avancar = avancar and bool(r["assentada"])
+        if avancar:
+            nova_versao = r["versao"]
+    return alteracoes, nova_versao
+
+def limpar_alteracoes(dias=30):
+    """Apaga do registro as alterações com mais de ``dias`` dias."""
+    execute("DELETE FROM alteracao WHERE alterado_em < NOW() - INTERVAL %s DAY", (dias,))
+
+def _por_ids(sql_base, coluna, ids, row_type=None):
+    ids = list(ids)
+    if not ids:
+        return []
+    marcadores = ", ".join(["%s"] * len(ids))
+    return fetchall(sql_base + f" WHERE {coluna} IN ({marcadores})", tuple(ids), row_type=row_type)
+
+def _prefixo_like(texto):
+    """Padrão de LIKE para "começa com ``texto``" (escapa ``%``, ``_`` e ``\\``)."""
+    texto = texto.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return texto + "%"
+
+
+# ---------------- RESUMOS DE VENDAS ----------------
+# Totais por dia, dia x produto e dia x cliente (migração 0004), somados
+# ou subtraídos na mesma transação que insere ou apaga as vendas. A ordem
+# (produto, cliente, dia) é a mesma em todas as transações, para as travas
+# das linhas de resumo não causarem deadlock.
+_SQL_RESUMOS = (
+    ("resumo_venda_produto", """
+        INSERT INTO resumo_venda_produto (id_produto, dia, vendas, quantidade, valor_total)
+        SELECT * FROM (
+            SELECT pv.id_produto, DATE(v.data_venda) AS d, {s} * COUNT(DISTINCT pv.id_venda) AS n,
+                   {s} * SUM(pv.quantidade) AS q, {s} * SUM(pv.subtotal) AS t
+            FROM venda v
+            JOIN produto_venda pv ON pv.id_venda = v.id_venda
+            WHERE {filtro} AND v.data_venda IS NOT NULL
+            GROUP BY pv.id_produto, DATE(v.data_venda)
+        ) AS novo
+        ON DUPLICATE KEY UPDATE vendas = vendas + novo.n, quantidade = quantidade + novo.q,
+                                valor_total = valor_total + novo.t
+    """),
+    ("resumo_venda_cliente", """
+        INSERT INTO resumo_venda_cliente (id_cliente, dia, vendas, valor_total)
+        SELECT * FROM (
+            SELECT v.id_cliente, DATE(v.data_venda) AS d, {s} * COUNT(*) AS n,
+                   {s} * SUM(COALESCE(v.valor_total, 0)) AS t
+            FROM venda v
+            WHERE {filtro} AND v.data_venda IS NOT NULL AND v.id_cliente IS NOT NULL
+            GROUP BY v.id_cliente, DATE(v.data_venda)
+        ) AS novo
+        ON DUPLICATE KEY UPDATE vendas = vendas + novo.n, valor_total = valor_total + novo.t
+    """),
+    ("resumo_venda_dia", """
+        INSERT INTO resumo_venda_dia (dia, vendas, valor_total)
+        SELECT * FROM (
+            SELECT DATE(v.data_venda) AS d, {s} * COUNT(*) AS n,
+                   {s} * SUM(COALESCE(v.valor_total, 0)) AS t
+            FROM venda v
+            WHERE {filtro} AND v.data_venda IS NOT NULL
+            GROUP BY DATE(v.data_venda)
+        ) AS novo
+        ON DUPLICATE KEY UPDATE vendas = vendas + novo.n, valor_total = valor_total + novo.t
+    """),
+)
+
+def _somar_resumos(uow, filtro, params, sinal=1):
+    s = 1 if sinal > 0 else -1
+    for _, sql in _SQL_RESUMOS:
+        uow.execute(sql.format(s=s, filtro=filtro), params)
+
+def ajustar_resumos(uow, ids_venda, sinal=1):
+    """
+    Soma (``sinal=1``) ou subtrai (``sinal=-1``) as vendas dos resumos.
+
+    Deve rodar na transação ``uow`` que grava as vendas: depois de inserir
+    os itens, ou antes do DELETE. As funções de venda deste módulo já o
+    chamam; só é preciso para vendas gravadas por fora (ex.: benchmarks).
+    """
+    ids = list(ids_venda)
+    if not ids:
+        return
+    marcadores = ", ".join(["%s"] * len(ids))
+    _somar_resumos(uow, f"v.id_venda IN ({marcadores})", tuple(ids), sinal)
+
+def reconstruir_resumos(data_inicio=None, data_fim=None):
+    """
+    Recalcula os resumos a partir de ``venda`` e ``produto_venda``.
+
+    Parameters
+    ----------
+    data_inicio, data_fim : date or str, optional
+        Refaz só esses dias (inclusive); sem datas, refaz tudo.
+    """
+    with transaction() as uow:
+        if data_inicio is None or data_fim is None:
+            for tabela, _ in _SQL_RESUMOS:
+                uow.execute(f"DELETE FROM {tabela}")
+            _somar_resumos(uow, "1 = 1", ())
+        else:
+            for tabela, _ in _SQL_RESUMOS:
+                uow.execute(f"DELETE FROM {tabela} WHERE dia BETWEEN %s AND %s", (data_inicio, data_fim))
+            _somar_resumos(uow, "v.data_venda >= %s AND v.data_venda < %s + INTERVAL 1 DAY",
+                           (data_inicio, data_fim))
+
+def totais_vendas_por_periodo(data_inicio, data_fim):
+    """
+    Número de vendas e valor total entre duas datas (dias inteiros,
+    inclusive), pelo resumo diário.
+
+    Returns
+    -------
+    dict
+        ``{"vendas": int, "valor_total": Decimal}``.
+    """
+    return fetchone("""
+        SELECT COALESCE(SUM(vendas), 0) AS vendas, COALESCE(SUM(valor_total), 0) AS valor_total
+        FROM resumo_venda_dia
+        WHERE dia BETWEEN %s AND %s
+    """, (data_inicio, data_fim))
+
+SQL_VENDAS_POR_DIA = """
+        SELECT dia, vendas, valor_total
+        FROM resumo_venda_dia
+        WHERE dia BETWEEN %s AND %s AND vendas > 0
+        ORDER BY dia
+    """
+
+def vendas_por_dia(data_inicio, data_fim):
+    """Vendas e valor total de cada dia do período (só dias com vendas)."""
+    return fetchall(SQL_VENDAS_POR_DIA, (data_inicio, data_fim))
+
+def totais_por_produto(data_inicio, data_fim, limite=None):
+    """Produtos vendidos no período, do maior valor vendido para o menor."""
+    sql = """
+        SELECT r.id_produto, p.nome AS produto, SUM(r.vendas) AS vendas,
+               SUM(r.quantidade) AS quantidade, SUM(r.valor_total) AS valor_total
+        FROM resumo_venda_produto r
+        JOIN produto p ON p.id_produto = r.id_produto
+        WHERE r.dia BETWEEN %s AND %s
+        GROUP BY r.id_produto, p.nome
+        HAVING SUM(r.vendas) > 0
+        ORDER BY valor_total DESC
+    """
+    if limite is not None:
+        return fetchall(sql + " LIMIT %s", (data_inicio, data_fim, limite))
+    return fetchall(sql, (data_inicio, data_fim))
+
+def totais_por_cliente(data_inicio, data_fim, limite=None):
+    """Clientes que compraram no período, do maior valor para o menor."""
+    sql = """
+        SELECT r.id_cliente, c.nome AS cliente, SUM(r.vendas) AS vendas,
+               SUM(r.valor_total) AS valor_total
+        FROM resumo_venda_cliente r
+        JOIN cliente c ON c.id_cliente = r.id_cliente
+        WHERE r.dia BETWEEN %s AND %s
+        GROUP BY r.id_cliente, c.nome
+        HAVING SUM(r.vendas) > 0
+        ORDER BY valor_total DESC
+    """
+    if limite is not None:
+        return fetchall(sql + " LIMIT %s", (data_inicio, data_fim, limite))
+    return fetchall(sql, (data_inicio, data_fim))
+
+def totais_vendas_cliente(id_cliente):
+    """Número de vendas e valor total de um cliente (todas as datas)."""
+    return fetchone("""
+        SELECT COALESCE(SUM(vendas), 0) AS vendas, COALESCE(SUM(valor_total), 0) AS valor_total
+        FROM resumo_venda_cliente WHERE id_cliente = %s
+    """, (id_cliente,))
+
+def totais_vendas_produto(id_produto):
+    """Vendas, quantidade e valor vendido de um produto (todas as datas)."""
+    return fetchone("""
+        SELECT COALESCE(SUM(vendas), 0) AS vendas, COALESCE(SUM(quantidade), 0) AS quantidade,
+               COALESCE(SUM(valor_total), 0) AS valor_total
+        FROM resumo_venda_produto WHERE id_produto = %s
+    """, (id_produto,))
+
 
 # ---------------- PRODUTOS ----------------
-def listar_produtos():
-    return fetchall("""
+SQL_PRODUTOS = """
         SELECT p.id_produto, p.nome, p.categoria, p.preco, p.quantidade,
                f.nome AS fornecedor, p.estoque_minimo
         FROM produto p
         LEFT JOIN fornecedor f ON p.id_fornecedor=f.id_fornecedor
-        ORDER BY p.nome
-    """)
+    """
+
+def listar_produtos():
+    return fetchall(SQL_PRODUTOS + " ORDER BY p.nome", row_type=Produto)
+
+def paginar_produtos(tamanho=200, cursor=None):
+    """Uma página de :func:`listar_produtos` (ordem: nome, id). Retorna ``(linhas, cursor)``."""
+    return _paginar(SQL_PRODUTOS, [("p.nome", "nome"), ("p.id_produto", "id_produto")], tamanho, cursor,
+                    row_type=Produto)
+
+# Colunas da grade de produtos que podem ser ordenadas (nome da coluna -> expressão)
+ORDENS_PRODUTOS = {
+    "id_produto": "p.id_produto",
+    "nome": "p.nome",
+    "categoria": "COALESCE(p.categoria, '')",
+    "preco": "COALESCE(p.preco, 0)",
+    "quantidade": "p.quantidade",
+    "fornecedor": "COALESCE(f.nome, '')",
+    "estoque_minimo": "COALESCE(p.estoque_minimo, 0)",
+}
+
+def janela_produtos(ordem="nome", desc=False, offset=0, tamanho=200, apos=None):
+    """Trecho de :func:`listar_produtos` ordenado por ``ordem`` (chave de ORDENS_PRODUTOS)."""
+    return _janela(SQL_PRODUTOS, ORDENS_PRODUTOS[ordem], "p.id_produto", tamanho, offset, apos, desc,
+                   row_type=Produto)
+
+def contar_produtos():
+    return fetchone("SELECT COUNT(*) AS total FROM produto")["total"]
+
+def buscar_produtos_por_ids(ids):
+    """Produtos com os IDs dados (mesmas colunas de :func:`listar_produtos`)."""
+    return _por_ids(SQL_PRODUTOS, "p.id_produto", ids, row_type=Produto)
+
+def pesquisar_produtos(texto, limite=10):
+    """
+    Produtos cujo nome começa com ``texto``, por nome (usa idx_produto_nome).
+    Para a busca enquanto se digita, prefira :mod:`busca`, que acha
+    qualquer palavra do nome ou da categoria.
+    """
+    return fetchall(SQL_PRODUTOS + " WHERE p.nome LIKE %s ORDER BY p.nome LIMIT %s",
+                    (_prefixo_like(texto), limite), row_type=Produto)
+
+SQL_ESTOQUE = """
+        SELECT p.id_produto, p.nome, p.quantidade, p.estoque_minimo, p.deficit_estoque
+        FROM produto p
+    """
+
+SQL_ESTOQUE_BAIXO = SQL_ESTOQUE + " WHERE p.deficit_estoque >= 0 ORDER BY p.deficit_estoque DESC, p.id_produto"
+
+def listar_estoque_baixo(limite=None):
+    """
+    Produtos com ``quantidade <= estoque_minimo``, dos mais urgentes (maior
+    déficit) para os menos urgentes.
+
+    O filtro e a ordem usam a coluna gerada ``deficit_estoque`` e o índice
+    ``idx_produto_deficit`` (migração 0003): só as linhas em alerta são lidas.
+    """
+    if limite is not None:
+        return fetchall(SQL_ESTOQUE_BAIXO + " LIMIT %s", (limite,))
+    return fetchall(SQL_ESTOQUE_BAIXO)
+
+def buscar_estoque_por_ids(ids):
+    """Estoque dos produtos com os IDs dados (mesmas colunas de :func:`listar_estoque_baixo`)."""
+    return _por_ids(SQL_ESTOQUE, "p.id_produto", ids)
 
 def inserir_produto(nome, cat, preco, qtd, forn_id, estoque_min):
-    return execute("""INSERT INTO produto (nome,categoria,preco,quantidade,id_fornecedor,estoque_minimo)
-                      VALUES (%s,%s,%s,%s,%s,%s)""",
-                   (nome,cat,preco,qtd,forn_id,estoque_min))
+    with transaction():
+        id_produto = execute("""INSERT INTO produto (nome,categoria,preco,quantidade,id_fornecedor,estoque_minimo)
+                                VALUES (%s,%s,%s,%s,%s,%s)""",
+                             (nome,cat,preco,qtd,forn_id,estoque_min))
+        _registrar_alteracao("produto", [id_produto], "I")
+        return id_produto
+
+
+def _travar_produtos(uow, ids):
+    """
+    Trava (SELECT ... FOR UPDATE) todas as linhas de produto de uma vez.
+
+    As linhas são lidas em ordem de ``id_produto``, então vendas
+    concorrentes sempre travam os produtos na mesma ordem (sem deadlock).
+
+    Returns
+    -------
+    dict[int, dict]
+        ``id_produto`` -> ``{"id_produto", "quantidade", "nome"}``.
+    """
+    ids = sorted(set(ids))
+    marcadores = ",".join(["%s"] * len(ids))
+    rows = uow.fetchall(
+        f"""SELECT id_produto, quantidade, nome FROM produto
+            WHERE id_produto IN ({marcadores})
+            ORDER BY id_produto
+            FOR UPDATE""",
+        tuple(ids)
+    )
+    return {r["id_produto"]: r for r in rows}
 
 
-import mysql.connector
-from db import DB_CONFIG
+def _baixar_estoque(uow, quantidades):
+    """
+    Subtrai do estoque, num único UPDATE, as quantidades por produto.
 
-def inserir_venda(id_cliente, itens):
+    Parameters
+    ----------
+    quantidades : dict[int, int]
+        ``id_produto`` -> quantidade a subtrair.
+    """
+    ids = sorted(quantidades)
+    casos = " ".join(["WHEN %s THEN %s"] * len(ids))
+    marcadores = ",".join(["%s"] * len(ids))
+    params = [v for pid in ids for v in (pid, quantidades[pid])] + ids
+    uow.execute(
+        f"""UPDATE produto
+            SET quantidade = quantidade - CASE id_produto {casos} END
+            WHERE id_produto IN ({marcadores})""",
+        tuple(params)
+    )
+    _registrar_alteracao("produto", ids, "U")
+
+
+def normalizar_itens(itens):
+    """
+    Junta as linhas repetidas de uma venda antes de ir ao banco.
+
+    Linhas do mesmo produto com o mesmo preço viram uma só; com preços
+    diferentes continuam separadas (cada uma com seu preço), mas a
+    quantidade é somada por produto para a checagem e a baixa de estoque.
+
+    Parameters
+    ----------
+    itens : list[tuple]
+        Tuplas ``(id_produto, quantidade, preco_unitario)``.
+
+    Returns
+    -------
+    tuple[list[tuple], dict[int, int]]
+        ``(linhas, quantidades)``: itens sem repetição e a quantidade total
+        pedida de cada produto.
+    """
+    if not itens:
+        raise ValueError("A venda precisa ter ao menos um item.")
+
+    linhas = {}
+    quantidades = {}
+    for id_produto, qtd, preco in itens:
+        if qtd <= 0:
+            raise ValueError(f"Quantidade inválida para o produto {id_produto}: {qtd}.")
+        chave = (id_produto, preco)
+        linhas[chave] = linhas.get(chave, 0) + qtd
+        quantidades[id_produto] = quantidades.get(id_produto, 0) + qtd
+    return [(pid, qtd, preco) for (pid, preco), qtd in linhas.items()], quantidades
+
+
+def inserir_venda(id_cliente, itens, data_venda=None):
     """
     Insere uma nova venda com múltiplos produtos e atualiza o estoque.
-    Usa transação e SELECT ... FOR UPDATE para evitar concorrência.
+
+    Os itens são normalizados (ver :func:`normalizar_itens`), então cada
+    produto é travado, conferido e baixado uma única vez. Usa transação e um
+    único SELECT ... FOR UPDATE (ordenado por id) para travar todos os
+    produtos da venda, um INSERT com várias linhas para os itens e um único
+    UPDATE para baixar o estoque.
+
+    Parameters
+    ----------
+    id_cliente : int
+    itens : list[tuple]
+        Tuplas ``(id_produto, quantidade, preco_unitario)``.
+    data_venda : datetime, optional
+        Data da venda (padrão: agora, no relógio do servidor).
+
+    Returns
+    -------
+    int
+        ID da venda criada.
     """
-    conn = mysql.connector.connect(**DB_CONFIG)
-    try:
-        conn.start_transaction()
-        cur = conn.cursor(dictionary=True)
-
-        total = 0
-        # 🔒 Verifica estoque com bloqueio da linha
-        for id_produto, qtd, preco in itens:
-            cur.execute("SELECT quantidade, nome FROM produto WHERE id_produto = %s FOR UPDATE", (id_produto,))
-            row = cur.fetchone()
+    linhas, quantidades = normalizar_itens(itens)
+
+    with transaction() as uow:
+        # 🔒 Verifica estoque com bloqueio das linhas (uma leitura por produto)
+        estoque = _travar_produtos(uow, quantidades)
+
+        for id_produto, qtd in quantidades.items():
+            row = estoque.get(id_produto)
             if not row:
                 raise ValueError(f"Produto {id_produto} não encontrado.")
             if row["quantidade"] < qtd:
@@ -49,61 +601,219 @@ def inserir_venda(id_cliente, itens):
                     f"Estoque insuficiente para '{row['nome']}'. "
                     f"Disponível: {row['quantidade']}, solicitado: {qtd}."
                 )
-            total += qtd * preco
+        total = sum(qtd * preco for _, qtd, preco in linhas)
 
         # Cria a venda
-        cur.execute(
-            "INSERT INTO venda (id_cliente, valor_total, data_venda) VALUES (%s, %s, NOW())",
-            (id_cliente, total)
+        venda_id = uow.execute(
+            "INSERT INTO venda (id_cliente, valor_total, data_venda) VALUES (%s, %s, COALESCE(%s, NOW()))",
+            (id_cliente, total, data_venda)
         )
-        venda_id = cur.lastrowid
 
         # Insere itens e atualiza estoque
-        for id_produto, qtd, preco in itens:
-            subtotal = qtd * preco
-            cur.execute(
-                """INSERT INTO produto_venda (id_venda, id_produto, quantidade, preco_unitario, subtotal)
-                   VALUES (%s, %s, %s, %s, %s)""",
-                (venda_id, id_produto, qtd, preco, subtotal)
-            )
-            cur.execute(
-                "UPDATE produto SET quantidade = quantidade - %s WHERE id_produto = %s",
-                (qtd, id_produto)
-            )
-
-        conn.commit()
+        uow.executemany(
+            """INSERT INTO produto_venda (id_venda, id_produto, quantidade, preco_unitario, subtotal)
+               VALUES (%s, %s, %s, %s, %s)""",
+            [(venda_id, id_produto, qtd, preco, qtd * preco) for id_produto, qtd, preco in linhas]
+        )
+        _baixar_estoque(uow, quantidades)
+        ajustar_resumos(uow, [venda_id])
+        _registrar_alteracao("venda", [venda_id], "I")
+
         return venda_id
 
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        cur.close()
-        conn.close()
+
+_ids_consecutivos = None
+
+def _ids_multi_insert_consecutivos(uow):
+    """
+    Indica se um INSERT com várias linhas gera IDs consecutivos.
+
+    Só é garantido com ``innodb_autoinc_lock_mode`` 0 ou 1; no modo 2
+    (padrão do MySQL 8) as vendas são inseridas uma a uma.
+
+    Returns
+    -------
+    int or None
+        O ``auto_increment_increment`` quando os IDs são previsíveis.
+    """
+    global _ids_consecutivos
+    if _ids_consecutivos is None:
+        row = uow.fetchone(
+            "SELECT @@innodb_autoinc_lock_mode AS modo, @@auto_increment_increment AS passo"
+        )
+        _ids_consecutivos = row["passo"] if row and row["modo"] in (0, 1) else 0
+    return _ids_consecutivos or None
+
+
+def _inserir_cabecalhos_venda(uow, vendas):
+    """
+    Insere as linhas de ``venda`` de um lote e retorna seus IDs (na ordem).
+
+    Parameters
+    ----------
+    vendas : list[tuple]
+        ``(id_cliente, valor_total, data_venda ou None)``.
+    """
+    sql = "INSERT INTO venda (id_cliente, valor_total, data_venda) VALUES (%s, %s, COALESCE(%s, NOW()))"
+    passo = _ids_multi_insert_consecutivos(uow)
+    if passo:
+        uow.executemany(sql, vendas)
+        return [uow.lastrowid + i * passo for i in range(len(vendas))]
+    return [uow.execute(sql, v) for v in vendas]
+
+
+def _ingerir_lote(lote, resultado):
+    """
+    Grava um lote de vendas numa única transação.
+
+    Vendas inválidas (produto inexistente, estoque insuficiente, quantidade
+    inválida) são registradas em ``resultado.falhas`` sem abortar o lote.
+    Se o lote inteiro falhar no banco, as vendas são refeitas uma a uma
+    para isolar a que causou o erro.
+    """
+    normalizadas = []
+    for pos, venda in lote:
+        id_cliente, itens = venda[0], venda[1]
+        data_venda = venda[2] if len(venda) > 2 else None
+        try:
+            linhas, quantidades = normalizar_itens(itens)
+        except ValueError as e:
+            resultado.falhas.append((pos, str(e)))
+            continue
+        normalizadas.append((pos, id_cliente, data_venda, linhas, quantidades))
+    if not normalizadas:
+        return
+
+    aceitas = []
+    rejeitadas = []
+    ids = []
+    try:
+        with transaction() as uow:
+            ids_produto = {pid for *_, quantidades in normalizadas for pid in quantidades}
+            travados = _travar_produtos(uow, ids_produto)
+            estoque = {pid: r["quantidade"] for pid, r in travados.items()}
+
+            baixas = {}
+            for pos, id_cliente, data_venda, linhas, quantidades in normalizadas:
+                faltando = [pid for pid in quantidades if pid not in estoque]
+                if faltando:
+                    rejeitadas.append((pos, f"Produto {faltando[0]} não encontrado."))
+                    continue
+                sem_estoque = [pid for pid, q in quantidades.items() if estoque[pid] < q]
+                if sem_estoque:
+                    pid = sem_estoque[0]
+                    rejeitadas.append((pos, f"Estoque insuficiente para '{travados[pid]['nome']}'. "
+                                            f"Disponível: {estoque[pid]}, solicitado: {quantidades[pid]}."))
+                    continue
+                for pid, q in quantidades.items():
+                    estoque[pid] -= q
+                    baixas[pid] = baixas.get(pid, 0) + q
+                aceitas.append((pos, id_cliente, data_venda, linhas))
+
+            if aceitas:
+                ids = _inserir_cabecalhos_venda(uow, [
+                    (id_cliente, sum(q * p for _, q, p in linhas), data_venda)
+                    for _, id_cliente, data_venda, linhas in aceitas
+                ])
+                uow.executemany(
+                    """INSERT INTO produto_venda (id_venda, id_produto, quantidade, preco_unitario, subtotal)
+                       VALUES (%s, %s, %s, %s, %s)""",
+                    [(id_venda, pid, q, p, q * p)
+                     for id_venda, (_, _, _, linhas) in zip(ids, aceitas)
+                     for pid, q, p in linhas]
+                )
+                _baixar_estoque(uow, baixas)
+                ajustar_resumos(uow, ids)
+                _registrar_alteracao("venda", ids, "I")
+    except Exception:
+        # Erro do banco (ex.: cliente inexistente): isola venda por venda.
+        # As rejeições acima contavam o estoque das vendas aceitas do lote,
+        # desfeitas pelo rollback; inserir_venda confere tudo de novo.
+        for pos, id_cliente, data_venda, linhas, _ in normalizadas:
+            try:
+                resultado.inseridas.append((pos, inserir_venda(id_cliente, linhas, data_venda)))
+            except Exception as e:
+                resultado.falhas.append((pos, str(e)))
+    else:
+        resultado.inseridas.extend((a[0], id_venda) for a, id_venda in zip(aceitas, ids))
+        resultado.falhas.extend(rejeitadas)
+    resultado.lotes += 1
+
+
+def inserir_vendas_em_lote(vendas, tamanho_lote=500):
+    """
+    Importa muitas vendas agrupando-as em transações de ``tamanho_lote``.
+
+    Cada lote trava todos os seus produtos de uma vez, insere as vendas e os
+    itens com INSERTs de várias linhas e baixa o estoque num único UPDATE.
+    Uma venda com problema (ex.: estoque insuficiente) é registrada como
+    falha e as demais do lote seguem normalmente.
+
+    Parameters
+    ----------
+    vendas : iterable
+        Tuplas ``(id_cliente, itens)`` ou ``(id_cliente, itens, data_venda)``,
+        com ``itens`` no mesmo formato de :func:`inserir_venda`. Pode ser um
+        gerador: só um lote fica em memória.
+    tamanho_lote : int, default=500
+        Quantidade de vendas por transação. Cai pela metade a cada lote
+        que leva mais de um quarto de ``MARGEM_ALTERACOES``, para as
+        transações não forçarem recargas completas nas grades.
+
+    Returns
+    -------
+    models.ResultadoIngestao
+        IDs inseridos e falhas (com a posição da venda na entrada), lotes e
+        vendas por segundo.
+    """
+    resultado = ResultadoIngestao()
+    inicio = time.perf_counter()
+    lote = []
+    for pos, venda in enumerate(vendas):
+        lote.append((pos, venda))
+        if len(lote) >= tamanho_lote:
+            inicio_lote = time.perf_counter()
+            _ingerir_lote(lote, resultado)
+            if time.perf_counter() - inicio_lote > MARGEM_ALTERACOES / 4:
+                tamanho_lote = max(1, tamanho_lote // 2)
+            lote = []
+    if lote:
+        _ingerir_lote(lote, resultado)
+    resultado.duracao = time.perf_counter() - inicio
+    return resultado
 
    
 def atualizar_quantidade_produto(id_produto, qtd_extra):
     """
     Incrementa a quantidade de um produto já existente no estoque.
     """
-    return execute(
-        "UPDATE produto SET quantidade = quantidade + %s WHERE id_produto = %s",
-        (qtd_extra, id_produto)
-    )
+    with transaction():
+        _registrar_alteracao("produto", [id_produto], "U")
+        return execute(
+            "UPDATE produto SET quantidade = quantidade + %s WHERE id_produto = %s",
+            (qtd_extra, id_produto)
+        )
 
 
 def excluir_produto(pid):
-    execute("DELETE FROM produto WHERE id_produto=%s", (pid,))
+    with transaction():
+        execute("DELETE FROM produto WHERE id_produto=%s", (pid,))
+        _registrar_alteracao("produto", [pid], "D")
 
 def entrada_produto(pid, qtd, preco_compra):
-    execute("INSERT INTO entrada_produto (id_produto,quantidade,preco_compra) VALUES (%s,%s,%s)",
-            (pid,qtd,preco_compra))
-    execute("UPDATE produto SET quantidade=quantidade+%s WHERE id_produto=%s", (qtd,pid))
+    """
+    Registra a entrada de mercadoria e soma a quantidade ao estoque
+    (uma única transação).
+    """
+    with transaction():
+        execute("INSERT INTO entrada_produto (id_produto,quantidade,preco_compra) VALUES (%s,%s,%s)",
+                (pid,qtd,preco_compra))
+        execute("UPDATE produto SET quantidade=quantidade+%s WHERE id_produto=%s", (qtd,pid))
+        _registrar_alteracao("produto", [pid], "U")
 
 
 # ---------------- CLIENTES ----------------
-def listar_clientes():
-    sql = """
+SQL_CLIENTES = """
         SELECT cl.id_cliente, cl.nome, cl.telefone, cl.email,
                e.rua, e.numero, e.bairro, e.cep,
                c.nome AS cidade, est.sigla AS estado
@@ -112,19 +822,59 @@ def listar_clientes():
         JOIN cidade c ON e.id_cidade = c.id_cidade
         JOIN estado est ON c.id_estado = est.id_estado
     """
-    return fetchall(sql)
+
+def listar_clientes():
+    return fetchall(SQL_CLIENTES, row_type=Cliente)
+
+def paginar_clientes(tamanho=200, cursor=None):
+    """Uma página de :func:`listar_clientes` (ordem: id). Retorna ``(linhas, cursor)``."""
+    return _paginar(SQL_CLIENTES, [("cl.id_cliente", "id_cliente")], tamanho, cursor, row_type=Cliente)
+
+def pesquisar_clientes(texto, limite=10):
+    """Clientes cujo nome começa com ``texto``, por nome (usa idx_cliente_nome)."""
+    return fetchall(SQL_CLIENTES + " WHERE cl.nome LIKE %s ORDER BY cl.nome LIMIT %s",
+                    (_prefixo_like(texto), limite), row_type=Cliente)
+
+def buscar_clientes_por_ids(ids):
+    """Clientes com os IDs dados (mesmas colunas de :func:`listar_clientes`)."""
+    return _por_ids(SQL_CLIENTES, "cl.id_cliente", ids, row_type=Cliente)
 
 def inserir_cliente(nome,tel,email,id_endereco=None):
-    return execute("INSERT INTO cliente (nome,telefone,email,id_endereco) VALUES (%s,%s,%s,%s)",
-                   (nome,tel,email,id_endereco))
+    with transaction():
+        id_cliente = execute("INSERT INTO cliente (nome,telefone,email,id_endereco) VALUES (%s,%s,%s,%s)",
+                             (nome,tel,email,id_endereco))
+        _registrar_alteracao("cliente", [id_cliente], "I")
+        return id_cliente
+
+def cadastrar_cliente(nome, tel, email, endereco=None):
+    """
+    Cria o endereço (e a cidade, se preciso) e o cliente numa única transação.
+    """
+    with transaction():
+        return inserir_cliente(nome, tel, email, salvar_endereco(endereco))
+
+def editar_cliente(id_cliente, nome, tel, email, endereco=None):
+    """
+    Grava o novo endereço (se houver) e atualiza o cliente numa única transação.
+    """
+    with transaction():
+        return atualizar_cliente(id_cliente, nome, tel, email, salvar_endereco(endereco))
+
+def _registrar_exclusao_cliente(id_cliente):
+    # as vendas do cliente ficam com id_cliente NULL e saem da listagem
+    _registrar_alteracao_consulta("venda", "U", "id_venda", "FROM venda WHERE id_cliente = %s", (id_cliente,))
+    _registrar_alteracao("cliente", [id_cliente], "D")
+    # e deixam de contar no resumo por cliente (os totais por dia ficam)
+    execute("DELETE FROM resumo_venda_cliente WHERE id_cliente = %s", (id_cliente,))
 
 def excluir_cliente(cid):
-    execute("DELETE FROM cliente WHERE id_cliente=%s",(cid,))
+    with transaction():
+        _registrar_exclusao_cliente(cid)
+        execute("DELETE FROM cliente WHERE id_cliente=%s",(cid,))
 
 
 # ---------------- FORNECEDORES ----------------
-def listar_fornecedores():
-    sql = """
+SQL_FORNECEDORES = """
         SELECT f.id_fornecedor, f.nome, f.telefone, f.email,
                e.rua, e.numero, e.bairro, e.cep,
                c.nome AS cidade, est.sigla AS estado
@@ -133,51 +883,109 @@ def listar_fornecedores():
         JOIN cidade c ON e.id_cidade = c.id_cidade
         JOIN estado est ON c.id_estado = est.id_estado
     """
-    return fetchall(sql)
+
+def listar_fornecedores():
+    """Todos os fornecedores com endereço (em cache, ver :data:`_cache_fornecedores`)."""
+    return _cache_fornecedores.get("todos", lambda: fetchall(SQL_FORNECEDORES, row_type=Fornecedor))
+
+def mapa_fornecedores():
+    """Dicionário ``nome -> id_fornecedor`` (em cache)."""
+    return _cache_fornecedores.get(
+        "mapa", lambda: {f["nome"]: f["id_fornecedor"] for f in listar_fornecedores()})
+
+def paginar_fornecedores(tamanho=200, cursor=None):
+    """Uma página de :func:`listar_fornecedores` (ordem: id). Retorna ``(linhas, cursor)``."""
+    return _paginar(SQL_FORNECEDORES, [("f.id_fornecedor", "id_fornecedor")], tamanho, cursor,
+                    row_type=Fornecedor)
+
+def buscar_fornecedores_por_ids(ids):
+    """Fornecedores com os IDs dados (mesmas colunas de :func:`listar_fornecedores`)."""
+    return _por_ids(SQL_FORNECEDORES, "f.id_fornecedor", ids, row_type=Fornecedor)
 
 def inserir_fornecedor(nome,tel,email,id_endereco=None):
-    return execute("INSERT INTO fornecedor (nome,telefone,email,id_endereco) VALUES (%s,%s,%s,%s)",
-                   (nome,tel,email,id_endereco))
+    with transaction():
+        _invalidar(_cache_fornecedores)
+        id_fornecedor = execute("INSERT INTO fornecedor (nome,telefone,email,id_endereco) VALUES (%s,%s,%s,%s)",
+                                (nome,tel,email,id_endereco))
+        _registrar_alteracao("fornecedor", [id_fornecedor], "I")
+        return id_fornecedor
+
+def cadastrar_fornecedor(nome, tel, email, endereco=None):
+    """
+    Cria o endereço (e a cidade, se preciso) e o fornecedor numa única transação.
+    """
+    with transaction():
+        return inserir_fornecedor(nome, tel, email, salvar_endereco(endereco))
+
+def editar_fornecedor(id_fornecedor, nome, tel, email, endereco=None):
+    """
+    Grava o novo endereço (se houver) e atualiza o fornecedor numa única transação.
+    """
+    with transaction():
+        return atualizar_fornecedor(id_fornecedor, nome, tel, email, salvar_endereco(endereco))
+
+def _registrar_fornecedor_produtos(id_fornecedor, operacao):
+    # a listagem de produtos mostra o nome do fornecedor
+    _registrar_alteracao_consulta("produto", "U", "id_produto", "FROM produto WHERE id_fornecedor = %s",
+                                  (id_fornecedor,))
+    _registrar_alteracao("fornecedor", [id_fornecedor], operacao)
 
 def excluir_fornecedor(fid):
-    execute("DELETE FROM fornecedor WHERE id_fornecedor=%s",(fid,))
+    with transaction():
+        _invalidar(_cache_fornecedores)
+        _registrar_fornecedor_produtos(fid, "D")
+        execute("DELETE FROM fornecedor WHERE id_fornecedor=%s",(fid,))
 
 
 # ---------------- VENDAS ----------------
-def registrar_venda(cliente_id, itens):
-    conn = None
-    import mysql.connector
-    try:
-        conn = mysql.connector.connect(**{
-            "host":"localhost","user":"seu_usuario","password":"sua_senha","database":"distribuidora"
-        })
-        cur = conn.cursor()
-        valor_total = sum(it['subtotal'] for it in itens)
-        cur.execute("INSERT INTO venda (id_cliente,data_venda,valor_total) VALUES (%s,%s,%s)",
-                    (cliente_id, datetime.now(), valor_total))
-        id_venda = cur.lastrowid
-        for it in itens:
-            cur.execute("""INSERT INTO produto_venda (id_venda,id_produto,quantidade,preco_unitario,subtotal)
-                           VALUES (%s,%s,%s,%s,%s)""",
-                        (id_venda,it['id_produto'],it['quantidade'],it['preco_unit'],it['subtotal']))
-            cur.execute("UPDATE produto SET quantidade=quantidade-%s WHERE id_produto=%s",
-                        (it['quantidade'], it['id_produto']))
-        conn.commit()
-        return id_venda
-    except Exception as e:
-        if conn: conn.rollback()
-        raise e
-    finally:
-        if conn: conn.close()
-
-def listar_vendas():
-    return fetchall("""
+SQL_VENDAS = """
         SELECT v.id_venda, v.id_cliente, c.nome AS cliente,
                v.valor_total, v.data_venda
         FROM venda v
         JOIN cliente c ON v.id_cliente = c.id_cliente
-        ORDER BY v.data_venda DESC
-    """)
+    """
+SQL_LISTAR_VENDAS = SQL_VENDAS + " ORDER BY v.data_venda DESC"
+
+def listar_vendas():
+    return fetchall(SQL_LISTAR_VENDAS, row_type=Venda)
+
+def paginar_vendas(tamanho=200, cursor=None):
+    """
+    Uma página de :func:`listar_vendas` (mais recentes primeiro, desempate
+    pelo id). Retorna ``(linhas, cursor)``.
+    """
+    return _paginar(SQL_VENDAS, [("v.data_venda", "data_venda"), ("v.id_venda", "id_venda")],
+                    tamanho, cursor, desc=True, row_type=Venda)
+
+ORDENS_VENDAS = {
+    "id_venda": "v.id_venda",
+    "id_cliente": "v.id_cliente",
+    "cliente": "c.nome",
+    "valor_total": "COALESCE(v.valor_total, 0)",
+    # sem COALESCE para usar idx_venda_data; inserir_venda sempre grava a data
+    "data_venda": "v.data_venda",
+}
+
+def janela_vendas(ordem="data_venda", desc=True, offset=0, tamanho=200, apos=None):
+    """Trecho de :func:`listar_vendas` ordenado por ``ordem`` (chave de ORDENS_VENDAS)."""
+    return _janela(SQL_VENDAS, ORDENS_VENDAS[ordem], "v.id_venda", tamanho, offset, apos, desc,
+                   row_type=Venda)
+
+def contar_vendas():
+    """Vendas que aparecem em :func:`listar_vendas` (com cliente)."""
+    return fetchone("""SELECT COUNT(*) AS total FROM venda v
+                       JOIN cliente c ON v.id_cliente = c.id_cliente""")["total"]
+
+def buscar_vendas_por_ids(ids):
+    """Vendas com os IDs dados (mesmas colunas de :func:`listar_vendas`)."""
+    return _por_ids(SQL_VENDAS, "v.id_venda", ids, row_type=Venda)
+
+def iterar_vendas(tamanho_lote=1000):
+    """
+    Versão em streaming de :func:`listar_vendas`: gera as vendas uma a uma
+    sem carregar a tabela inteira na memória.
+    """
+    return fetchiter(SQL_LISTAR_VENDAS, batch_size=tamanho_lote, row_type=Venda)
 
 
 def listar_itens_venda(id_venda):
@@ -197,22 +1005,84 @@ def listar_itens_venda(id_venda):
         WHERE pv.id_venda = %s
     """, (id_venda,))
 
+SQL_VENDAS_COM_ITENS = """
+        SELECT v.id_venda, v.id_cliente, c.nome AS cliente, v.valor_total, v.data_venda,
+               pv.id_produto, p.nome AS produto, pv.quantidade, pv.preco_unitario,
+               (pv.quantidade * pv.preco_unitario) AS subtotal
+        FROM venda v
+        JOIN cliente c ON v.id_cliente = c.id_cliente
+        LEFT JOIN produto_venda pv ON pv.id_venda = v.id_venda
+        LEFT JOIN produto p ON pv.id_produto = p.id_produto
+        ORDER BY v.data_venda DESC, v.id_venda DESC
+    """
+_COLUNAS_VENDA = ("id_venda", "id_cliente", "cliente", "valor_total", "data_venda")
+_COLUNAS_ITEM = ("id_produto", "produto", "quantidade", "preco_unitario", "subtotal")
+
+def iterar_vendas_com_itens(tamanho_lote=1000):
+    """
+    Vendas com os seus itens numa única consulta, das mais recentes para
+    as mais antigas (gerador).
+
+    Substitui :func:`listar_vendas` seguido de :func:`listar_itens_venda`
+    para cada venda (N+1 consultas). As linhas da junção chegam aos poucos
+    (:func:`db.fetchiter`) e são agrupadas por venda aqui.
+
+    Yields
+    ------
+    dict
+        Colunas de :func:`listar_vendas` mais ``itens``, a lista de itens
+        como em :func:`listar_itens_venda` (vazia se a venda não tem itens).
+    """
+    venda = None
+    for r in fetchiter(SQL_VENDAS_COM_ITENS, batch_size=tamanho_lote):
+        if venda is None or venda["id_venda"] != r["id_venda"]:
+            if venda is not None:
+                yield venda
+            venda = {k: r[k] for k in _COLUNAS_VENDA}
+            venda["itens"] = []
+        if r["id_produto"] is not None:
+            venda["itens"].append({k: r[k] for k in _COLUNAS_ITEM})
+    if venda is not None:
+        yield venda
+
+def listar_vendas_com_itens():
+    """Lista de :func:`iterar_vendas_com_itens`."""
+    return list(iterar_vendas_com_itens())
+
 
 def deletar_cliente(id_cliente):
     """Remove cliente pelo ID."""
-    return execute("DELETE FROM cliente WHERE id_cliente=%s", (id_cliente,))
+    with transaction():
+        _registrar_exclusao_cliente(id_cliente)
+        return execute("DELETE FROM cliente WHERE id_cliente=%s", (id_cliente,))
 
 def deletar_fornecedor(id_fornecedor):
     """Remove fornecedor pelo ID."""
-    return execute("DELETE FROM fornecedor WHERE id_fornecedor=%s", (id_fornecedor,))
+    with transaction():
+        _invalidar(_cache_fornecedores)
+        _registrar_fornecedor_produtos(id_fornecedor, "D")
+        return execute("DELETE FROM fornecedor WHERE id_fornecedor=%s", (id_fornecedor,))
 
 def deletar_produto(id_produto):
     """Remove produto pelo ID."""
-    return execute("DELETE FROM produto WHERE id_produto=%s", (id_produto,))
+    with transaction():
+        _registrar_alteracao("produto", [id_produto], "D")
+        return execute("DELETE FROM produto WHERE id_produto=%s", (id_produto,))
 
 def deletar_venda(id_venda):
     """Remove venda pelo ID."""
-    return execute("DELETE FROM venda WHERE id_venda=%s", (id_venda,))
+    return deletar_vendas([id_venda])
+
+def deletar_vendas(ids_venda):
+    """Remove várias vendas (e os seus itens) numa única transação."""
+    ids = list(ids_venda)
+    if not ids:
+        return 0
+    marcadores = ", ".join(["%s"] * len(ids))
+    with transaction() as uow:
+        ajustar_resumos(uow, ids, sinal=-1)
+        _registrar_alteracao("venda", ids, "D")
+        return execute(f"DELETE FROM venda WHERE id_venda IN ({marcadores})", tuple(ids))
 
 def get_preco_produto(id_produto):
     """
@@ -252,7 +1122,9 @@ def atualizar_produto(id_produto, nome=None, preco=None):
     else:
         return None  # nada a atualizar
     
-    return execute(query, params)
+    with transaction():
+        _registrar_alteracao("produto", [id_produto], "U")
+        return execute(query, params)
 
 def atualizar_produto(id_prod, nome, cat, preco, qtd, forn, est_min):
     """
@@ -261,7 +1133,9 @@ def atualizar_produto(id_prod, nome, cat, preco, qtd, forn, est_min):
     query = "UPDATE produto SET nome = %s, categoria=%s, preco = %s, quantidade = %s, id_fornecedor = %s, estoque_minimo = %s WHERE id_produto = %s"
     params = (nome, cat, preco, qtd, forn, est_min, id_prod)
     
-    return execute(query, params)
+    with transaction():
+        _registrar_alteracao("produto", [id_prod], "U")
+        return execute(query, params)
 
 def atualizar_cliente(id_cliente, nome=None, telefone=None, email=None, id_endereco=None):
     """
@@ -289,7 +1163,13 @@ def atualizar_cliente(id_cliente, nome=None, telefone=None, email=None, id_ender
 
     params.append(id_cliente)
     query = f"UPDATE cliente SET {', '.join(query_parts)} WHERE id_cliente = %s"
-    return execute(query, tuple(params))
+    with transaction():
+        _registrar_alteracao("cliente", [id_cliente], "U")
+        # a listagem de vendas mostra o nome do cliente
+        if nome is not None:
+            _registrar_alteracao_consulta("venda", "U", "id_venda", "FROM venda WHERE id_cliente = %s",
+                                          (id_cliente,))
+        return execute(query, tuple(params))
 
 def atualizar_fornecedor(id_fornecedor, nome=None, telefone=None, email=None, id_endereco=None):
     """
@@ -317,10 +1197,15 @@ def atualizar_fornecedor(id_fornecedor, nome=None, telefone=None, email=None, id
 
     params.append(id_fornecedor)
     query = f"UPDATE fornecedor SET {', '.join(query_parts)} WHERE id_fornecedor = %s"
-    return execute(query, tuple(params))
-
-def historico_vendas_por_cliente(id_cliente):
-    return fetchall("""
+    with transaction():
+        _invalidar(_cache_fornecedores)
+        if nome is not None:
+            _registrar_fornecedor_produtos(id_fornecedor, "U")
+        else:
+            _registrar_alteracao("fornecedor", [id_fornecedor], "U")
+        return execute(query, tuple(params))
+
+SQL_HISTORICO_VENDAS_POR_CLIENTE = """
         SELECT v.id_venda, v.data_venda, v.valor_total,
                p.nome AS produto, pv.quantidade, pv.preco_unitario, pv.subtotal
         FROM venda v
@@ -328,10 +1213,12 @@ def historico_vendas_por_cliente(id_cliente):
         JOIN produto p ON pv.id_produto = p.id_produto
         WHERE v.id_cliente = %s
         ORDER BY v.data_venda DESC
-    """, (id_cliente,))
+    """
 
-def historico_vendas_por_produto(id_produto):
-    return fetchall("""
+def historico_vendas_por_cliente(id_cliente):
+    return fetchall(SQL_HISTORICO_VENDAS_POR_CLIENTE, (id_cliente,))
+
+SQL_HISTORICO_VENDAS_POR_PRODUTO = """
         SELECT v.id_venda, v.data_venda, v.valor_total,
                c.nome AS cliente, pv.quantidade, pv.preco_unitario, pv.subtotal
         FROM venda v
@@ -339,23 +1226,62 @@ def historico_vendas_por_produto(id_produto):
         JOIN cliente c ON v.id_cliente = c.id_cliente
         WHERE pv.id_produto = %s
         ORDER BY v.data_venda DESC
-    """, (id_produto,))
+    """
 
-def historico_vendas_por_periodo(data_inicio, data_fim):
-    return fetchall("""
+def historico_vendas_por_produto(id_produto):
+    return fetchall(SQL_HISTORICO_VENDAS_POR_PRODUTO, (id_produto,))
+
+SQL_HISTORICO_VENDAS_POR_PERIODO = """
         SELECT v.id_venda, c.nome AS cliente, v.valor_total, v.data_venda
         FROM venda v
         JOIN cliente c ON v.id_cliente = c.id_cliente
-        WHERE v.data_venda BETWEEN %s AND %s
+        WHERE v.data_venda >= %s AND v.data_venda < %s + INTERVAL 1 DAY
         ORDER BY v.data_venda
-    """, (data_inicio, data_fim))
+    """
+
+def historico_vendas_por_periodo(data_inicio, data_fim):
+    """Vendas entre duas datas (dias inteiros, inclusive, como os resumos por dia)."""
+    return fetchall(SQL_HISTORICO_VENDAS_POR_PERIODO, (data_inicio, data_fim))
+
+def iterar_historico_vendas_por_periodo(data_inicio, data_fim, tamanho_lote=1000):
+    """
+    Versão em streaming de :func:`historico_vendas_por_periodo` (gerador),
+    para relatórios e exportações de períodos longos.
+    """
+    return fetchiter(SQL_HISTORICO_VENDAS_POR_PERIODO, (data_inicio, data_fim), batch_size=tamanho_lote)
+
+SQL_ITENS_VENDIDOS_POR_PERIODO = """
+        SELECT v.id_venda, v.data_venda, v.id_cliente, c.nome AS cliente,
+               pv.id_produto, p.nome AS produto, p.categoria,
+               pv.quantidade, pv.preco_unitario, pv.subtotal
+        FROM venda v
+        JOIN produto_venda pv ON pv.id_venda = v.id_venda
+        JOIN produto p ON p.id_produto = pv.id_produto
+        LEFT JOIN cliente c ON c.id_cliente = v.id_cliente
+        WHERE v.data_venda >= %s AND v.data_venda < %s + INTERVAL 1 DAY
+        ORDER BY v.data_venda, v.id_venda
+    """
+
+def iterar_itens_vendidos_por_periodo(data_inicio, data_fim, tamanho_lote=1000):
+    """
+    Itens vendidos entre duas datas (dias inteiros, inclusive), uma linha
+    por item com a venda, o cliente e o produto (gerador).
+    """
+    return fetchiter(SQL_ITENS_VENDIDOS_POR_PERIODO, (data_inicio, data_fim), batch_size=tamanho_lote)
 
 
 def listar_estados():
-    return fetchall("SELECT * FROM estado ORDER BY nome")
+    """Todos os estados, por nome (em cache)."""
+    return _cache_estados.get("todos", lambda: fetchall("SELECT * FROM estado ORDER BY nome"))
+
+def mapa_estados():
+    """Dicionário ``nome -> id_estado`` (em cache)."""
+    return _cache_estados.get("mapa", lambda: {e["nome"]: e["id_estado"] for e in listar_estados()})
 
 def inserir_estado(nome, sigla):
-    return execute("INSERT INTO estado (nome, sigla) VALUES (%s,%s)", (nome, sigla))
+    id_estado = execute("INSERT INTO estado (nome, sigla) VALUES (%s,%s)", (nome, sigla))
+    _invalidar(_cache_estados)
+    return id_estado
 
 def buscar_estado_por_nome(nome):
     """Retorna um estado pelo nome (ou None)."""
@@ -374,15 +1300,19 @@ def get_or_create_estado(nome, sigla=None):
     if not sigla:
         raise ValueError("Sigla é obrigatória para criar novo estado.")
     
-    id_estado = execute("INSERT INTO estado (nome, sigla) VALUES (%s, %s)", (nome, sigla))
+    id_estado = inserir_estado(nome, sigla)
     return id_estado, sigla
 
 
 def listar_cidades(id_estado):
-    return fetchall("SELECT * FROM cidade WHERE id_estado=%s ORDER BY nome", (id_estado,))
+    """Cidades de um estado, por nome (em cache por estado)."""
+    return _cache_cidades.get(id_estado, lambda: fetchall(
+        "SELECT * FROM cidade WHERE id_estado=%s ORDER BY nome", (id_estado,)))
 
-def inserir_cidade(nome, id_estado):
-    return execute("INSERT INTO cidade (nome, id_estado) VALUES (%s,%s)", (nome, id_estado))
+def mapa_cidades(id_estado):
+    """Dicionário ``nome -> id_cidade`` das cidades de um estado (em cache)."""
+    return _cache_cidades.get(
+        ("mapa", id_estado), lambda: {c["nome"]: c["id_cidade"] for c in listar_cidades(id_estado)})
 
 def listar_enderecos(id_cidade):
     return fetchall("SELECT * FROM endereco WHERE id_cidade=%s ORDER BY rua, numero", (id_cidade,))
@@ -393,11 +1323,38 @@ def inserir_endereco(rua, numero, bairro, cep, id_cidade):
         (rua, numero, bairro, cep, id_cidade)
     )
 
+def salvar_endereco(endereco):
+    """
+    Grava um endereço vindo do PessoaDialog, criando a cidade se ela ainda
+    não existir.
+
+    Parameters
+    ----------
+    endereco : dict or None
+        Chaves ``rua``, ``numero``, ``bairro``, ``cep``, ``id_estado``,
+        ``cidade`` e ``id_cidade`` (``None`` para cidade nova).
+
+    Returns
+    -------
+    int or None
+        ID do endereço criado.
+    """
+    if not endereco:
+        return None
+    with transaction():
+        id_cidade = endereco.get("id_cidade")
+        if id_cidade is None:
+            id_cidade = inserir_cidade(endereco["cidade"], endereco["id_estado"])
+        return inserir_endereco(endereco["rua"], endereco["numero"], endereco["bairro"],
+                                endereco["cep"], id_cidade)
+
 def buscar_cidade_por_nome(nome):
     return fetchone("SELECT * FROM cidade WHERE nome = %s", (nome,))
 
 def inserir_cidade(nome, id_estado):
-    return execute("INSERT INTO cidade (nome, id_estado) VALUES (%s, %s)", (nome, id_estado))
+    id_cidade = execute("INSERT INTO cidade (nome, id_estado) VALUES (%s, %s)", (nome, id_estado))
+    _invalidar(_cache_cidades)
+    return id_cidade
 
 def buscar_endereco(id_endereco):
     sql = """
@@ -417,7 +1374,13 @@ def atualizar_endereco(id_endereco, rua, numero, bairro, cep, id_cidade):
         SET rua=%s, numero=%s, bairro=%s, cep=%s, id_cidade=%s
         WHERE id_endereco=%s
     """
-    execute(sql, (rua, numero, bairro, cep, id_cidade, id_endereco))
+    # as listagens de clientes e fornecedores (e o cache) mostram o endereço
+    with transaction():
+        _invalidar(_cache_fornecedores)
+        execute(sql, (rua, numero, bairro, cep, id_cidade, id_endereco))
+        for tabela in ("cliente", "fornecedor"):
+            _registrar_alteracao_consulta(tabela, "U", f"id_{tabela}",
+                                          f"FROM {tabela} WHERE id_endereco = %s", (id_endereco,))
 
 def buscar_cliente(cid):
     return fetchone("""
@@ -0,0 +1,79 @@
+# Reconstrução dos resumos de vendas
+
+"""
+Módulo resumos
+--------------
+Recalcula as tabelas de resumo de vendas (por dia, por dia x produto e
+por dia x cliente) a partir das vendas gravadas.
+
+O sistema mantém os resumos sozinho a cada venda inserida ou apagada;
+rode este comando depois de aplicar a migração 0004, de importar vendas
+direto no banco ou se suspeitar de divergência (``--conferir``).
+
+Uso:
+
+    python resumos.py                                  # refaz tudo
+    python resumos.py --inicio 2025-01-01 --fim 2025-01-31
+    python resumos.py --conferir                       # só compara
+"""
+
+import argparse
+import time
+
+import db
+import repository as repo
+
+
+def conferir():
+    """
+    Compara o resumo diário com as vendas.
+
+    Returns
+    -------
+    list[dict]
+        Dias em que o resumo difere (vazio se está tudo certo).
+    """
+    return db.fetchall("""
+        SELECT COALESCE(v.dia, r.dia) AS dia,
+               COALESCE(v.vendas, 0) AS vendas, COALESCE(r.vendas, 0) AS vendas_resumo,
+               COALESCE(v.valor_total, 0) AS valor_total, COALESCE(r.valor_total, 0) AS valor_resumo
+        FROM (SELECT DATE(data_venda) AS dia, COUNT(*) AS vendas,
+                     SUM(COALESCE(valor_total, 0)) AS valor_total
+              FROM venda WHERE data_venda IS NOT NULL
+              GROUP BY DATE(data_venda)) v
+        LEFT JOIN resumo_venda_dia r ON r.dia = v.dia
+        WHERE r.dia IS NULL OR r.vendas <> v.vendas OR r.valor_total <> v.valor_total
+        UNION ALL
+        SELECT r.dia, 0, r.vendas, 0, r.valor_total
+        FROM resumo_venda_dia r
+        WHERE r.vendas <> 0
+          AND NOT EXISTS (SELECT 1 FROM venda WHERE data_venda >= r.dia
+                                                AND data_venda < r.dia + INTERVAL 1 DAY)
+        ORDER BY dia
+    """)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recalcula os resumos de vendas.")
+    parser.add_argument("--inicio", help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--fim", help="último dia (AAAA-MM-DD)")
+    parser.add_argument("--conferir", action="store_true", help="só compara o resumo diário com as vendas")
+    args = parser.parse_args(argv)
+
+    if args.conferir:
+        divergentes = conferir()
+        for d in divergentes:
+            print(f"{d['dia']}  vendas {d['vendas']} (resumo {d['vendas_resumo']})  "
+                  f"total {d['valor_total']} (resumo {d['valor_resumo']})")
+        print(f"{len(divergentes)} dia(s) divergente(s).")
+        return
+    if (args.inicio is None) != (args.fim is None):
+        parser.error("informe --inicio e --fim juntos")
+
+    inicio = time.perf_counter()
+    repo.reconstruir_resumos(args.inicio, args.fim)
+    print(f"Resumos recalculados em {time.perf_counter() - inicio:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Configuração dos testes.
+
+Os módulos do sistema ficam na pasta de cima (o programa roda de lá, sem
+pacote); os testes não precisam de MySQL: as conexões são falsas.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class CursorFalso:
+    def __init__(self, conexao, prepared=False, dictionary=False):
+        self.conexao = conexao
+        self.prepared = prepared
+        self.dictionary = dictionary
+        self.fechado = False
+
+    def close(self):
+        self.fechado = True
+
+
+class ConexaoFalsa:
+    """Só o que o pool usa de uma conexão do mysql.connector."""
+
+    def __init__(self):
+        self.in_transaction = False
+        self.viva = True
+        self.fechada = False
+        self.rollbacks = 0
+        self.commits = 0
+        self.resets = 0
+        self.cursores = []
+        self.falhar_rollback = False
+
+    def ping(self, reconnect=False):
+        if not self.viva:
+            raise OSError("conexão perdida")
+
+    def cursor(self, prepared=False, dictionary=False, **kwargs):
+        cur = CursorFalso(self, prepared, dictionary)
+        self.cursores.append(cur)
+        return cur
+
+    def start_transaction(self):
+        self.in_transaction = True
+
+    def commit(self):
+        self.commits += 1
+        self.in_transaction = False
+
+    def rollback(self):
+        self.rollbacks += 1
+        if self.falhar_rollback:
+            raise OSError("conexão perdida no rollback")
+        self.in_transaction = False
+
+    def reset_session(self):
+        self.resets += 1
+
+    def close(self):
+        self.fechada = True
+
+
+@pytest.fixture
+def conector(monkeypatch):
+    """Troca ``mysql.connector.connect`` por conexões falsas; devolve a lista delas."""
+    import db
+    criadas = []
+
+    def connect(**config):
+        conn = ConexaoFalsa()
+        criadas.append(conn)
+        return conn
+
+    monkeypatch.setattr(db.mysql.connector, "connect", connect)
+    return criadas
+
+
+@pytest.fixture
+def pool(conector, monkeypatch):
+    """Pool de conexões falsas usado por ``db.get_conn`` (e ``db.transaction``)."""
+    import db
+    pool = db.ConnectionPool({}, size=1, max_overflow=0, reset_session=False)
+    monkeypatch.setattr(db, "_pool", pool)
+    return pool
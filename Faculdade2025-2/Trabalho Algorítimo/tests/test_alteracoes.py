@@ -0,0 +1,60 @@
+import repository
+
+
+def _feed(monkeypatch, rows, versao_atual=99):
+    monkeypatch.setattr(repository, "fetchall", lambda sql, params=None, **kw: rows)
+    monkeypatch.setattr(repository, "versao_alteracoes", lambda: versao_atual)
+
+
+def test_versao_para_na_primeira_alteracao_recente(monkeypatch):
+    _feed(monkeypatch, [
+        {"versao": 5, "id_registro": 1, "operacao": "I", "assentada": 1},
+        {"versao": 6, "id_registro": 2, "operacao": "U", "assentada": 0},
+        {"versao": 7, "id_registro": 1, "operacao": "U", "assentada": 1},
+    ])
+    alteracoes, versao = repository.alteracoes_desde("produto", 4)
+    assert alteracoes == {1: "U", 2: "U"}
+    assert versao == 5
+
+
+def test_marca_de_recarga_pede_recarga_completa(monkeypatch):
+    _feed(monkeypatch, [
+        {"versao": 5, "id_registro": 1, "operacao": "I", "assentada": 1},
+        {"versao": 6, "id_registro": 0, "operacao": "R", "assentada": 1},
+    ])
+    assert repository.alteracoes_desde("produto", 4) == (None, 99)
+
+
+class TransacaoFalsa:
+    def __init__(self, iniciada):
+        self.iniciada = iniciada
+        self.info = {}
+        self.antes_commit = []
+        self.gravadas = []
+
+    def before_commit(self, callback):
+        self.antes_commit.append(callback)
+
+    def executemany(self, sql, linhas):
+        self.gravadas.extend(linhas)
+
+    def commit(self):
+        for callback in self.antes_commit:
+            callback()
+
+
+def test_transacao_longa_grava_recarga_uma_vez_por_tabela(monkeypatch):
+    monkeypatch.setattr(repository.time, "perf_counter", lambda: 1000.0)
+    uow = TransacaoFalsa(iniciada=1000.0 - repository.MARGEM_ALTERACOES)
+    for tabela in ("venda", "produto", "venda"):
+        repository._vigiar_transacao(uow, tabela)
+    uow.commit()
+    assert uow.gravadas == [("produto", 0, "R"), ("venda", 0, "R")]
+
+
+def test_transacao_curta_nao_grava_recarga(monkeypatch):
+    monkeypatch.setattr(repository.time, "perf_counter", lambda: 1000.0)
+    uow = TransacaoFalsa(iniciada=999.0)
+    repository._vigiar_transacao(uow, "venda")
+    uow.commit()
+    assert uow.gravadas == []
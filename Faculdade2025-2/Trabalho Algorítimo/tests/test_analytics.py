@@ -0,0 +1,87 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import analytics
+
+PRODUTOS = [
+    {"id_produto": 1, "nome": "Arroz", "categoria": "Grãos"},
+    {"id_produto": 2, "nome": "Feijão", "categoria": "Grãos"},
+    {"id_produto": 3, "nome": "Sabão", "categoria": None},
+    {"id_produto": 4, "nome": "Óleo", "categoria": "Mercearia"},
+]
+
+
+def _segundos(*data):
+    return int((datetime(*data) - datetime(1970, 1, 1)).total_seconds())
+
+
+def _base(itens, produtos=PRODUTOS):
+    """``itens``: (id_venda, id_cliente, id_produto, quantidade, centavos, data)."""
+    colunas = {}
+    for (nome, tipo), valores in zip(analytics._COLUNAS, zip(*itens) if itens else [()] * 6):
+        if tipo.startswith("datetime64"):
+            colunas[nome] = np.array(valores, dtype="int64").astype(tipo)
+        else:
+            colunas[nome] = np.array(valores, dtype=tipo)
+    return analytics.VendasColunares(colunas, produtos)
+
+
+ITENS = [
+    (1, 10, 1, 2, 7000, _segundos(2025, 1, 1, 9)),
+    (1, 10, 2, 1, 2000, _segundos(2025, 1, 1, 9)),
+    (2, 11, 3, 1, 500, _segundos(2025, 1, 3, 18)),
+    (3, 0, 9, 1, 500, _segundos(2025, 2, 1)),      # produto excluído, cliente excluído
+]
+
+
+def test_receitas_agrupadas():
+    base = _base(ITENS)
+    assert len(base) == 4
+    assert base.receita_por_periodo("M") == [
+        {"periodo": "2025-01", "receita": Decimal("95.00"), "quantidade": 4},
+        {"periodo": "2025-02", "receita": Decimal("5.00"), "quantidade": 1},
+    ]
+    assert base.receita_por_categoria() == [
+        {"categoria": "Grãos", "receita": Decimal("90.00")},
+        {"categoria": "(sem categoria)", "receita": Decimal("10.00")},
+    ]
+    assert base.receita_por_cliente(1) == [{"id_cliente": 10, "receita": Decimal("90.00")}]
+    assert base.top_produtos(1) == [{"id_produto": 1, "produto": "Arroz", "quantidade": 2,
+                                     "receita": Decimal("70.00")}]
+
+
+def test_curva_abc_produto_que_cruza_o_limite_fica_na_classe():
+    base = _base(ITENS)
+    # participação acumulada antes de cada produto: 1 -> 0, 2 -> 0.70, 3 -> 0.90, 9 -> 0.95
+    assert base.curva_abc() == {"A": [1, 2], "B": [3], "C": [9]}
+    assert base.curva_abc(limite_a=0.5, limite_b=0.8) == {"A": [1], "B": [2], "C": [3, 9]}
+
+
+def test_media_movel_conta_dias_sem_venda_como_zero():
+    base = _base(ITENS[:3])
+    assert base.media_movel(janela=2) == [
+        {"dia": "2025-01-02", "receita": Decimal("0.00"), "media": Decimal("45.00")},
+        {"dia": "2025-01-03", "receita": Decimal("5.00"), "media": Decimal("2.50")},
+    ]
+    assert base.media_movel(janela=4) == []
+
+
+def test_base_vazia():
+    base = _base([])
+    assert len(base) == 0
+    assert base.curva_abc() == {"A": [], "B": [], "C": []}
+    assert base.media_movel() == []
+    assert base.receita_por_categoria() == []
+
+
+def test_carregar_base_junta_os_blocos(monkeypatch):
+    monkeypatch.setattr(analytics, "fetchiter", lambda sql, params, **kw: iter(ITENS))
+    monkeypatch.setattr(analytics, "fetchall", lambda sql: PRODUTOS)
+    base = analytics.carregar_base(tamanho_lote=3)
+    assert base.id_venda.tolist() == [1, 1, 2, 3]
+    assert base.data[2] == np.datetime64("2025-01-03T18:00:00")
+    assert base.centavos.dtype == np.int64
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+import busca
+
+
+PRODUTOS = [
+    {"id_produto": 1, "nome": "Arroz Tipo 1", "categoria": "Grãos"},
+    {"id_produto": 2, "nome": "Arroz Integral", "categoria": "Grãos"},
+    {"id_produto": 3, "nome": "Feijão Carioca", "categoria": "Grãos"},
+    {"id_produto": 4, "nome": "Açúcar Cristal", "categoria": "Mercearia"},
+    {"id_produto": 5, "nome": "Café Torrado", "categoria": "Mercearia"},
+]
+
+
+@pytest.fixture
+def indice(monkeypatch):
+    linhas = {p["id_produto"]: dict(p) for p in PRODUTOS}
+    feed = {"versao": 1, "alteracoes": {}}
+    monkeypatch.setattr(busca.repo, "versao_alteracoes", lambda: feed["versao"])
+    monkeypatch.setattr(busca.repo, "alteracoes_desde",
+                        lambda tabela, versao: (feed["alteracoes"], feed["versao"]))
+    ix = busca.IndiceBusca("produto", "id_produto", ("nome", "categoria"),
+                           lambda: list(linhas.values()),
+                           lambda ids: [linhas[i] for i in ids if i in linhas])
+    ix.linhas_banco, ix.feed = linhas, feed
+    ix.carregar()
+    return ix
+
+
+def ids(linhas):
+    return [r["id_produto"] for r in linhas]
+
+
+def test_prefixo_de_todas_as_palavras(indice):
+    assert ids(indice.buscar("arr tip", limite=1)) == [1]
+    # nomes que começam com o texto primeiro, em ordem alfabética
+    assert ids(indice.buscar("arroz"))[:2] == [2, 1]
+
+
+def test_ignora_acentos_e_maiusculas(indice):
+    assert ids(indice.buscar("ACUCAR"))[0] == 4
+    assert ids(indice.buscar("feijao"))[0] == 3
+
+
+def test_busca_pela_categoria(indice):
+    assert set(ids(indice.buscar("mercearia"))) == {4, 5}
+
+
+def test_trigramas_acham_erro_de_digitacao(indice):
+    assert 5 in ids(indice.buscar("cafe torado"))
+
+
+def test_respeita_limite(indice):
+    assert len(indice.buscar("graos", limite=2)) == 2
+
+
+def test_antes_de_carregar_usa_o_banco():
+    ix = busca.IndiceBusca("produto", "id_produto", ("nome",), list, list,
+                           pesquisar=lambda texto, limite: [{"id_produto": 9}])
+    assert not ix.carregado
+    assert ids(ix.buscar("x")) == [9]
+
+
+def test_atualizar_reindexa_so_o_que_mudou(indice):
+    indice.linhas_banco[1]["nome"] = "Macarrão Espaguete"
+    del indice.linhas_banco[3]
+    indice.feed.update(versao=2, alteracoes={1: "U", 3: "D"})
+    indice.atualizar()
+    assert ids(indice.buscar("macarrao", limite=1)) == [1]
+    assert ids(indice.buscar("arroz", limite=1)) == [2]
+    assert 3 not in ids(indice.buscar("feijao"))
+    assert indice.versao == 2
+
+
+def test_busca_nao_espera_a_carga_completa(indice):
+    liberar = threading.Event()
+    listando = threading.Event()
+
+    def listar_devagar():
+        listando.set()
+        liberar.wait(2)
+        return list(indice.linhas_banco.values())
+
+    indice.listar = listar_devagar
+    carga = threading.Thread(target=indice.carregar)
+    carga.start()
+    listando.wait(2)
+    # durante a carga a busca usa o índice anterior, sem bloquear
+    assert ids(indice.buscar("cafe", limite=1)) == [5]
+    liberar.set()
+    carga.join(2)
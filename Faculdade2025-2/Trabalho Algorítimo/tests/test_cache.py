@@ -0,0 +1,71 @@
+import repository
+from cache import CacheTTL
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_guarda_ate_expirar(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr("cache.time.monotonic", relogio)
+    c = CacheTTL("teste_ttl", ttl=10)
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        return len(cargas)
+
+    assert c.get("k", carregar) == 1
+    relogio.agora += 9
+    assert c.get("k", carregar) == 1
+    relogio.agora += 2
+    assert c.get("k", carregar) == 2
+    assert c.stats() == {"hits": 1, "misses": 2, "entradas": 1}
+
+
+def test_invalidar_uma_chave_ou_todas():
+    c = CacheTTL("teste_invalidar", ttl=60)
+    c.get("a", lambda: 1)
+    c.get("b", lambda: 2)
+    c.invalidar("a")
+    assert c.get("a", lambda: 10) == 10
+    assert c.get("b", lambda: 20) == 2
+    c.invalidar()
+    assert c.stats()["entradas"] == 0
+
+
+def test_invalidacao_durante_a_carga_nao_guarda_o_valor_velho():
+    c = CacheTTL("teste_geracao", ttl=60)
+
+    def carregar_e_ver_invalidacao():
+        c.invalidar()       # outra thread gravou enquanto esta lia
+        return "velho"
+
+    assert c.get("k", carregar_e_ver_invalidacao) == "velho"
+    assert c.get("k", lambda: "novo") == "novo"
+
+
+class TransacaoFalsa:
+    def __init__(self):
+        self.callbacks = []
+
+    def on_finish(self, callback):
+        self.callbacks.append(callback)
+
+
+def test_invalidar_na_transacao_repete_depois_do_commit(monkeypatch):
+    c = CacheTTL("teste_transacao", ttl=60)
+    uow = TransacaoFalsa()
+    monkeypatch.setattr(repository, "current_transaction", lambda: uow)
+    c.get("k", lambda: "antes")
+    repository._invalidar(c)
+    # outra thread recarrega antes do COMMIT
+    c.get("k", lambda: "pre-commit")
+    for callback in uow.callbacks:
+        callback()
+    assert c.get("k", lambda: "depois") == "depois"
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+
+from ui_grid import GradeVirtual
+
+
+class ExecutorFalso:
+    def __init__(self):
+        self.erros = []
+
+    def submit(self, funcao, *args, canal=None, substituir=False, ao_terminar=None, ao_falhar=None):
+        try:
+            resultado = funcao(*args)
+        except Exception as e:
+            ao_falhar(e)
+        else:
+            ao_terminar(resultado)
+
+    def mostrar_erro(self, erro):
+        self.erros.append(erro)
+
+
+def grade(blocos, ordem="nome"):
+    """GradeVirtual sem Treeview, só com o estado usado por _aplicar/_pedir."""
+    g = GradeVirtual.__new__(GradeVirtual)
+    g.chave = "id"
+    g.ordem = ordem
+    g.desc = False
+    g.bloco = 2
+    g.max_blocos = 20
+    g.total = 100
+    g.versao = 1
+    g.executor = ExecutorFalso()
+    g.canal = "teste"
+    g._geracao = 0
+    g._blocos = OrderedDict(blocos)
+    g._pedidos = set()
+    g.recargas = 0
+    g.renders = 0
+
+    def recarregar():
+        g.recargas += 1
+
+    def renderizar():
+        g.renders += 1
+
+    g.recarregar = recarregar
+    g._renderizar = renderizar
+    g._agendar_render = renderizar
+    return g
+
+
+def linha(id, nome, qtd=1):
+    return {"id": id, "nome": nome, "quantidade": qtd, "_ordem": nome}
+
+
+def test_alteracao_no_cache_troca_a_linha_sem_recontar():
+    g = grade({0: [linha(1, "b"), linha(2, "d")]})
+    g._aplicar(({1: "U"}, 2, {1: {"id": 1, "nome": "b", "quantidade": 9}}))
+    assert g._blocos[0][0]["quantidade"] == 9
+    assert g.recargas == 0 and g.versao == 2
+
+
+def test_alteracao_fora_do_cache_e_ignorada():
+    g = grade({0: [linha(1, "b"), linha(2, "d")]})
+    g._aplicar(({7: "U"}, 2, {7: {"id": 7, "nome": "x", "quantidade": 0}}))
+    assert g.recargas == 0
+    assert 0 in g._blocos
+
+
+def test_linha_que_entra_no_trecho_guardado_rele_os_blocos():
+    g = grade({0: [linha(1, "b"), linha(2, "d")]})
+    g._aplicar(({7: "U"}, 2, {7: {"id": 7, "nome": "c", "quantidade": 0}}))
+    assert g.recargas == 0
+    assert not g._blocos
+
+
+def test_insercao_e_remocao_recontam():
+    for op in ("I", "D"):
+        g = grade({0: [linha(1, "b")]})
+        g._aplicar(({5: op}, 2, {}))
+        assert g.recargas == 1
+
+
+def test_bloco_com_erro_pode_ser_pedido_de_novo():
+    g = grade({})
+    falhas = iter([RuntimeError("caiu"), None])
+
+    def buscar(**kwargs):
+        erro = next(falhas)
+        if erro:
+            raise erro
+        return [linha(1, "a"), linha(2, "b")]
+
+    g.buscar = buscar
+    g._pedir(0)
+    assert g._pedidos == set() and 0 not in g._blocos
+    assert len(g.executor.erros) == 1
+    g._pedir(0)
+    assert len(g._blocos[0]) == 2
@@ -0,0 +1,69 @@
+import random
+import time
+
+import pytest
+
+import instrumentation
+from instrumentation import Histogram
+
+
+@pytest.fixture
+def metricas(monkeypatch):
+    """Métricas zeradas; o estado global volta ao original depois."""
+    for nome in ("enabled", "slow_ms", "slow_log_path", "_slow_logger"):
+        monkeypatch.setattr(instrumentation, nome, getattr(instrumentation, nome))
+    instrumentation.reset()
+    yield instrumentation
+    instrumentation.reset()
+
+
+def test_histograma_vazio():
+    h = Histogram()
+    assert h.percentile(99) == 0.0
+    assert h.summary()["mean_ms"] == 0.0
+
+
+def test_percentis_com_erro_de_no_maximo_dez_por_cento():
+    gerador = random.Random(7)
+    valores = sorted(gerador.uniform(0.05, 500) for _ in range(5000))
+    h = Histogram()
+    for v in valores:
+        h.add(v)
+    for p in (50, 95, 99):
+        exato = valores[int(len(valores) * p / 100) - 1]
+        assert exato <= h.percentile(p) <= exato * Histogram.FATOR * 1.001
+    s = h.summary()
+    assert s["count"] == 5000
+    assert s["max_ms"] == valores[-1]
+    assert s["total_ms"] == pytest.approx(sum(valores))
+
+
+def test_percentil_nao_passa_do_maximo():
+    h = Histogram()
+    for v in (0.001, 3.0, 3.0):
+        h.add(v)
+    assert h.percentile(100) == 3.0
+    assert h.percentile(30) == Histogram.MINIMO
+
+
+def test_metricas_por_funcao_que_chamou(metricas):
+    inicio = time.perf_counter()
+    metricas.record_statement("SELECT 1", None, inicio, linhas=3)
+    metricas.record_statement("SELECT 1", None, inicio, linhas=2)
+    metricas.record_transaction(inicio)
+    dados = metricas.snapshot()
+    funcao = f"{__name__}.test_metricas_por_funcao_que_chamou"
+    assert dados["statements"][funcao]["count"] == 2
+    assert dados["statements"][funcao]["rows"] == 5
+    assert dados["transactions"][funcao]["count"] == 1
+    assert "[transação] " + funcao in metricas.report()
+
+
+def test_comando_lento_vai_para_o_log(metricas, tmp_path):
+    log = tmp_path / "lentas.log"
+    metricas.enable(slow_query_ms=0, log_path=str(log))
+    metricas.record_statement("SELECT *\n  FROM produto", (1,), time.perf_counter(), linhas=1)
+    for handler in metricas._slow_logger.handlers:
+        handler.close()
+    texto = log.read_text(encoding="utf-8")
+    assert "SELECT * FROM produto" in texto and "(1,)" in texto
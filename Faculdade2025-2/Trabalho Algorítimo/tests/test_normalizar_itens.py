@@ -0,0 +1,26 @@
+import pytest
+
+from repository import normalizar_itens
+
+
+def test_junta_linhas_do_mesmo_produto_e_preco():
+    linhas, quantidades = normalizar_itens([(1, 2, 10.0), (1, 3, 10.0), (2, 1, 5.0)])
+    assert sorted(linhas) == [(1, 5, 10.0), (2, 1, 5.0)]
+    assert quantidades == {1: 5, 2: 1}
+
+
+def test_precos_diferentes_ficam_separados_mas_somam_o_estoque():
+    linhas, quantidades = normalizar_itens([(1, 2, 10.0), (1, 1, 9.5)])
+    assert sorted(linhas) == [(1, 1, 9.5), (1, 2, 10.0)]
+    assert quantidades == {1: 3}
+
+
+def test_venda_sem_itens():
+    with pytest.raises(ValueError):
+        normalizar_itens([])
+
+
+@pytest.mark.parametrize("qtd", [0, -1])
+def test_quantidade_invalida(qtd):
+    with pytest.raises(ValueError, match="Quantidade inválida"):
+        normalizar_itens([(1, 2, 10.0), (3, qtd, 1.0)])
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import repository
+
+
+def test_cursor_volta_aos_mesmos_valores():
+    valores = [datetime(2025, 3, 9, 14, 30, 5), "São João/Ação", 42]
+    token = repository._codificar_cursor(valores)
+    assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+    assert repository._decodificar_cursor(token) == valores
+
+
+class Consultas:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.feitas = []
+
+    def __call__(self, sql, params=None, row_type=None):
+        self.feitas.append((sql, params))
+        return self.linhas[:params[-1]]
+
+
+CHAVE = [("v.data_venda", "data_venda"), ("v.id_venda", "id_venda")]
+
+
+def test_pagina_cheia_devolve_cursor_da_ultima_linha(monkeypatch):
+    linhas = [{"data_venda": datetime(2025, 1, 10 - i), "id_venda": 10 - i} for i in range(4)]
+    consultas = Consultas(linhas)
+    monkeypatch.setattr(repository, "fetchall", consultas)
+
+    pagina, cursor = repository._paginar("SELECT * FROM venda v", CHAVE, 3, None, desc=True)
+    assert pagina == linhas[:3]
+    assert repository._decodificar_cursor(cursor) == [datetime(2025, 1, 8), 8]
+    sql, params = consultas.feitas[0]
+    assert "WHERE" not in sql
+    assert sql.endswith("ORDER BY v.data_venda DESC, v.id_venda DESC LIMIT %s")
+    assert params == (4,)
+
+
+def test_pagina_seguinte_continua_pela_chave(monkeypatch):
+    consultas = Consultas([{"data_venda": datetime(2025, 1, 7), "id_venda": 7}])
+    monkeypatch.setattr(repository, "fetchall", consultas)
+    cursor = repository._codificar_cursor([datetime(2025, 1, 8), 8])
+
+    pagina, proximo = repository._paginar("SELECT * FROM venda v", CHAVE, 3, cursor, desc=True)
+    assert len(pagina) == 1 and proximo is None
+    sql, params = consultas.feitas[0]
+    assert "WHERE (v.data_venda, v.id_venda) < (%s, %s)" in sql
+    assert params == (datetime(2025, 1, 8), 8, 4)
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+from mysql.connector.errors import PoolError
+
+import db
+
+
+def test_reaproveita_conexao_devolvida(conector):
+    pool = db.ConnectionPool({}, size=2, max_overflow=0)
+    with pool.acquire() as conn:
+        primeira = conn._conn
+    with pool.acquire() as conn:
+        assert conn._conn is primeira
+    assert len(conector) == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_devolver_desfaz_transacao_e_reinicia_sessao(conector):
+    pool = db.ConnectionPool({}, size=1, max_overflow=0, reset_session=True)
+    conn = pool.acquire()
+    conn._conn.in_transaction = True
+    conn.close()
+    assert conector[0].rollbacks == 1
+    assert conector[0].resets == 1
+
+
+def test_conexao_devolvida_nao_pode_ser_usada(conector):
+    pool = db.ConnectionPool({}, size=1)
+    conn = pool.acquire()
+    conn.close()
+    with pytest.raises(Exception):
+        conn.cursor()
+
+
+def test_overflow_fecha_ao_devolver(conector):
+    pool = db.ConnectionPool({}, size=1, max_overflow=1)
+    a, b = pool.acquire(), pool.acquire()
+    a.close()
+    b.close()
+    assert sum(c.fechada for c in conector) == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_timeout_sem_conexao_livre(conector):
+    pool = db.ConnectionPool({}, size=1, max_overflow=0, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(PoolError):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+    conn.close()
+
+
+def test_espera_conexao_devolvida_por_outra_thread(conector):
+    pool = db.ConnectionPool({}, size=1, max_overflow=0, timeout=2)
+    conn = pool.acquire()
+    threading.Timer(0.05, conn.close).start()
+    with pool.acquire():
+        pass
+    assert pool.stats()["waits"] == 1
+
+
+def test_descarta_conexao_morta(conector):
+    pool = db.ConnectionPool({}, size=1, max_overflow=0)
+    pool.acquire().close()
+    conector[0].viva = False
+    with pool.acquire() as conn:
+        assert conn._conn is conector[1]
+    assert pool.stats()["destroyed"] == 1
+
+
+def test_descarta_conexao_ociosa_demais(conector):
+    pool = db.ConnectionPool({}, size=1, max_overflow=0, idle_timeout=0)
+    pool.acquire().close()
+    with pool.acquire() as conn:
+        assert conn._conn is conector[1]
+    assert conector[0].fechada
@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+
+from models import Produto, Venda
+
+
+def _produto():
+    return Produto((7, "Arroz", "Grãos", 25.5, 40, "Fornecedor A", 10))
+
+
+def test_acesso_por_nome_atributo_e_posicao():
+    p = _produto()
+    assert p["nome"] == p.nome == p[1] == "Arroz"
+    assert p[-1] == 10
+    with pytest.raises(KeyError):
+        p["inexistente"]
+
+
+def test_get_keys_e_dict():
+    p = _produto()
+    assert p.get("preco") == 25.5
+    assert p.get("inexistente", 0) == 0
+    assert p.keys() == Produto.CAMPOS
+    assert dict(p) == dict(zip(Produto.CAMPOS, p))
+
+
+def test_in_procura_nos_valores():
+    p = _produto()
+    assert "Arroz" in p
+    assert "nome" not in p
+    assert "nome" in p.keys()
+
+
+def test_com_ordem_acrescenta_a_coluna_na_frente():
+    V = Venda.com_ordem()
+    assert V is Venda.com_ordem()
+    assert V.CAMPOS == ("_ordem",) + Venda.CAMPOS
+    v = V(("2025-01-02|9", 9, 3, "Ana", 100.0, "2025-01-02"))
+    assert isinstance(v, Venda)
+    assert v["_ordem"] == "2025-01-02|9"
+    assert v.id_venda == 9 and v["cliente"] == "Ana"
+    assert Venda.CAMPOS[0] == "id_venda"
+
+
+def test_imutavel_e_leve():
+    p = _produto()
+    with pytest.raises(AttributeError):
+        p.nome = "Feijão"
+    with pytest.raises(AttributeError):
+        p.__dict__
+    assert pickle.loads(pickle.dumps(p)) == p
@@ -0,0 +1,55 @@
+import db
+from conftest import ConexaoFalsa
+
+
+def test_reaproveita_cursor_e_o_texto_guardado():
+    cache = db.StatementCache(ConexaoFalsa(), size=4)
+    sql = "SELECT * FROM produto WHERE id_produto = %s"
+    texto, cur = cache.cursor(sql)
+    assert cur.prepared
+    assert cache.cursor("".join(sql)) == (texto, cur)
+    assert cache.cursor(sql, dictionary=True)[1] is not cur
+    assert (cache.prepares, cache.executes) == (2, 3)
+
+
+def test_fecha_o_usado_ha_mais_tempo_no_limite():
+    cache = db.StatementCache(ConexaoFalsa(), size=2)
+    _, a = cache.cursor("SELECT 1")
+    _, b = cache.cursor("SELECT 2")
+    cache.cursor("SELECT 1")          # "SELECT 2" vira o mais antigo
+    _, c = cache.cursor("SELECT 3")
+    assert b.fechado and not a.fechado and not c.fechado
+    assert cache.evictions == 1
+    assert cache.cursor("SELECT 2")[1] is not b
+
+
+def test_discard_passa_para_texto():
+    cache = db.StatementCache(ConexaoFalsa(), size=2)
+    _, cur = cache.cursor("SELECT 1")
+    cache.discard("SELECT 1")
+    assert cur.fechado
+    assert not cache.accepts("SELECT 1")
+    assert not cache.accepts("SET @x = 1")
+
+
+def test_reiniciar_sessao_fecha_os_cursores_antes(conector):
+    pool = db.ConnectionPool({}, size=1, max_overflow=0, reset_session=True, prepared_cache=4)
+    conn = pool.acquire()
+    _, a = conn.statements.cursor("SELECT 1")
+    _, b = conn.statements.cursor("SELECT 2")
+    fechados_no_reset = []
+    crua = conn._conn
+    crua.reset_session = lambda: fechados_no_reset.append((a.fechado, b.fechado))
+    conn.close()
+    assert fechados_no_reset == [(True, True)]
+    assert pool.stats()["prepares"] == 2
+
+
+def test_fechar_o_pool_fecha_os_cursores(conector):
+    pool = db.ConnectionPool({}, size=1, max_overflow=0, reset_session=False, prepared_cache=4)
+    conn = pool.acquire()
+    _, cur = conn.statements.cursor("SELECT 1")
+    conn.close()
+    assert not cur.fechado            # sem reset_session o cache continua valendo
+    pool.close_all()
+    assert cur.fechado and conector[0].fechada
@@ -0,0 +1,61 @@
+import pytest
+
+import db
+
+
+def test_callback_roda_depois_do_commit(pool, conector):
+    vistos = []
+    with db.transaction() as uow:
+        uow.on_finish(lambda: vistos.append(conector[0].commits))
+        assert vistos == []
+    assert vistos == [1]
+    assert db.current_transaction() is None
+
+
+def test_callback_nao_roda_no_rollback(pool, conector):
+    vistos = []
+    with pytest.raises(ValueError):
+        with db.transaction() as uow:
+            uow.on_finish(lambda: vistos.append(1))
+            raise ValueError("falhou")
+    assert vistos == []
+    assert conector[0].rollbacks == 1
+
+
+def test_erro_no_callback_vai_para_o_log(pool, caplog):
+    vistos = []
+
+    def falhar():
+        raise RuntimeError("cache fora do ar")
+
+    with db.transaction() as uow:
+        uow.on_finish(falhar)
+        uow.on_finish(lambda: vistos.append(1))
+    assert vistos == [1]
+    assert "cache fora do ar" in caplog.text
+
+
+def test_erro_no_rollback_nao_troca_a_excecao(pool, conector, caplog):
+    with pytest.raises(ValueError, match="original"):
+        with db.transaction():
+            conector[0].falhar_rollback = True
+            raise ValueError("original")
+    assert "ROLLBACK" in caplog.text
+
+
+def test_before_commit_falhando_desfaz(pool, conector):
+    def falhar():
+        raise RuntimeError("antes")
+
+    with pytest.raises(RuntimeError):
+        with db.transaction() as uow:
+            uow.before_commit(falhar)
+    assert (conector[0].commits, conector[0].rollbacks) == (0, 1)
+
+
+def test_fetchiter_recusado_dentro_da_transacao(pool, conector):
+    with db.transaction() as uow:
+        with pytest.raises(db.mysql.connector.errors.ProgrammingError):
+            db.fetchiter("SELECT id_venda FROM venda")
+        assert uow.conn.in_transaction
+    assert conector[0].commits == 1
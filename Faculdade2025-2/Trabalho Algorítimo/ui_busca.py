@@ -0,0 +1,115 @@
+# Caixas de busca com sugestões enquanto se digita
+
+"""
+Módulo ui_busca
+---------------
+Liga um ``ttk.Combobox`` a um :class:`busca.IndiceBusca`: as opções da
+lista são trocadas pelas melhores respostas a cada pausa na digitação, em
+vez de a caixa receber todos os produtos ou clientes.
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+
+class BuscaDigitacao:
+    """
+    Sugestões para um Combobox a partir de um índice de busca.
+
+    A busca roda ``atraso`` ms depois da última tecla (digitar rápido não
+    dispara uma busca por letra). Com o índice carregado ela é feita na
+    hora, na memória; antes disso vai ao banco pelo ``executor``.
+
+    Parameters
+    ----------
+    combobox : ttk.Combobox
+    indice : busca.IndiceBusca
+    formatar : callable
+        Converte uma linha no texto mostrado na lista.
+    executor : ui_worker.Executor, optional
+    atraso : int, default=150
+        Milissegundos sem digitar antes de buscar.
+    limite : int, default=15
+        Opções mostradas.
+    """
+
+    # teclas que não mudam o texto (navegação na lista, confirmação)
+    IGNORADAS = {"Up", "Down", "Left", "Right", "Return", "KP_Enter", "Escape", "Tab",
+                 "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
+
+    def __init__(self, combobox, indice, formatar, executor=None, atraso=150, limite=15):
+        self.combobox = combobox
+        self.indice = indice
+        self.formatar = formatar
+        self.executor = executor
+        self.atraso = atraso
+        self.limite = limite
+        self._agendado = None
+        self._opcoes = {}       # texto mostrado -> linha
+        combobox.bind("<KeyRelease>", self._on_tecla, add="+")
+
+    def _on_tecla(self, event):
+        if event.keysym in self.IGNORADAS:
+            return
+        if self._agendado is not None:
+            self.combobox.after_cancel(self._agendado)
+        self._agendado = self.combobox.after(self.atraso, self._buscar)
+
+    def _buscar(self):
+        self._agendado = None
+        texto = self.combobox.get()
+        if self.indice.carregado or self.executor is None:
+            self._mostrar(texto, self.indice.buscar(texto, self.limite))
+            return
+        self.executor.submit(self.indice.buscar, texto, self.limite,
+                             canal=f"busca_{self.indice.tabela}", substituir=True,
+                             ao_terminar=lambda linhas: self._mostrar(texto, linhas))
+
+    def _mostrar(self, texto, linhas):
+        # resposta de um texto que o usuário já mudou: descarta
+        if not self.combobox.winfo_exists() or self.combobox.get() != texto:
+            return
+        self._opcoes = {self.formatar(r): r for r in linhas}
+        self.combobox.configure(values=list(self._opcoes))
+
+    def selecionado(self):
+        """Linha da opção escolhida na lista, ou ``None`` se o texto não é uma opção."""
+        return self._opcoes.get(self.combobox.get())
+
+
+def escolher(parent, titulo, indice, formatar, executor=None):
+    """
+    Janela para escolher uma linha de ``indice`` digitando parte do nome.
+
+    Returns
+    -------
+    dict or None
+        A linha escolhida, ou ``None`` se a janela foi fechada.
+    """
+    dlg = tk.Toplevel(parent)
+    dlg.title(titulo)
+
+    tk.Label(dlg, text="Digite para buscar e escolha na lista (seta para baixo):").grid(
+        row=0, column=0, padx=5, pady=5, sticky="w")
+    cb = ttk.Combobox(dlg, width=50)
+    cb.grid(row=1, column=0, padx=5, pady=5)
+    busca = BuscaDigitacao(cb, indice, formatar, executor)
+
+    resultado = {}
+
+    def confirmar(event=None):
+        linha = busca.selecionado()
+        if linha is None:
+            messagebox.showwarning("Aviso", "Escolha uma opção da lista.", parent=dlg)
+            return
+        resultado["linha"] = linha
+        dlg.destroy()
+
+    cb.bind("<Return>", confirmar)
+    ttk.Button(dlg, text="OK", command=confirmar).grid(row=2, column=0, pady=10)
+
+    dlg.transient(parent)
+    dlg.grab_set()
+    cb.focus_set()
+    parent.wait_window(dlg)
+    return resultado.get("linha")
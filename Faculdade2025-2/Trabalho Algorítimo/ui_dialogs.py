@@ -169,10 +169,9 @@ class PessoaDialog:
         def carregar_cidades(event=None):
             estado_nome = self.cb_estado.get()
             if estado_nome:
-                estado = next((e for e in repo.listar_estados() if e["nome"] == estado_nome), None)
-                if estado:
-                    cidades = repo.listar_cidades(estado["id_estado"])
-                    lista_cidades = [c["nome"] for c in cidades]
+                id_estado = repo.mapa_estados().get(estado_nome)
+                if id_estado:
+                    lista_cidades = list(repo.mapa_cidades(id_estado))
                     self.cb_cidade["values"] = lista_cidades
 
                     # 🔹 Se a cidade atual não está na lista, limpa
@@ -239,30 +238,27 @@ class PessoaDialog:
         # --- Estado ---
         id_estado = None
         if estado_nome:
-            estado = next((e for e in repo.listar_estados() if e["nome"] == estado_nome), None)
-            if estado:
-                id_estado = estado["id_estado"]
-            else:
+            id_estado = repo.mapa_estados().get(estado_nome)
+            if id_estado is None:
                 messagebox.showerror("Erro", "Estado inválido!")
                 return
 
         # --- Cidade ---
         id_cidade = None
         if cidade_nome and id_estado:
-            cidade = next((c for c in repo.listar_cidades(id_estado) if c["nome"] == cidade_nome), None)
-            if cidade:
-                id_cidade = cidade["id_cidade"]
-            else:
-                # 🔹 Se a cidade não existir, cria no banco
-                id_cidade = repo.inserir_cidade(cidade_nome, id_estado)
+            id_cidade = repo.mapa_cidades(id_estado).get(cidade_nome)
+            # 🔹 Se a cidade não existir, ela é criada junto com o endereço
 
-        # --- Endereço ---
-        id_endereco = None
-        if rua and id_cidade:
-            id_endereco = repo.inserir_endereco(rua, numero, bairro, cep, id_cidade)
+        # --- Endereço (gravado pelo repositório na mesma transação da pessoa) ---
+        endereco = None
+        if rua and cidade_nome and id_estado:
+            endereco = {
+                "rua": rua, "numero": numero, "bairro": bairro, "cep": cep,
+                "id_estado": id_estado, "cidade": cidade_nome, "id_cidade": id_cidade,
+            }
 
         # --- Resultado final ---
-        self.result = (nome, tel, email, id_endereco)
+        self.result = (nome, tel, email, endereco)
         self.top.destroy()
 
 class VendaDialog:
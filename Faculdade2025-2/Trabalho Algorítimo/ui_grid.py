@@ -0,0 +1,697 @@
+# Componentes de grade (Treeview) reutilizados pelas abas
+
+"""
+Módulo ui_grid
+--------------
+Grades (ttk.Treeview) que carregam os dados sob demanda e se atualizam
+pelo registro de alterações do repositório.
+
+- :class:`Preenchimento`: insere linhas em fatias curtas, sem travar a
+  interface.
+- :class:`GradePaginada`: acrescenta páginas conforme a rolagem (tabelas
+  pequenas e médias).
+- :class:`GradeVirtual`: mantém na Treeview só as linhas visíveis, para
+  tabelas de qualquer tamanho, com ordenação pelo banco.
+"""
+
+import bisect
+import time
+from collections import OrderedDict
+from tkinter import ttk
+
+import repository as repo
+
+
+def criar_tree(parent, colunas, **opcoes):
+    """
+    Cria uma Treeview com barra de rolagem vertical dentro de ``parent``.
+
+    Returns
+    -------
+    tuple[ttk.Treeview, ttk.Scrollbar]
+    """
+    frame = ttk.Frame(parent)
+    frame.pack(fill="both", expand=True)
+    tree = ttk.Treeview(frame, columns=colunas, show="headings", **opcoes)
+    scroll = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+    scroll.pack(side="right", fill="y")
+    tree.pack(fill="both", expand=True)
+    return tree, scroll
+
+
+class Preenchimento:
+    """
+    Insere linhas numa Treeview aos poucos: cada fatia usa no máximo
+    ``orcamento_ms`` e a seguinte é agendada com ``after``, então a janela
+    continua respondendo (rolagem, cliques, redesenho) durante a carga.
+
+    Começa sozinho ao ser criado.
+
+    Parameters
+    ----------
+    tree : ttk.Treeview
+        Usada para agendar as fatias.
+    linhas : sequence
+    inserir : callable
+        ``inserir(linha)``, chamado uma vez por linha, em ordem.
+    orcamento_ms : float, default=15
+        Tempo máximo de cada fatia.
+    ao_progresso : callable, optional
+        ``ao_progresso(feitas, total)`` depois de cada fatia.
+    ao_terminar : callable, optional
+        Chamado depois da última linha (não é chamado se abortado).
+    """
+
+    def __init__(self, tree, linhas, inserir, orcamento_ms=15, ao_progresso=None, ao_terminar=None):
+        self.tree = tree
+        self.linhas = linhas
+        self.inserir = inserir
+        self.orcamento = orcamento_ms / 1000
+        self.ao_progresso = ao_progresso
+        self.ao_terminar = ao_terminar
+        self.feitas = 0
+        self.ativo = True
+        self._agendado = tree.after(0, self._fatia)
+
+    def _fatia(self):
+        self._agendado = None
+        if not self.ativo:
+            return
+        limite = time.perf_counter() + self.orcamento
+        total = len(self.linhas)
+        while self.feitas < total:
+            self.inserir(self.linhas[self.feitas])
+            self.feitas += 1
+            if time.perf_counter() >= limite:
+                break
+        if self.ao_progresso is not None:
+            self.ao_progresso(self.feitas, total)
+        if self.feitas < total:
+            # 1 ms em vez de 0: deixa o Tk redesenhar e tratar eventos entre as fatias
+            self._agendado = self.tree.after(1, self._fatia)
+        else:
+            self.ativo = False
+            if self.ao_terminar is not None:
+                self.ao_terminar()
+
+    def abortar(self):
+        """Para de inserir; as linhas já inseridas ficam na grade."""
+        if not self.ativo:
+            return
+        self.ativo = False
+        if self._agendado is not None:
+            self.tree.after_cancel(self._agendado)
+            self._agendado = None
+        if self.ao_progresso is not None:
+            self.ao_progresso(len(self.linhas), len(self.linhas))
+
+    def restantes(self):
+        """Linhas que ainda não foram inseridas."""
+        return self.linhas[self.feitas:]
+
+
+class GradePaginada:
+    """
+    Liga uma Treeview a uma consulta paginada do repositório.
+
+    Carrega a primeira página e busca a próxima só quando a rolagem chega
+    perto do fim. Cada item da Treeview usa o ID da linha como ``iid``.
+
+    Com ``tabela`` e ``buscar_ids``, :meth:`aplicar_alteracoes` relê só as
+    linhas alteradas desde a última leitura (ver
+    :func:`repository.alteracoes_desde`) em vez de recarregar a grade.
+
+    Com um ``executor`` (:class:`ui_worker.Executor`) as consultas rodam
+    fora da thread da interface e a grade é preenchida quando o resultado
+    chega; resultados de cargas substituídas por outra mais nova são
+    descartados.
+
+    Cada página é inserida em fatias (ver :class:`Preenchimento`);
+    :meth:`abortar` interrompe a inserção e o resto da página volta na
+    próxima rolagem até o fim.
+
+    Parameters
+    ----------
+    tree : ttk.Treeview
+    buscar_pagina : callable
+        ``buscar_pagina(tamanho, cursor) -> (linhas, proximo_cursor)``, como
+        ``repository.paginar_produtos``.
+    formatar : callable
+        Converte uma linha (dict ou ``models.Registro``) na tupla de ``values`` da Treeview.
+    chave : str
+        Coluna com o ID da linha.
+    scrollbar : ttk.Scrollbar, optional
+        Barra de rolagem ligada à Treeview.
+    tamanho : int, default=200
+        Linhas por página.
+    tabela : str, optional
+        Tabela no registro de alterações (``"produto"``, ``"venda"``...).
+    buscar_ids : callable, optional
+        ``buscar_ids(ids) -> linhas``, como ``repository.buscar_produtos_por_ids``.
+    ordem : callable, optional
+        Chave de ordenação de uma linha, igual à ordem de ``buscar_pagina``;
+        usada para pôr linhas novas no lugar certo.
+    desc : bool, default=False
+        ``buscar_pagina`` devolve em ordem decrescente de ``ordem``.
+    executor : ui_worker.Executor, optional
+        Sem executor as consultas rodam na hora, na thread da interface.
+    canal : str, optional
+        Canal das tarefas no executor (padrão: ``tabela``).
+    ao_progresso : callable, optional
+        ``ao_progresso(feitas, total)`` durante a inserção de uma página.
+    """
+
+    def __init__(self, tree, buscar_pagina, formatar, chave, scrollbar=None, tamanho=200,
+                 tabela=None, buscar_ids=None, ordem=None, desc=False, executor=None, canal=None,
+                 ao_progresso=None):
+        self.tree = tree
+        self.buscar_pagina = buscar_pagina
+        self.formatar = formatar
+        self.chave = chave
+        self.scrollbar = scrollbar
+        self.tamanho = tamanho
+        self.tabela = tabela
+        self.buscar_ids = buscar_ids
+        self.ordem = ordem
+        self.desc = desc
+        self.executor = executor
+        self.canal = canal or tabela
+        self.ao_progresso = ao_progresso
+        self.cursor = None
+        self.fim = True
+        self.versao = None
+        self._preenchimento = None
+        self._sobra = []        # linhas de uma página abortada, ainda não inseridas
+        self._carregando = False
+        self._recarregando = False
+        self._reaplicar = False
+        self._chaves = {}       # iid -> chave de ordenação
+        self._ordenadas = []    # as mesmas chaves, em ordem crescente
+        self._ultima = None     # chave da última linha carregada
+        self._geracao = 0       # muda a cada recarga; resultados antigos são ignorados
+        tree.configure(yscrollcommand=self._on_scroll)
+
+    def _on_scroll(self, primeiro, ultimo):
+        if self.scrollbar is not None:
+            self.scrollbar.set(primeiro, ultimo)
+        # perto do fim da lista: busca a próxima página
+        if float(ultimo) >= 0.95 and not self.fim:
+            self.tree.after_idle(self.carregar_mais)
+
+    def _executar(self, buscar, aplicar, substituir=False):
+        """Roda ``buscar()`` (no executor, se houver) e entrega o resultado a ``aplicar``."""
+        if self.executor is None:
+            try:
+                resultado = buscar()
+            except Exception:
+                self._carregando = self._recarregando = False
+                raise
+            aplicar(resultado)
+            return
+        geracao = self._geracao
+
+        def aplicar_se_atual(resultado):
+            if geracao == self._geracao:
+                aplicar(resultado)
+
+        def falhar(erro):
+            if geracao == self._geracao:
+                self._carregando = self._recarregando = False
+            self.executor.mostrar_erro(erro)
+
+        self.executor.submit(buscar, canal=self.canal, substituir=substituir,
+                             ao_terminar=aplicar_se_atual, ao_falhar=falhar)
+
+    def recarregar(self):
+        """Limpa a grade e carrega a primeira página."""
+        self._geracao += 1
+        if self._preenchimento is not None:
+            self._preenchimento.ao_terminar = None
+            self._preenchimento.abortar()
+            self._preenchimento = None
+        self._sobra = []
+        self._carregando = self._recarregando = True
+        tabela, tamanho = self.tabela, self.tamanho
+
+        def buscar():
+            # versão lida antes dos dados: o que mudar durante a carga é reaplicado
+            versao = repo.versao_alteracoes() if tabela is not None else None
+            return versao, self.buscar_pagina(tamanho, None)
+
+        def aplicar(resultado):
+            self.versao, (rows, cursor) = resultado
+            self.tree.delete(*self.tree.get_children())
+            self._chaves.clear()
+            self._ordenadas.clear()
+            self._ultima = None
+            self._recarregando = False
+            self._acrescentar(rows, cursor)
+
+        self._executar(buscar, aplicar, substituir=True)
+
+    def aplicar_alteracoes(self):
+        """
+        Atualiza só as linhas inseridas, alteradas ou removidas desde a
+        última leitura. Recarrega tudo se a grade não usa o registro de
+        alterações, ainda não foi carregada ou há alterações demais.
+        """
+        if self._recarregando or self._preenchimento is not None:
+            self._reaplicar = True      # roda quando a recarga/inserção terminar
+            return
+        if self.tabela is None or self.buscar_ids is None or self.versao is None:
+            self.recarregar()
+            return
+        tabela, versao = self.tabela, self.versao
+
+        def buscar():
+            alteracoes, nova_versao = repo.alteracoes_desde(tabela, versao)
+            linhas = {}
+            if alteracoes:
+                linhas = {r[self.chave]: r for r in
+                          self.buscar_ids([i for i, op in alteracoes.items() if op != "D"])}
+            return alteracoes, nova_versao, linhas
+
+        self._executar(buscar, self._aplicar, substituir=True)
+
+    def _aplicar(self, resultado):
+        alteracoes, nova_versao, linhas = resultado
+        if alteracoes is None:
+            self.recarregar()
+            return
+        self.versao = nova_versao
+        for id_registro in alteracoes:
+            iid = str(id_registro)
+            r = linhas.get(id_registro)
+            if r is None:
+                self._remover(iid)
+            elif self.tree.exists(iid) and (self.ordem is None or self._chaves.get(iid) == self.ordem(r)):
+                # mesma posição: só troca os valores (mantém a seleção)
+                self.tree.item(iid, values=self.formatar(r))
+            else:
+                self._remover(iid)
+                if self._no_trecho_carregado(r):
+                    self._inserir(r)
+
+    def _posicao(self, chave):
+        if self.desc:
+            return len(self._ordenadas) - bisect.bisect_right(self._ordenadas, chave)
+        return bisect.bisect_left(self._ordenadas, chave)
+
+    def _inserir(self, r):
+        iid = str(r[self.chave])
+        if self.tree.exists(iid):
+            return
+        if self.ordem is None:
+            self.tree.insert("", "end", iid=iid, values=self.formatar(r))
+            return
+        chave = self.ordem(r)
+        self.tree.insert("", self._posicao(chave), iid=iid, values=self.formatar(r))
+        bisect.insort(self._ordenadas, chave)
+        self._chaves[iid] = chave
+
+    def _remover(self, iid):
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+        chave = self._chaves.pop(iid, None)
+        if chave is not None:
+            del self._ordenadas[bisect.bisect_left(self._ordenadas, chave)]
+
+    def _no_trecho_carregado(self, r):
+        """A linha cai antes da última já carregada (as seguintes vêm com a rolagem)."""
+        if self.fim:
+            return True
+        if self.ordem is None or self._ultima is None:
+            return False
+        chave = self.ordem(r)
+        return chave > self._ultima if self.desc else chave < self._ultima
+
+    def carregar_mais(self):
+        """Busca a próxima página (se houver) e a acrescenta no fim da grade."""
+        if self.fim or self._carregando:
+            return
+        self._carregando = True
+        if self._sobra:
+            rows, self._sobra = self._sobra, []
+            self._acrescentar(rows, self.cursor)
+            return
+        cursor, tamanho = self.cursor, self.tamanho
+        self._executar(lambda: self.buscar_pagina(tamanho, cursor),
+                       lambda resultado: self._acrescentar(*resultado))
+
+    def _acrescentar(self, rows, cursor):
+        """Insere ``rows`` em fatias; ``cursor`` é o da página seguinte."""
+        self.cursor = cursor
+
+        def inserir(r):
+            self._inserir(r)
+            if self.ordem is not None:
+                self._ultima = self.ordem(r)
+
+        self._preenchimento = Preenchimento(self.tree, rows, inserir, ao_progresso=self.ao_progresso,
+                                            ao_terminar=self._fim_preenchimento)
+
+    def _fim_preenchimento(self):
+        self._preenchimento = None
+        self.fim = self.cursor is None and not self._sobra
+        self._carregando = False
+        if self._reaplicar:
+            self._reaplicar = False
+            self.aplicar_alteracoes()
+
+    def abortar(self):
+        """Interrompe a inserção da página em andamento (o resto vem na próxima rolagem)."""
+        if self._preenchimento is None:
+            return
+        self._preenchimento.abortar()
+        self._sobra = self._preenchimento.restantes()
+        self._fim_preenchimento()
+
+
+def _entre(valor, valores):
+    """Se ``valor`` cai entre o menor e o maior de ``valores`` (na dúvida, sim)."""
+    if not valores:
+        return False
+    try:
+        return min(valores) <= valor <= max(valores)
+    except TypeError:       # None ou tipos que não se comparam
+        return True
+
+
+class GradeVirtual:
+    """
+    Lista virtual sobre uma Treeview: só as linhas visíveis existem como
+    itens do Tk, não importa o tamanho da tabela.
+
+    As linhas vêm do banco em blocos de ``bloco`` linhas, guardados num
+    cache (os ``max_blocos`` usados mais recentemente) que serve de folga
+    para a rolagem; o bloco seguinte ao visível é pedido antes de ser
+    necessário. A barra de rolagem representa a tabela inteira (o total
+    vem de ``contar``). Clicar no cabeçalho de uma coluna de ``ordens``
+    ordena pelo banco (clicar de novo inverte).
+
+    Parameters
+    ----------
+    tree : ttk.Treeview
+    scrollbar : ttk.Scrollbar
+    buscar : callable
+        ``buscar(ordem=, desc=, offset=, tamanho=, apos=)``, como
+        ``repository.janela_produtos``; as linhas trazem ``_ordem``.
+    contar : callable
+        Total de linhas, como ``repository.contar_produtos``.
+    formatar : callable
+        Converte uma linha (dict ou ``models.Registro``) na tupla de ``values`` da Treeview.
+    chave : str
+        Coluna com o ID da linha (usada como ``iid``).
+    ordens : iterable of str
+        Colunas que podem ser ordenadas (devem ser também chaves da linha).
+    ordem : str
+        Ordenação inicial.
+    desc : bool, default=False
+    bloco : int, default=200
+    max_blocos : int, default=20
+    tabela, buscar_ids, executor, canal
+        Como em :class:`GradePaginada`.
+    """
+
+    def __init__(self, tree, scrollbar, buscar, contar, formatar, chave, ordens, ordem, desc=False,
+                 bloco=200, max_blocos=20, tabela=None, buscar_ids=None, executor=None, canal=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.buscar = buscar
+        self.contar = contar
+        self.formatar = formatar
+        self.chave = chave
+        self.ordens = tuple(ordens)
+        self.ordem = ordem
+        self.desc = desc
+        self.bloco = bloco
+        self.max_blocos = max_blocos
+        self.tabela = tabela
+        self.buscar_ids = buscar_ids
+        self.executor = executor
+        self.canal = canal or tabela
+        self.total = 0
+        self.inicio = 0
+        self.altura = int(tree.cget("height") or 10)
+        self.versao = None
+        self._blocos = OrderedDict()    # nº do bloco -> linhas
+        self._pedidos = set()
+        self._geracao = 0
+        self._render_agendado = False
+        self._titulos = {c: tree.heading(c, "text") for c in self.ordens}
+
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.configure(yscrollcommand="")
+        tree.bind("<Configure>", self._on_configure)
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tree.bind(evento, self._on_roda)
+        tree.bind("<Prior>", lambda e: self._rolar_teclado(-self.altura))
+        tree.bind("<Next>", lambda e: self._rolar_teclado(self.altura))
+        tree.bind("<Up>", lambda e: self._seta(-1))
+        tree.bind("<Down>", lambda e: self._seta(1))
+        for coluna in self.ordens:
+            tree.heading(coluna, command=lambda c=coluna: self.ordenar(c))
+        self._marcar_cabecalho()
+
+    # ---------- execução ----------
+    def _executar(self, buscar, aplicar, substituir=False, do_cache=False, falhar=None):
+        """
+        Roda ``buscar()`` (no executor, se houver) e entrega o resultado a
+        ``aplicar`` (ou o erro a ``falhar``, antes de mostrá-lo). Blocos
+        (``do_cache``) pedidos antes de uma reordenação ou recarga são
+        descartados; contagens e alterações são substituídas pelo canal do
+        executor.
+        """
+        if self.executor is None:
+            aplicar(buscar())
+            return
+        geracao = self._geracao
+
+        def aplicar_se_atual(resultado):
+            if not do_cache or geracao == self._geracao:
+                aplicar(resultado)
+
+        def mostrar_erro(erro):
+            if falhar is not None:
+                falhar(erro)
+            self.executor.mostrar_erro(erro)
+
+        self.executor.submit(buscar, canal=self.canal, substituir=substituir,
+                             ao_terminar=aplicar_se_atual, ao_falhar=mostrar_erro)
+
+    def _limpar_cache(self):
+        self._geracao += 1
+        self._blocos.clear()
+        self._pedidos.clear()
+
+    # ---------- operações ----------
+    def recarregar(self):
+        """Descarta o cache, reconta as linhas e mostra de novo a posição atual."""
+        self._limpar_cache()
+        tabela = self.tabela
+
+        def buscar():
+            versao = repo.versao_alteracoes() if tabela is not None else None
+            return versao, self.contar()
+
+        def aplicar(resultado):
+            self.versao, self.total = resultado
+            self._renderizar()
+
+        self._executar(buscar, aplicar, substituir=True)
+
+    def aplicar_alteracoes(self):
+        """
+        Aplica o registro de alterações: linhas só alteradas (na mesma
+        posição) são trocadas no cache; mudanças na coluna de ordenação
+        descartam os blocos e inserções e remoções também recontam as
+        linhas. Alterações de linhas fora do cache são ignoradas, a não ser
+        que a linha passe a cair no trecho guardado.
+        """
+        if self.tabela is None or self.buscar_ids is None or self.versao is None:
+            self.recarregar()
+            return
+        tabela, versao = self.tabela, self.versao
+
+        def buscar():
+            alteracoes, nova_versao = repo.alteracoes_desde(tabela, versao)
+            linhas = {}
+            if alteracoes:
+                linhas = {r[self.chave]: r for r in
+                          self.buscar_ids([i for i, op in alteracoes.items() if op != "D"])}
+            return alteracoes, nova_versao, linhas
+
+        self._executar(buscar, self._aplicar, substituir=True)
+
+    def _aplicar(self, resultado):
+        alteracoes, nova_versao, linhas = resultado
+        if alteracoes is None:
+            self.recarregar()
+            return
+        self.versao = nova_versao
+        if not alteracoes:
+            return
+        if any(op != "U" for op in alteracoes.values()):
+            # o total mudou: reconta e recomeça do banco
+            self.recarregar()
+            return
+        posicoes = {r[self.chave]: (b, i) for b, rows in self._blocos.items() for i, r in enumerate(rows)}
+        ordens = [r["_ordem"] for rows in self._blocos.values() for r in rows]
+        mudou_ordem = False
+        for id_registro in alteracoes:
+            nova = linhas.get(id_registro)
+            if nova is None:
+                continue        # removida depois da alteração: vem como "D" na próxima
+            pos = posicoes.get(id_registro)
+            if pos is None:
+                # fora do cache: só importa se a linha veio para o trecho guardado
+                mudou_ordem = mudou_ordem or _entre(nova.get(self.ordem), ordens)
+                continue
+            antiga = self._blocos[pos[0]][pos[1]]
+            if antiga.get(self.ordem) == nova.get(self.ordem):
+                self._blocos[pos[0]][pos[1]] = dict(nova, _ordem=antiga["_ordem"])
+            else:
+                mudou_ordem = True
+        if mudou_ordem:
+            # as linhas mudaram de posição: relê os blocos (o total é o mesmo)
+            self._limpar_cache()
+        self._renderizar()
+
+    def ordenar(self, coluna):
+        """Ordena pela coluna (pelo banco); clicar de novo inverte a ordem."""
+        if coluna == self.ordem:
+            self.desc = not self.desc
+        else:
+            self.ordem, self.desc = coluna, False
+        self._marcar_cabecalho()
+        self._limpar_cache()
+        self.inicio = 0
+        self._renderizar()
+
+    def rolar_para(self, inicio):
+        """Mostra as linhas a partir da posição ``inicio`` (0 = primeira)."""
+        inicio = max(0, min(int(inicio), self.total - self.altura))
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._renderizar()
+
+    def _marcar_cabecalho(self):
+        for coluna, titulo in self._titulos.items():
+            seta = (" ▼" if self.desc else " ▲") if coluna == self.ordem else ""
+            self.tree.heading(coluna, text=titulo + seta)
+
+    # ---------- dados ----------
+    def _linha(self, i):
+        b, r = divmod(i, self.bloco)
+        rows = self._blocos.get(b)
+        if rows is None:
+            return None
+        self._blocos.move_to_end(b)
+        return rows[r] if r < len(rows) else None
+
+    def _pedir(self, b):
+        """Busca o bloco ``b`` (continua do bloco anterior pelo índice, se estiver no cache)."""
+        if b in self._blocos or b in self._pedidos or b * self.bloco >= self.total:
+            return
+        self._pedidos.add(b)
+        anterior = self._blocos.get(b - 1)
+        apos = None
+        if anterior and len(anterior) == self.bloco:
+            apos = (anterior[-1]["_ordem"], anterior[-1][self.chave])
+        ordem, desc, offset, tamanho = self.ordem, self.desc, b * self.bloco, self.bloco
+
+        def aplicar(rows):
+            self._pedidos.discard(b)
+            self._blocos[b] = rows
+            while len(self._blocos) > self.max_blocos:
+                self._blocos.popitem(last=False)
+            self._agendar_render()
+
+        def falhar(erro):
+            # o bloco pode ser pedido de novo ao rolar
+            self._pedidos.discard(b)
+
+        self._executar(lambda: self.buscar(ordem=ordem, desc=desc, offset=offset,
+                                           tamanho=tamanho, apos=apos), aplicar, do_cache=True,
+                       falhar=falhar)
+
+    # ---------- desenho ----------
+    def _agendar_render(self):
+        if not self._render_agendado:
+            self._render_agendado = True
+            self.tree.after_idle(self._renderizar)
+
+    def _renderizar(self):
+        """Deixa na Treeview exatamente as linhas visíveis."""
+        self._render_agendado = False
+        fim = min(self.total, self.inicio + self.altura)
+        for b in range(self.inicio // self.bloco, (max(fim, 1) - 1) // self.bloco + 1):
+            self._pedir(b)
+        # folga: o próximo bloco antes de chegar nele
+        self._pedir((fim + self.bloco // 2) // self.bloco)
+
+        visiveis = []
+        vistos = set()
+        for i in range(self.inicio, fim):
+            r = self._linha(i)
+            if r is not None and r[self.chave] not in vistos:
+                vistos.add(r[self.chave])
+                visiveis.append(r)
+
+        iids = [str(r[self.chave]) for r in visiveis]
+        sobrando = set(self.tree.get_children()) - set(iids)
+        if sobrando:
+            self.tree.delete(*sobrando)
+        for posicao, (iid, r) in enumerate(zip(iids, visiveis)):
+            if self.tree.exists(iid):
+                self.tree.move(iid, "", posicao)
+                self.tree.item(iid, values=self.formatar(r))
+            else:
+                self.tree.insert("", posicao, iid=iid, values=self.formatar(r))
+
+        if self.total:
+            self.scrollbar.set(self.inicio / self.total, fim / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    # ---------- eventos ----------
+    def _on_configure(self, event):
+        altura_linha = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        altura = max(1, (event.height - altura_linha) // altura_linha)  # menos o cabeçalho
+        if altura != self.altura:
+            self.altura = altura
+            self._renderizar()
+
+    def _on_scrollbar(self, acao, valor, unidade=None):
+        if acao == "moveto":
+            self.rolar_para(float(valor) * self.total)
+        elif acao == "scroll":
+            passo = self.altura if unidade == "pages" else 1
+            self.rolar_para(self.inicio + int(valor) * passo)
+
+    def _on_roda(self, event):
+        if event.num == 4:
+            linhas = -3
+        elif event.num == 5:
+            linhas = 3
+        else:
+            linhas = -3 if event.delta > 0 else 3
+        self.rolar_para(self.inicio + linhas)
+        return "break"
+
+    def _rolar_teclado(self, linhas):
+        self.rolar_para(self.inicio + linhas)
+        return "break"
+
+    def _seta(self, direcao):
+        """Setas na primeira/última linha visível rolam a lista em vez de parar."""
+        filhos = self.tree.get_children()
+        if not filhos or self.tree.focus() != filhos[0 if direcao < 0 else -1]:
+            return None
+        self.rolar_para(self.inicio + direcao)
+        filhos = self.tree.get_children()
+        if filhos:
+            alvo = filhos[0 if direcao < 0 else -1]
+            self.tree.focus(alvo)
+            self.tree.selection_set(alvo)
+        return "break"
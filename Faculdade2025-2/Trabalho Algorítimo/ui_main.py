@@ -4,22 +4,84 @@ Módulo ui_main
 Interface principal (Tkinter + abas).
 """
 
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, filedialog
 import repository as repo
 from ui_dialogs import ProdutoDialog, PessoaDialog, ProdutoEditDialog
-from tkcalendar import DateEntry
+from ui_grid import GradePaginada, GradeVirtual, Preenchimento, criar_tree
+from catalogo import CatalogoProdutos
+from alertas import AlertasEstoque
+from ui_worker import Executor
+from ui_busca import BuscaDigitacao, escolher
+import busca
+import inicializacao
+# analytics (NumPy), exportacao (PyArrow) e tkcalendar são importados no
+# primeiro uso, para não atrasar a abertura da janela
+
+
+def _valores_produto(p):
+    return (p["id_produto"], p["nome"], p["categoria"],
+            p["preco"], p["quantidade"], p["fornecedor"], p["estoque_minimo"])
+
+def _valores_pessoa(chave):
+    """Formata clientes ou fornecedores (``chave`` é a coluna do ID)."""
+    def formatar(c):
+        endereco_fmt = (
+            f"{c['rua']}, {c['numero']} - {c['bairro']}, {c['cidade']}/{c['estado']} - {c['cep']}"
+            if c["rua"] else ""
+        )
+        return (c[chave], c["nome"], c["telefone"], c["email"], endereco_fmt)
+    return formatar
+
+def _rotulo_cliente(c):
+    return f"{c['id_cliente']} - {c['nome']}"
+
+def _valores_venda(v):
+    return (
+        v["id_venda"],
+        v["id_cliente"],
+        v["cliente"],
+        f"{v['valor_total']:.2f}",
+        v["data_venda"].strftime("%d/%m/%Y %H:%M") if v["data_venda"] else ""
+    )
 
 
 class App:
     """Classe principal da aplicação."""
 
+    # Canal do executor -> aba que mostra "carregando..." enquanto ele trabalha
+    ABAS_POR_CANAL = {
+        "produto": "frame_produtos",
+        "cliente": "frame_clientes",
+        "fornecedor": "frame_fornecedores",
+        "venda": "frame_vendas",
+        "itens_venda": "frame_vendas",
+        "relatorio": "frame_relatorios",
+        "exportacao": "frame_relatorios",
+    }
+
     def __init__(self, root):
         self.root = root
         self.root.title("Distribuidora - Sistema")
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill="both", expand=True)
 
+        # Consultas ao banco rodam em threads de trabalho (ver ui_worker.py)
+        self._titulos = {}
+        self.executor = Executor(root, ao_mudar_estado=self._estado_carga)
+        self.root.protocol("WM_DELETE_WINDOW", self.fechar)
+
+        # Produtos em memória para a tela de venda (carregado na 1ª venda)
+        self.catalogo = CatalogoProdutos()
+        # Produtos com estoque baixo, atualizados a cada mudança de produto
+        self.alertas = AlertasEstoque()
+        self._preenchimento_itens = None
+        # marcado para interromper a exportação em andamento
+        self._parar_exportacao = None
+        # texto do botão de estoque baixo (a aba Relatórios pode não existir ainda)
+        self._texto_estoque_baixo = "Estoque baixo"
+
         # Abas
         self.frame_produtos = ttk.Frame(self.notebook)
         self.frame_clientes = ttk.Frame(self.notebook)
@@ -32,13 +94,54 @@ class App:
         self.notebook.add(self.frame_fornecedores, text="Fornecedores")
 
         self.notebook.add(self.frame_relatorios, text="Relatórios")
+        self.notebook.add(self.frame_vendas, text="Vendas")
+
+        # Cada aba é montada (e carregada) na primeira vez que é selecionada
+        self._abas_pendentes = {
+            str(self.frame_produtos): self.setup_produtos,
+            str(self.frame_clientes): self.setup_clientes,
+            str(self.frame_fornecedores): self.setup_fornecedores,
+            str(self.frame_vendas): self.setup_vendas,
+            str(self.frame_relatorios): self.setup_relatorios,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self._montar_aba)
+        # a aba inicial é montada depois que a janela aparece
+        self.root.after_idle(self._montar_aba)
+        inicializacao.marcar("interface montada")
+
+    def _montar_aba(self, event=None):
+        """Monta a aba selecionada se ela ainda não foi montada."""
+        setup = self._abas_pendentes.pop(self.notebook.select(), None)
+        if setup is not None:
+            setup()
+
+    def _estado_carga(self, canal, ocupado):
+        """Acrescenta "(carregando...)" ao título da aba enquanto houver consultas dela."""
+        nome = self.ABAS_POR_CANAL.get(canal)
+        if nome is None:
+            return
+        if not ocupado and inicializacao.FINAL not in inicializacao.marcos:
+            # depois dos callbacks que mostram o resultado
+            self.root.after_idle(inicializacao.marcar, inicializacao.FINAL)
+        frame = getattr(self, nome)
+        titulo = self._titulos.setdefault(nome, self.notebook.tab(frame, "text"))
+        ocupado = any(self.executor.ocupado(c) for c, n in self.ABAS_POR_CANAL.items() if n == nome)
+        self.notebook.tab(frame, text=f"{titulo} (carregando...)" if ocupado else titulo)
+
+    def _progresso(self, nome):
+        """Callback de progresso que mostra a porcentagem inserida no título da aba ``nome``."""
+        def mostrar(feitas, total):
+            frame = getattr(self, nome)
+            titulo = self._titulos.setdefault(nome, self.notebook.tab(frame, "text"))
+            if feitas >= total:
+                self.notebook.tab(frame, text=titulo)
+            else:
+                self.notebook.tab(frame, text=f"{titulo} ({feitas * 100 // total}%)")
+        return mostrar
 
-        # Setup
-        self.setup_produtos()
-        self.setup_clientes()
-        self.setup_fornecedores()
-        self.setup_vendas()
-        self.setup_relatorios()
+    def fechar(self):
+        self.executor.fechar()
+        self.root.destroy()
 
     # ---------------- Produtos ----------------
     def setup_produtos(self):
@@ -54,21 +157,22 @@ class App:
         ttk.Button(frame_botoes, text="Editar", takefocus=False, command=self.edit_produto).pack(side="left", padx=5)
 
 
-        # Treeview
+        # Treeview virtual: só as linhas visíveis existem no Tk (ordena pelo cabeçalho)
         colunas = ("id_produto","nome","categoria","preco","quantidade","fornecedor","estoque_minimo")
-        self.tree_prod = ttk.Treeview(self.frame_produtos, columns=colunas, show="headings")
+        self.tree_prod, scroll = criar_tree(self.frame_produtos, colunas)
         for c in colunas:
             self.tree_prod.heading(c, text=c.upper())
-        self.tree_prod.pack(fill="both", expand=True)
+        self.grade_prod = GradeVirtual(
+            self.tree_prod, scroll, repo.janela_produtos, repo.contar_produtos, _valores_produto,
+            "id_produto", ordens=repo.ORDENS_PRODUTOS, ordem="nome", tabela="produto",
+            buscar_ids=repo.buscar_produtos_por_ids, executor=self.executor)
 
         self.load_produtos()
 
 
     def load_produtos(self):
-        for i in self.tree_prod.get_children(): self.tree_prod.delete(i)
-        for p in repo.listar_produtos():
-            self.tree_prod.insert("", "end", values=(p["id_produto"],p["nome"],p["categoria"],
-                                                     p["preco"],p["quantidade"],p["fornecedor"],p["estoque_minimo"]))
+        self.grade_prod.aplicar_alteracoes()
+        self._atualizar_alertas()
 
     def add_produto(self):
         dlg = ProdutoDialog(self.root)
@@ -123,13 +227,19 @@ class App:
 
 
         colunas = ("ID", "Nome", "Telefone", "Email", "Endereço")
-        self.tree_clientes = ttk.Treeview(self.frame_clientes, columns=colunas, show="headings")
+        self.tree_clientes, scroll = criar_tree(self.frame_clientes, colunas)
 
         for col in colunas:
             self.tree_clientes.heading(col, text=col)
             self.tree_clientes.column(col, width=150)
 
-        self.tree_clientes.pack(fill="both", expand=True)
+        self.grade_clientes = GradePaginada(
+            self.tree_clientes, repo.paginar_clientes, _valores_pessoa("id_cliente"), "id_cliente",
+            scrollbar=scroll, tabela="cliente", buscar_ids=repo.buscar_clientes_por_ids,
+            ordem=lambda c: c["id_cliente"], executor=self.executor,
+            ao_progresso=self._progresso("frame_clientes"))
+        # Esc interrompe a inserção (o resto da página vem ao rolar até o fim)
+        self.tree_clientes.bind("<Escape>", lambda e: self.grade_clientes.abortar())
 
         # Botões
         frame_btn = ttk.Frame(self.frame_clientes)
@@ -146,15 +256,7 @@ class App:
 
 
     def atualizar_clientes(self):
-        for item in self.tree_clientes.get_children():
-            self.tree_clientes.delete(item)
-
-        for c in repo.listar_clientes():
-            endereco_fmt = f"{c['rua']}, {c['numero']} - {c['bairro']}, {c['cidade']}/{c['estado']} - {c['cep']}"
-            self.tree_clientes.insert(
-                "", "end",
-                values=(c["id_cliente"], c["nome"], c["telefone"], c["email"], endereco_fmt)
-            )
+        self.grade_clientes.aplicar_alteracoes()
 
 
 
@@ -168,8 +270,8 @@ class App:
         self.root.wait_window(dlg.top)
 
         if dlg.result:
-            nome, tel, email, id_endereco = dlg.result
-            repo.inserir_cliente(nome, tel, email, id_endereco)
+            nome, tel, email, endereco = dlg.result
+            repo.cadastrar_cliente(nome, tel, email, endereco)
             self.atualizar_clientes()
 
 
@@ -187,8 +289,8 @@ class App:
         self.root.wait_window(dlg.top)
 
         if dlg.result:
-            nome, tel, email, id_endereco = dlg.result
-            repo.atualizar_cliente(id_cliente, nome, tel, email, id_endereco)
+            nome, tel, email, endereco = dlg.result
+            repo.editar_cliente(id_cliente, nome, tel, email, endereco)
             self.atualizar_clientes()
 
 
@@ -219,13 +321,18 @@ class App:
 
         # --- Treeview de fornecedores ---
         colunas = ("ID", "Nome", "Telefone", "Email", "Endereço")
-        self.tree_fornecedores = ttk.Treeview(self.frame_fornecedores, columns=colunas, show="headings")
+        self.tree_fornecedores, scroll = criar_tree(self.frame_fornecedores, colunas)
 
         for col in colunas:
             self.tree_fornecedores.heading(col, text=col)
             self.tree_fornecedores.column(col, width=150)
 
-        self.tree_fornecedores.pack(fill="both", expand=True)
+        self.grade_fornecedores = GradePaginada(
+            self.tree_fornecedores, repo.paginar_fornecedores, _valores_pessoa("id_fornecedor"),
+            "id_fornecedor", scrollbar=scroll, tabela="fornecedor",
+            buscar_ids=repo.buscar_fornecedores_por_ids, ordem=lambda f: f["id_fornecedor"],
+            executor=self.executor, ao_progresso=self._progresso("frame_fornecedores"))
+        self.tree_fornecedores.bind("<Escape>", lambda e: self.grade_fornecedores.abortar())
 
         # Botões
         frame_btn = ttk.Frame(self.frame_fornecedores)
@@ -242,15 +349,7 @@ class App:
 
 
     def atualizar_fornecedores(self):
-        for item in self.tree_fornecedores.get_children():
-            self.tree_fornecedores.delete(item)
-
-        for f in repo.listar_fornecedores():
-            endereco_fmt = f"{f['rua']}, {f['numero']} - {f['bairro']}, {f['cidade']}/{f['estado']} - {f['cep']}"
-            self.tree_fornecedores.insert(
-                "", "end",
-                values=(f["id_fornecedor"], f["nome"], f["telefone"], f["email"], endereco_fmt)
-            )
+        self.grade_fornecedores.aplicar_alteracoes()
 
     
     def del_fornecedor(self):
@@ -268,28 +367,15 @@ class App:
 
 
     def load_fornecedores(self):
-        for i in self.tree_fornecedores.get_children():
-            self.tree_fornecedores.delete(i)
-
-        fornecedores = repo.listar_fornecedores()
-        for f in fornecedores:
-            endereco_fmt = (
-                f"{f['rua']}, {f['numero']} - {f['bairro']}, "
-                f"{f['cidade']}/{f['estado']} - {f['cep']}"
-                if f["rua"] else ""
-            )
-            self.tree_fornecedores.insert(
-                "", "end",
-                values=(f["id_fornecedor"], f["nome"], f["telefone"], f["email"], endereco_fmt)
-            )
+        self.grade_fornecedores.aplicar_alteracoes()
 
     def add_fornecedor(self):
         dlg = PessoaDialog(self.root, title="Novo Fornecedor")
         self.root.wait_window(dlg.top)
 
         if dlg.result:
-            nome, tel, email, id_endereco = dlg.result
-            repo.inserir_fornecedor(nome, tel, email, id_endereco)
+            nome, tel, email, endereco = dlg.result
+            repo.cadastrar_fornecedor(nome, tel, email, endereco)
             self.atualizar_fornecedores()
 
 
@@ -310,17 +396,19 @@ class App:
 
     # ---------------- Vendas ----------------
     def setup_vendas(self):
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Vendas")
+        frame = self.frame_vendas
 
         # Treeview principal (vendas)
         colunas = ("id_venda", "id_cliente", "cliente", "valor_total", "data_venda")
-        self.tree_vend = ttk.Treeview(frame, columns=colunas, show="headings", height=8)
+        self.tree_vend, scroll = criar_tree(frame, colunas, height=8)
 
         for c in colunas:
             self.tree_vend.heading(c, text=c.upper())
 
-        self.tree_vend.pack(fill="both", expand=True, pady=5)
+        self.grade_vend = GradeVirtual(
+            self.tree_vend, scroll, repo.janela_vendas, repo.contar_vendas, _valores_venda,
+            "id_venda", ordens=repo.ORDENS_VENDAS, ordem="data_venda", desc=True, tabela="venda",
+            buscar_ids=repo.buscar_vendas_por_ids, executor=self.executor)
 
         # Quando selecionar uma venda, carrega os itens
         self.tree_vend.bind("<<TreeviewSelect>>", self.on_venda_select)
@@ -338,6 +426,7 @@ class App:
         self.tree_itens.heading("subtotal", text="SUBTOTAL")
 
         self.tree_itens.pack(fill="both", expand=True, pady=5)
+        self.tree_itens.bind("<Escape>", lambda e: self._parar_itens())
 
         # Botões
         frame_botoes = ttk.Frame(frame)
@@ -347,7 +436,6 @@ class App:
         ttk.Button(frame_botoes, text="Atualizar", takefocus=False, command=self.load_vendas).pack(side="left", padx=5)
         ttk.Button(frame_botoes, text="Deletar", takefocus=False, command=self.del_venda).pack(side="left", padx=5)
 
-        self.frame_vendas = frame
         self.load_vendas()
 
 
@@ -356,17 +444,16 @@ class App:
         Quando o usuário seleciona uma venda, exibe os itens dessa venda na tree_itens.
         """
         # limpa tree_itens
-        for i in self.tree_itens.get_children():
-            self.tree_itens.delete(i)
+        self._parar_itens()
+        self.tree_itens.delete(*self.tree_itens.get_children())
 
         selected = self.tree_vend.selection()  
         if not selected:
             return
 
         venda_id = self.tree_vend.item(selected[0])["values"][0]
-        itens = repo.listar_itens_venda(venda_id)
 
-        for it in itens:
+        def inserir(it):
             self.tree_itens.insert(
                 "",
                 "end",
@@ -379,29 +466,20 @@ class App:
                 )
             )
 
+        def mostrar(itens):
+            self._preenchimento_itens = Preenchimento(
+                self.tree_itens, itens, inserir, ao_progresso=self._progresso("frame_vendas"))
 
-    def registrar_venda(self):
-        clientes=repo.listar_clientes()
-        if not clientes:
-            messagebox.showwarning("Atenção","Cadastre ao menos um cliente")
-            return
-        escolha=simpledialog.askinteger("Venda","ID do cliente:\n"+ "\n".join(f"{c['id_cliente']} - {c['nome']}" for c in clientes))
-        if not escolha: return
-        itens=[]
-        while True:
-            produtos=repo.listar_produtos()
-            if not produtos: break
-            pid=simpledialog.askinteger("Produto","ID do produto (cancelar p/ terminar):\n"+ "\n".join(f"{p['id_produto']} - {p['nome']} (estoque {p['quantidade']})" for p in produtos))
-            if not pid: break
-            qtd=simpledialog.askinteger("Qtd","Quantidade:",minvalue=1)
-            prod=next((p for p in produtos if p["id_produto"]==pid),None)
-            if not prod or qtd>prod["quantidade"]:
-                messagebox.showerror("Erro","Produto inválido ou estoque insuficiente")
-                continue
-            itens.append({"id_produto":pid,"quantidade":qtd,"preco_unit":float(prod["preco"]),"subtotal":float(prod["preco"])*qtd})
-        if itens:
-            vid=repo.registrar_venda(escolha,itens)
-            messagebox.showinfo("Sucesso",f"Venda registrada ID {vid}")
+        # trocar de venda rápido descarta a consulta da seleção anterior
+        self.executor.submit(repo.listar_itens_venda, venda_id, canal="itens_venda",
+                             substituir=True, ao_terminar=mostrar)
+
+
+    def _parar_itens(self):
+        """Interrompe a inserção dos itens da venda anterior."""
+        if self._preenchimento_itens is not None:
+            self._preenchimento_itens.abortar()
+            self._preenchimento_itens = None
 
     def add_venda(self):
         """
@@ -410,11 +488,12 @@ class App:
         dlg = tk.Toplevel(self.root)
         dlg.title("Adicionar Venda")
 
-        # Seleção de cliente
+        # Seleção de cliente: sugestões conforme se digita (nome, e-mail ou telefone)
         tk.Label(dlg, text="Cliente:").grid(row=0, column=0, padx=5, pady=5)
-        clientes = repo.listar_clientes()
-        cb_cliente = ttk.Combobox(dlg, values=[f"{c['id_cliente']} - {c['nome']}" for c in clientes])
+        cb_cliente = ttk.Combobox(dlg)
         cb_cliente.grid(row=0, column=1, padx=5, pady=5, columnspan=3, sticky="ew")
+        BuscaDigitacao(cb_cliente, busca.clientes, _rotulo_cliente, self.executor)
+        self.executor.submit(busca.clientes.atualizar, canal="venda")
 
         # Tree para itens da venda
         colunas = ("id_produto", "produto", "quantidade", "preco_unit", "subtotal")
@@ -423,12 +502,21 @@ class App:
             tree_itens.heading(c, text=c.upper())
         tree_itens.grid(row=1, column=0, columnspan=4, padx=5, pady=5)
 
-        # Seleção de produto
+        # Seleção de produto: sugestões por nome ou categoria
         tk.Label(dlg, text="Produto:").grid(row=2, column=0, padx=5, pady=5)
-        produtos = repo.listar_produtos()
-        cb_produto = ttk.Combobox(dlg, values=[f"{p['id_produto']} - {p['nome']} ({p['quantidade']} em estoque)" for p in produtos], width=50)
+        cb_produto = ttk.Combobox(dlg, width=50)
         cb_produto.grid(row=2, column=1, padx=5, pady=5)
 
+        def rotulo_produto(p):
+            # estoque do catálogo, que é atualizado a cada venda
+            atual = self.catalogo.get(p["id_produto"]) or p
+            return f"{p['id_produto']} - {p['nome']} ({atual['quantidade']} em estoque)"
+
+        BuscaDigitacao(cb_produto, busca.produtos, rotulo_produto, self.executor)
+
+        # o índice só relê o que mudou desde a última venda
+        self.executor.submit(busca.produtos.atualizar, canal="venda")
+
         tk.Label(dlg, text="Quantidade:").grid(row=2, column=2, padx=5, pady=5)
         entry_qtd = tk.Entry(dlg)
         entry_qtd.grid(row=2, column=3, padx=5, pady=5)
@@ -444,41 +532,62 @@ class App:
             id_produto = int(valor_cb.split(" - ")[0])
             qtd = int(entry_qtd.get())
 
-            # 🔎 Busca direto pelo ID (mais seguro que pelo nome)
-            produto = repo.buscar_produto_por_id(id_produto)
+            # 🔎 Preço e estoque vêm do catálogo em memória (a venda confere de novo no banco)
+            produto = self.catalogo.get(id_produto)
             if not produto:
                 messagebox.showerror("Erro", f"O produto ID {id_produto} não foi encontrado.")
                 return
-
             nome_produto = produto["nome"]
-            estoque_disponivel = produto["quantidade"]
+            preco = float(produto["preco"])
 
-            # Valida quantidade
-            if qtd <= 0:
-                messagebox.showerror("Erro", "A quantidade deve ser maior que zero.")
-                return
+            # Soma com o que já está no carrinho para este produto
+            ja_no_carrinho = 0
+            linha_existente = None
+            for it in tree_itens.get_children():
+                vals = tree_itens.item(it)["values"]
+                if int(vals[0]) == id_produto:
+                    ja_no_carrinho += int(vals[2])
+                    if f"{float(vals[3]):.2f}" == f"{preco:.2f}":
+                        linha_existente = it
 
-            if qtd > estoque_disponivel:
-                messagebox.showerror(
-                    "Estoque insuficiente",
-                    f"O produto '{nome_produto}' possui apenas {estoque_disponivel} em estoque.\n"
-                    f"Você tentou adicionar {qtd}."
-                )
+            try:
+                self.catalogo.validar_item(id_produto, qtd, ja_no_carrinho)
+            except ValueError as e:
+                messagebox.showerror("Erro", str(e))
                 return
 
-            # Se passou na validação, insere na tree
-            preco = repo.get_preco_produto(id_produto)
-            subtotal = qtd * preco
-            tree_itens.insert(
-                "", "end",
-                values=(id_produto, nome_produto, qtd, f"{preco:.2f}", f"{subtotal:.2f}")
-            )
+            # Se passou na validação, insere na tree (ou soma à linha do mesmo produto/preço)
+            if linha_existente:
+                qtd += int(tree_itens.item(linha_existente)["values"][2])
+                subtotal = qtd * preco
+                tree_itens.item(
+                    linha_existente,
+                    values=(id_produto, nome_produto, qtd, f"{preco:.2f}", f"{subtotal:.2f}")
+                )
+            else:
+                subtotal = qtd * preco
+                tree_itens.insert(
+                    "", "end",
+                    values=(id_produto, nome_produto, qtd, f"{preco:.2f}", f"{subtotal:.2f}")
+                )
 
             # limpa campos
             entry_qtd.delete(0, tk.END)
             cb_produto.set("")
 
-        ttk.Button(dlg, text="Adicionar Item", command=add_item).grid(row=3, column=0, columnspan=4, pady=5)
+        btn_add = ttk.Button(dlg, text="Adicionar Item", command=add_item)
+        btn_add.grid(row=3, column=0, columnspan=4, pady=5)
+
+        # sem o catálogo não há preço nem estoque para conferir o item:
+        # "Adicionar Item" espera a primeira carga (as seguintes só releem o que mudou)
+        if not self.catalogo.carregado:
+            btn_add.config(state="disabled")
+
+        def catalogo_pronto(_):
+            if btn_add.winfo_exists():
+                btn_add.config(state="normal")
+
+        self.executor.submit(self.catalogo.atualizar, canal="venda", ao_terminar=catalogo_pronto)
 
         # Função para salvar venda
         def salvar_venda():
@@ -504,23 +613,31 @@ class App:
                 btn_salvar.config(state="normal")
                 return
 
-            try:
-                repo.inserir_venda(id_cliente, itens)
+            cliente = cb_cliente.get()
 
+            def concluida(_):
                 resumo = "\n".join([f"Produto {idp} - Qtd {q} - R$ {p:.2f}" for idp, q, p in itens])
                 messagebox.showinfo(
                     "Sucesso",
-                    f"Venda registrada!\n\nCliente: {cb_cliente.get()}\nTotal: R$ {total:.2f}\n\nItens:\n{resumo}"
+                    f"Venda registrada!\n\nCliente: {cliente}\nTotal: R$ {total:.2f}\n\nItens:\n{resumo}"
                 )
 
                 self.load_vendas()
+                self.load_produtos()   # estoque baixado (só as linhas vendidas)
                 dlg.destroy()
 
-            except ValueError as e:
-                # 🚨 Aqui cai quando não há estoque suficiente
-                messagebox.showerror("Erro de estoque", str(e))
+            def falhou(e):
+                if isinstance(e, ValueError):
+                    # 🚨 Aqui cai quando não há estoque suficiente
+                    messagebox.showerror("Erro de estoque", str(e))
+                else:
+                    messagebox.showerror("Erro", f"Não foi possível registrar a venda:\n{e}")
                 btn_salvar.config(state="normal")  # reabilita botão para tentar de novo
 
+            # a venda trava as linhas dos produtos: roda fora da thread da interface
+            self.executor.submit(repo.inserir_venda, id_cliente, itens, canal="venda",
+                                 ao_terminar=concluida, ao_falhar=falhou)
+
         # Botão de salvar (precisa da referência para desabilitar no clique)
         btn_salvar = ttk.Button(dlg, text="Salvar Venda", command=salvar_venda)
         btn_salvar.grid(row=4, column=0, columnspan=4, pady=10)
@@ -528,33 +645,22 @@ class App:
 
             
     def load_vendas(self):
-        for i in self.tree_vend.get_children():
-            self.tree_vend.delete(i)
-
-        rows = repo.listar_vendas()
-        for v in rows:
-            self.tree_vend.insert(
-                "",
-                "end",
-                values=(
-                    v["id_venda"],
-                    v["id_cliente"],
-                    v["cliente"],
-                    f"{v['valor_total']:.2f}",
-                    v["data_venda"].strftime("%d/%m/%Y %H:%M") if v["data_venda"] else ""
-                )
-            )
+        self.grade_vend.aplicar_alteracoes()
 
 
 
 
     def consultar_vendas(self):
-        self.txt_vendas.delete("1.0","end")
-        for v in repo.listar_vendas():
-            self.txt_vendas.insert("end",f"Venda {v['id_venda']} - {v['data_venda']} - Cliente: {v['cliente']} - Total: {v['valor_total']}\n")
-            for it in repo.listar_itens_venda(v["id_venda"]):
-                self.txt_vendas.insert("end",f"   {it['nome']} x{it['quantidade']} @ {it['preco_unitario']} = {it['subtotal']}\n")
-            self.txt_vendas.insert("end","-"*50+"\n")
+        """Relatório de todas as vendas com os itens (uma consulta só)."""
+        def formatar(vendas):
+            linhas = []
+            for v in vendas:
+                linhas.append(f"Venda {v['id_venda']} - {v['data_venda']} - Cliente: {v['cliente']} - Total: {v['valor_total']}")
+                for it in v["itens"]:
+                    linhas.append(f"   {it['produto']} x{it['quantidade']} @ {it['preco_unitario']} = {it['subtotal']}")
+                linhas.append("-" * 50)
+            return "\n".join(linhas) + "\n" if linhas else "Nenhuma venda registrada.\n"
+        self._relatorio(repo.iterar_vendas_com_itens, formatar=formatar)
 
     def del_venda(self):
         """Deleta venda selecionada da tabela e do banco"""
@@ -580,14 +686,22 @@ class App:
 
         largura_padrao = 25  # largura fixa dos botões
 
-        ttk.Button(frame_botoes, text="Estoque baixo", width=largura_padrao,
-                takefocus=False, command=self.report_estoque_baixo).pack(pady=5)
+        self.btn_estoque_baixo = ttk.Button(frame_botoes, text=self._texto_estoque_baixo, width=largura_padrao,
+                takefocus=False, command=self.report_estoque_baixo)
+        self.btn_estoque_baixo.pack(pady=5)
         ttk.Button(frame_botoes, text="Histórico por Cliente", width=largura_padrao,
                 takefocus=False, command=self.report_vendas_cliente).pack(pady=5)
         ttk.Button(frame_botoes, text="Histórico por Produto", width=largura_padrao,
                 takefocus=False, command=self.report_vendas_produto).pack(pady=5)
         ttk.Button(frame_botoes, text="Histórico por Período", width=largura_padrao,
                 takefocus=False, command=self.report_vendas_periodo).pack(pady=5)
+        ttk.Button(frame_botoes, text="Vendas com itens", width=largura_padrao,
+                takefocus=False, command=self.consultar_vendas).pack(pady=5)
+        ttk.Button(frame_botoes, text="Análise de vendas", width=largura_padrao,
+                takefocus=False, command=self.report_analise).pack(pady=5)
+        self.btn_exportar = ttk.Button(frame_botoes, text="Exportar...", width=largura_padrao,
+                takefocus=False, command=self.exportar_relatorio)
+        self.btn_exportar.pack(pady=5)
 
         # Área de texto somente leitura
         self.txt_rel = tk.Text(self.frame_relatorios, height=20, state="disabled")
@@ -595,80 +709,229 @@ class App:
         
 
 
-    def report_vendas_cliente(self):
-        clientes = repo.listar_clientes()
-        if not clientes:
-            messagebox.showwarning("Aviso", "Nenhum cliente cadastrado.")
-            return
-        escolha = simpledialog.askinteger(
-            "Histórico por Cliente",
-            "Digite o ID do cliente:\n" + "\n".join(f"{c['id_cliente']} - {c['nome']}" for c in clientes)
-        )
-        if not escolha:
-            return
-
-        rows = repo.historico_vendas_por_cliente(escolha)
+    def _mostrar_relatorio(self, texto):
+        """Troca o conteúdo da área de relatórios (somente leitura)."""
         self.txt_rel.config(state="normal")
         self.txt_rel.delete("1.0", "end")
-        if not rows:
-            self.txt_rel.insert("end", "Nenhuma venda encontrada.\n")
-        else:
-            self.txt_rel.insert("end", f"Histórico de vendas do Cliente {escolha}:\n\n")
-            for r in rows:
-                self.txt_rel.insert("end",
-                    f"Venda {r['id_venda']} | Data: {r['data_venda']} | Total: R$ {r['valor_total']:.2f}\n"
-                    f"   Produto: {r['produto']} x{r['quantidade']} @ {r['preco_unitario']:.2f} = {r['subtotal']:.2f}\n\n"
-                )
+        self.txt_rel.insert("end", texto)
         self.txt_rel.config(state="disabled")
 
-    def report_vendas_produto(self):
-        produtos = repo.listar_produtos()
-        if not produtos:
-            messagebox.showwarning("Aviso", "Nenhum produto cadastrado.")
+    def _relatorio(self, funcao, *args, formatar):
+        """Roda a consulta do relatório fora da thread da interface e mostra ``formatar(linhas)``."""
+        self._mostrar_relatorio("Carregando...\n")
+        # só o último relatório pedido é mostrado
+        self.executor.submit(lambda: formatar(funcao(*args)), canal="relatorio", substituir=True,
+                             ao_terminar=self._mostrar_relatorio)
+
+    def report_vendas_cliente(self):
+        self.executor.submit(busca.clientes.atualizar, canal="relatorio")
+        cliente = escolher(self.root, "Histórico por Cliente", busca.clientes, _rotulo_cliente, self.executor)
+        if cliente is None:
             return
-        escolha = simpledialog.askinteger(
-            "Histórico por Produto",
-            "Digite o ID do produto:\n" + "\n".join(f"{p['id_produto']} - {p['nome']}" for p in produtos)
-        )
-        if not escolha:
+        escolha = cliente["id_cliente"]
+
+        def consultar(id_cliente):
+            return repo.totais_vendas_cliente(id_cliente), repo.historico_vendas_por_cliente(id_cliente)
+
+        def formatar(resultado):
+            totais, rows = resultado
+            if not rows:
+                return "Nenhuma venda encontrada.\n"
+            return (f"Histórico de vendas do Cliente {escolha}:\n"
+                    f"{totais['vendas']} venda(s), total R$ {totais['valor_total']:.2f}\n\n") + "".join(
+                f"Venda {r['id_venda']} | Data: {r['data_venda']} | Total: R$ {r['valor_total']:.2f}\n"
+                f"   Produto: {r['produto']} x{r['quantidade']} @ {r['preco_unitario']:.2f} = {r['subtotal']:.2f}\n\n"
+                for r in rows
+            )
+
+        self._relatorio(consultar, escolha, formatar=formatar)
+
+    def report_vendas_produto(self):
+        self.executor.submit(busca.produtos.atualizar, canal="relatorio")
+        produto = escolher(self.root, "Histórico por Produto", busca.produtos,
+                           lambda p: f"{p['id_produto']} - {p['nome']}", self.executor)
+        if produto is None:
             return
+        escolha = produto["id_produto"]
+
+        def consultar(id_produto):
+            return repo.totais_vendas_produto(id_produto), repo.historico_vendas_por_produto(id_produto)
+
+        def formatar(resultado):
+            totais, rows = resultado
+            if not rows:
+                return "Nenhuma venda encontrada.\n"
+            return (f"Histórico de vendas do Produto {escolha}:\n"
+                    f"{totais['vendas']} venda(s), {totais['quantidade']} unidade(s), "
+                    f"total R$ {totais['valor_total']:.2f}\n\n") + "".join(
+                f"Venda {r['id_venda']} | Data: {r['data_venda']} | Cliente: {r['cliente']} | Total: R$ {r['valor_total']:.2f}\n"
+                f"   Quantidade: {r['quantidade']} @ {r['preco_unitario']:.2f} = {r['subtotal']:.2f}\n\n"
+                for r in rows
+            )
 
-        rows = repo.historico_vendas_por_produto(escolha)
-        self.txt_rel.config(state="normal")
-        self.txt_rel.delete("1.0", "end")
-        if not rows:
-            self.txt_rel.insert("end", "Nenhuma venda encontrada.\n")
-        else:
-            self.txt_rel.insert("end", f"Histórico de vendas do Produto {escolha}:\n\n")
-            for r in rows:
-                self.txt_rel.insert("end",
-                    f"Venda {r['id_venda']} | Data: {r['data_venda']} | Cliente: {r['cliente']} | Total: R$ {r['valor_total']:.2f}\n"
-                    f"   Quantidade: {r['quantidade']} @ {r['preco_unitario']:.2f} = {r['subtotal']:.2f}\n\n"
-                )
-        self.txt_rel.config(state="disabled")
+        self._relatorio(consultar, escolha, formatar=formatar)
 
     def report_vendas_periodo(self):
         data_inicio, data_fim = self.pedir_datas()
         if not data_inicio or not data_fim:
             return
 
-        rows = repo.historico_vendas_por_periodo(data_inicio, data_fim)
-        self.txt_rel.config(state="normal")
-        self.txt_rel.delete("1.0", "end")
+        # Totais pelos resumos de vendas: não depende do tamanho do período
+        def consultar(inicio, fim):
+            return (repo.totais_vendas_por_periodo(inicio, fim), repo.vendas_por_dia(inicio, fim),
+                    repo.totais_por_produto(inicio, fim, limite=10))
+
+        def formatar(resultado):
+            totais, dias, produtos = resultado
+            if not totais["vendas"]:
+                return "Nenhuma venda encontrada nesse período.\n"
+            texto = (f"Vendas de {data_inicio} a {data_fim}: {totais['vendas']} venda(s), "
+                     f"total R$ {totais['valor_total']:.2f}\n\nPor dia:\n")
+            texto += "".join(f"   {d['dia']} | {d['vendas']} venda(s) | R$ {d['valor_total']:.2f}\n"
+                             for d in dias)
+            texto += "\nProdutos mais vendidos:\n"
+            texto += "".join(f"   {p['id_produto']} - {p['produto']} | Qtd {p['quantidade']} | "
+                             f"R$ {p['valor_total']:.2f}\n" for p in produtos)
+            return texto
+
+        self._relatorio(consultar, data_inicio, data_fim, formatar=formatar)
+
+    def report_analise(self):
+        """Receita por mês e categoria, top produtos, curva ABC e média móvel (ver analytics.py)."""
+        import analytics
+        if not analytics.DISPONIVEL:
+            messagebox.showwarning("Aviso", "A análise de vendas precisa do NumPy (pip install numpy).")
+            return
 
-        if not rows:
-            self.txt_rel.insert("end", "Nenhuma venda encontrada nesse período.\n")
-        else:
-            for r in rows:
-                self.txt_rel.insert(
-                    "end",
-                    f"Venda {r['id_venda']} | Cliente: {r['cliente']} | "
-                    f"Total: R$ {r['valor_total']:.2f} | Data: {r['data_venda']}\n"
-                )
-        self.txt_rel.config(state="disabled")
+        def formatar(base):
+            if not len(base):
+                return "Nenhuma venda registrada.\n"
+            texto = "Receita por mês (últimos 12):\n"
+            texto += "".join(f"   {r['periodo']} | R$ {r['receita']:.2f} | {r['quantidade']} unidade(s)\n"
+                             for r in base.receita_por_periodo("M")[-12:])
+            texto += "\nReceita por categoria:\n"
+            texto += "".join(f"   {r['categoria']} | R$ {r['receita']:.2f}\n"
+                             for r in base.receita_por_categoria())
+            texto += "\nProdutos mais vendidos:\n"
+            texto += "".join(f"   {r['id_produto']} - {r['produto']} | Qtd {r['quantidade']} | R$ {r['receita']:.2f}\n"
+                             for r in base.top_produtos(10))
+            abc = base.curva_abc()
+            texto += (f"\nCurva ABC: {len(abc['A'])} produto(s) A, {len(abc['B'])} B, "
+                      f"{len(abc['C'])} C\n")
+            texto += "\nMédia móvel de 7 dias (últimos 14 dias):\n"
+            texto += "".join(f"   {r['dia']} | R$ {r['receita']:.2f} | média R$ {r['media']:.2f}\n"
+                             for r in base.media_movel(7)[-14:])
+            return texto
+
+        self._relatorio(analytics.obter_base, formatar=formatar)
+
+    def exportar_relatorio(self):
+        """
+        Exporta um relatório para CSV/Parquet em segundo plano (ver
+        exportacao.py). Enquanto exporta, o botão cancela a exportação.
+        """
+        if self._parar_exportacao is not None:
+            self._parar_exportacao.set()
+            return
+        import exportacao
+        nome = self._pedir_relatorio_exportacao()
+        if nome is None:
+            return
+        relatorio = exportacao.RELATORIOS[nome]
+        parametros = self._pedir_parametros(relatorio)
+        if parametros is None:
+            return
+        tipos = [("CSV", "*.csv")]
+        if exportacao.ARROW_DISPONIVEL:
+            tipos += [("Parquet", "*.parquet"), ("Arrow", "*.arrow")]
+        destino = filedialog.asksaveasfilename(parent=self.root, title="Exportar relatório",
+                                               initialfile=f"{nome}.csv", defaultextension=".csv",
+                                               filetypes=tipos)
+        if not destino:
+            return
+
+        parar = self._parar_exportacao = threading.Event()
+        progresso = {"linhas": 0}
+
+        def contar(linhas):
+            # roda na thread de trabalho: só guarda o número para mostrar()
+            progresso["linhas"] = linhas
+
+        def mostrar():
+            if self._parar_exportacao is parar:
+                self._mostrar_relatorio(f"Exportando {relatorio.descricao.lower()}... "
+                                        f"{progresso['linhas']} linha(s)\n")
+                self.root.after(250, mostrar)
+
+        def terminar(linhas):
+            self._fim_exportacao()
+            if linhas is None:
+                self._mostrar_relatorio("Exportação cancelada.\n")
+            else:
+                self._mostrar_relatorio(f"{linhas} linha(s) exportada(s) para {destino}\n")
+
+        def falhar(erro):
+            self._fim_exportacao()
+            self._mostrar_relatorio("")
+            self.executor.mostrar_erro(erro)
+
+        self.btn_exportar.config(text="Cancelar exportação")
+        self.executor.submit(exportacao.exportar, nome, destino, parametros,
+                             ao_progresso=contar, parar=parar, canal="exportacao",
+                             ao_terminar=terminar, ao_falhar=falhar)
+        mostrar()
+
+    def _fim_exportacao(self):
+        self._parar_exportacao = None
+        self.btn_exportar.config(text="Exportar...")
+
+    def _pedir_relatorio_exportacao(self):
+        """Janela para escolher o relatório a exportar; devolve a chave em exportacao.RELATORIOS."""
+        import exportacao
+
+        dlg = tk.Toplevel(self.root)
+        dlg.title("Exportar relatório")
+
+        nomes = {r.descricao: nome for nome, r in exportacao.RELATORIOS.items()}
+        tk.Label(dlg, text="Relatório:").grid(row=0, column=0, padx=5, pady=5)
+        cb = ttk.Combobox(dlg, values=list(nomes), state="readonly", width=35)
+        cb.current(0)
+        cb.grid(row=0, column=1, padx=5, pady=5)
+
+        result = {}
+
+        def confirmar():
+            result["nome"] = nomes[cb.get()]
+            dlg.destroy()
+
+        ttk.Button(dlg, text="OK", command=confirmar).grid(row=1, column=0, columnspan=2, pady=10)
+
+        dlg.transient(self.root)
+        dlg.grab_set()
+        self.root.wait_window(dlg)
+
+        return result.get("nome")
+
+    def _pedir_parametros(self, relatorio):
+        """Valores dos parâmetros de ``relatorio`` (datas, cliente ou produto), ou None se cancelado."""
+        if relatorio.parametros == ("inicio", "fim"):
+            data_inicio, data_fim = self.pedir_datas()
+            return (data_inicio, data_fim) if data_inicio and data_fim else None
+        if relatorio.parametros == ("id_cliente",):
+            self.executor.submit(busca.clientes.atualizar, canal="relatorio")
+            cliente = escolher(self.root, relatorio.descricao, busca.clientes, _rotulo_cliente, self.executor)
+            return None if cliente is None else (cliente["id_cliente"],)
+        if relatorio.parametros == ("id_produto",):
+            self.executor.submit(busca.produtos.atualizar, canal="relatorio")
+            produto = escolher(self.root, relatorio.descricao, busca.produtos,
+                               lambda p: f"{p['id_produto']} - {p['nome']}", self.executor)
+            return None if produto is None else (produto["id_produto"],)
+        return ()
 
     def pedir_datas(self):
         """Abre uma janela com calendário para escolher data inicial e final."""
+        from tkcalendar import DateEntry
+
         dlg = tk.Toplevel(self.root)
         dlg.title("Selecionar Período")
 
@@ -697,16 +960,26 @@ class App:
 
 
 
+    def _atualizar_alertas(self):
+        """Atualiza a lista de estoque baixo em segundo plano e mostra o total no botão."""
+        def mostrar(produtos):
+            texto = f"Estoque baixo ({len(produtos)})" if produtos else "Estoque baixo"
+            self._texto_estoque_baixo = texto
+            if hasattr(self, "btn_estoque_baixo"):
+                self.btn_estoque_baixo.config(text=texto)
+
+        self.executor.submit(self.alertas.atualizar, canal="alertas", substituir=True,
+                             ao_terminar=mostrar)
+
     def report_estoque_baixo(self):
-        self.txt_rel.config(state="normal")   # habilita para edição
-        self.txt_rel.delete("1.0", "end")
-        rows = [p for p in repo.listar_produtos() if p["quantidade"] <= p["estoque_minimo"]]
-        if not rows:
-            self.txt_rel.insert("end", "Nenhum produto com estoque baixo\n")
-        else:
-            for r in rows:
-                self.txt_rel.insert("end", f"{r['id_produto']} - {r['nome']} | Qtd {r['quantidade']} | Min {r['estoque_minimo']}\n")
-        self.txt_rel.config(state="disabled")  # trava novamente
+        def formatar(rows):
+            if not rows:
+                return "Nenhum produto com estoque baixo\n"
+            return "".join(f"{r['id_produto']} - {r['nome']} | Qtd {r['quantidade']} | "
+                           f"Min {r['estoque_minimo']} | Déficit {r['deficit_estoque']}\n"
+                           for r in rows)
+
+        self._relatorio(self.alertas.atualizar, formatar=formatar)
 
     # def edit_produto(self):
     #     """Edita nome e/ou preço do produto selecionado."""
@@ -819,6 +1092,6 @@ class App:
         self.root.wait_window(dlg.top)
 
         if dlg.result:
-            nome, tel, email, id_endereco = dlg.result
-            repo.atualizar_fornecedor(id_fornecedor, nome, tel, email, id_endereco)
+            nome, tel, email, endereco = dlg.result
+            repo.editar_fornecedor(id_fornecedor, nome, tel, email, endereco)
             self.atualizar_fornecedores()
\ No newline at end of file
@@ -0,0 +1,151 @@
+# Execução de consultas fora da thread da interface
+
+"""
+Módulo ui_worker
+----------------
+Roda chamadas do repositório em threads de trabalho e entrega o resultado
+na thread do Tkinter (a única que pode mexer nos widgets).
+
+Os resultados vão para uma fila que é esvaziada por ``root.after``; os
+callbacks ``ao_terminar``/``ao_falhar`` rodam sempre na thread da
+interface.
+
+>>> executor = Executor(root)
+>>> executor.submit(repo.listar_itens_venda, 10, canal="itens",
+...                 substituir=True, ao_terminar=mostrar_itens)
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+
+class Tarefa:
+    """Uma chamada enviada ao :class:`Executor`."""
+
+    def __init__(self, canal):
+        self.canal = canal
+        self.cancelada = False
+
+    def cancelar(self):
+        """
+        Descarta o resultado. Se a chamada ainda não começou, ela nem é
+        executada; se já começou, termina mas os callbacks não são chamados.
+        """
+        self.cancelada = True
+
+
+class Executor:
+    """
+    Pool de threads para a interface.
+
+    Parameters
+    ----------
+    root : tk.Tk
+    workers : int, default=4
+        Threads de trabalho (cada uma usa no máximo uma conexão do pool).
+    intervalo : int, default=30
+        Milissegundos entre as verificações da fila de resultados.
+    ao_mudar_estado : callable, optional
+        ``ao_mudar_estado(canal, ocupado)``, chamado quando um canal passa a
+        ter tarefas pendentes ou fica livre (ex.: para mostrar "carregando").
+    """
+
+    def __init__(self, root, workers=4, intervalo=30, ao_mudar_estado=None):
+        self.root = root
+        self.intervalo = intervalo
+        self.ao_mudar_estado = ao_mudar_estado
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ui-worker")
+        self._resultados = queue.Queue()
+        self._ultima = {}       # canal -> última tarefa que pode ser substituída
+        self._pendentes = {}    # canal -> nº de tarefas ainda sem resultado
+        self._fechado = False
+        self.root.after(self.intervalo, self._drenar)
+
+    def submit(self, funcao, *args, canal=None, substituir=False,
+               ao_terminar=None, ao_falhar=None, **kwargs):
+        """
+        Agenda ``funcao(*args, **kwargs)`` numa thread de trabalho.
+
+        Parameters
+        ----------
+        canal : str, optional
+            Agrupa tarefas (uma aba, uma grade) para o estado "carregando".
+        substituir : bool
+            Cancela a tarefa anterior do mesmo canal enviada com
+            ``substituir=True`` (ex.: clicar duas vezes em "Atualizar").
+        ao_terminar : callable, optional
+            ``ao_terminar(resultado)``, na thread da interface.
+        ao_falhar : callable, optional
+            ``ao_falhar(exceção)``, na thread da interface (padrão: mostra
+            uma caixa de erro).
+
+        Returns
+        -------
+        Tarefa
+        """
+        tarefa = Tarefa(canal)
+        if substituir and canal is not None:
+            anterior = self._ultima.get(canal)
+            if anterior is not None:
+                anterior.cancelar()
+            self._ultima[canal] = tarefa
+        self._contar(canal, +1)
+
+        def rodar():
+            if tarefa.cancelada:
+                self._resultados.put((tarefa, None, None, None, None))
+                return
+            try:
+                resultado = funcao(*args, **kwargs)
+            except Exception as e:
+                self._resultados.put((tarefa, None, ao_falhar, None, e))
+            else:
+                self._resultados.put((tarefa, ao_terminar, None, resultado, None))
+
+        self._pool.submit(rodar)
+        return tarefa
+
+    def cancelar(self, canal):
+        """Cancela a última tarefa substituível do canal."""
+        tarefa = self._ultima.pop(canal, None)
+        if tarefa is not None:
+            tarefa.cancelar()
+
+    def ocupado(self, canal):
+        """Se o canal tem tarefas sem resultado."""
+        return self._pendentes.get(canal, 0) > 0
+
+    def fechar(self):
+        """Para de entregar resultados e descarta as tarefas na fila."""
+        self._fechado = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def mostrar_erro(self, erro):
+        messagebox.showerror("Erro", str(erro))
+
+    def _contar(self, canal, delta):
+        antes = self._pendentes.get(canal, 0)
+        self._pendentes[canal] = antes + delta
+        if self.ao_mudar_estado is not None and canal is not None and (antes == 0) != (antes + delta == 0):
+            self.ao_mudar_estado(canal, antes == 0)
+
+    def _drenar(self):
+        if self._fechado:
+            return
+        # reagenda antes, para um callback com erro não parar a entrega
+        self.root.after(self.intervalo, self._drenar)
+        while True:
+            try:
+                tarefa, ao_terminar, ao_falhar, resultado, erro = self._resultados.get_nowait()
+            except queue.Empty:
+                return
+            self._contar(tarefa.canal, -1)
+            if self._ultima.get(tarefa.canal) is tarefa:
+                del self._ultima[tarefa.canal]
+            if tarefa.cancelada:
+                continue
+            if erro is not None:
+                (ao_falhar or self.mostrar_erro)(erro)
+            elif ao_terminar is not None:
+                ao_terminar(resultado)